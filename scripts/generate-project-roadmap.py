@@ -1,574 +1,14 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from datetime import datetime
-import os
+import sys
 
-def create_project_roadmap():
-    # Create the PDF document
-    filename = "Epic360_Gigs_Development_Roadmap.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4, 
-                          rightMargin=72, leftMargin=72, 
-                          topMargin=72, bottomMargin=18)
-    
-    # Get sample styles and create custom styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#2D5A27')
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor=colors.HexColor('#2D5A27')
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=14,
-        spaceAfter=8,
-        spaceBefore=12,
-        textColor=colors.HexColor('#1B4D3E')
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=8,
-        alignment=TA_JUSTIFY
-    )
-    
-    # Story elements
-    story = []
-    
-    # Title Page
-    story.append(Paragraph("Epic360 Gigs", title_style))
-    story.append(Paragraph("Freelance Platform Development Roadmap", styles['Heading2']))
-    story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Executive Summary
-    story.append(Paragraph("Executive Summary", heading_style))
-    story.append(Paragraph("""
-    This comprehensive roadmap outlines the development phases for Epic360 Gigs, a modern freelance marketplace platform. 
-    The project is structured in phases to ensure systematic development, proper testing, and successful deployment. 
-    The platform will connect clients with skilled freelancers across 18+ service categories, providing a secure, 
-    user-friendly environment for project collaboration and payment processing.
-    """, body_style))
-    
-    story.append(PageBreak())
-    
-    # Table of Contents
-    story.append(Paragraph("Table of Contents", heading_style))
-    toc_data = [
-        ["Section", "Page"],
-        ["Phase 1: Foundation & Core Platform (Weeks 1-2)", "3"],
-        ["Phase 2: User Experience & Interface (Weeks 3-4)", "5"],
-        ["Phase 3: Advanced Features & Integrations (Weeks 5-6)", "7"],
-        ["Phase 4: Testing & Optimization (Week 7)", "9"],
-        ["Phase 5: Deployment & Launch (Week 8)", "10"],
-        ["External Services Setup Guide", "11"],
-        ["Timeline Overview", "12"],
-        ["Technical Architecture", "13"],
-        ["Development Best Practices", "14"],
-        ["Post-Launch Roadmap", "15"]
-    ]
-    
-    toc_table = Table(toc_data, colWidths=[4*inch, 1*inch])
-    toc_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2D5A27')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(toc_table)
-    
-    story.append(PageBreak())
-    
-    # Phase 1: Foundation & Core Platform
-    story.append(Paragraph("Phase 1: Foundation & Core Platform", heading_style))
-    story.append(Paragraph("Duration: Weeks 1-2 | Estimated Effort: 40-50 hours", subheading_style))
-    
-    story.append(Paragraph("Overview", subheading_style))
-    story.append(Paragraph("""
-    Phase 1 establishes the fundamental architecture and core functionalities of the platform. 
-    This phase focuses on setting up the development environment, implementing authentication, 
-    and creating the basic user management system.
-    """, body_style))
-    
-    story.append(Paragraph("Key Deliverables", subheading_style))
-    phase1_tasks = [
-        "✓ Database schema design and implementation",
-        "✓ User authentication system (Supabase Auth)",
-        "✓ User registration and profile management",
-        "✓ Basic dashboard functionality",
-        "✓ Core navigation structure",
-        "✓ Responsive layout foundation",
-        "✓ Security policies implementation",
-        "✓ Development environment setup"
-    ]
-    
-    for task in phase1_tasks:
-        story.append(Paragraph(task, body_style))
-    
-    story.append(Paragraph("Technical Components", subheading_style))
-    tech_components = """
-    <b>Database Tables:</b><br/>
-    • profiles: User information and preferences<br/>
-    • gigs: Service listings and details<br/>
-    • orders: Transaction records<br/>
-    • messages: Communication system<br/>
-    • reviews: Rating and feedback system<br/><br/>
-    
-    <b>Authentication:</b><br/>
-    • Email/password authentication<br/>
-    • Social login integration<br/>
-    • Role-based access control<br/>
-    • Session management<br/><br/>
-    
-    <b>Core Features:</b><br/>
-    • User profile creation and editing<br/>
-    • Basic dashboard with statistics<br/>
-    • Navigation and routing<br/>
-    • Responsive design implementation
-    """
-    story.append(Paragraph(tech_components, body_style))
-    
-    story.append(PageBreak())
-    
-    # Phase 2: User Experience & Interface
-    story.append(Paragraph("Phase 2: User Experience & Interface", heading_style))
-    story.append(Paragraph("Duration: Weeks 3-4 | Estimated Effort: 45-55 hours", subheading_style))
-    
-    story.append(Paragraph("Overview", subheading_style))
-    story.append(Paragraph("""
-    Phase 2 concentrates on building the user-facing features that enable core platform functionality. 
-    This includes gig creation, browsing, search capabilities, and the foundation for user interactions.
-    """, body_style))
-    
-    story.append(Paragraph("Key Deliverables", subheading_style))
-    phase2_tasks = [
-        "✓ Gig creation and management system",
-        "✓ Service browsing and category pages",
-        "✓ Advanced search and filtering",
-        "✓ User profile enhancements",
-        "✓ Gig detail pages with booking flow",
-        "✓ Basic messaging interface",
-        "✓ Image upload and management",
-        "✓ Mobile-responsive optimizations"
-    ]
-    
-    for task in phase2_tasks:
-        story.append(Paragraph(task, body_style))
-    
-    story.append(Paragraph("User Experience Focus", subheading_style))
-    ux_focus = """
-    <b>Search & Discovery:</b><br/>
-    • Category-based browsing with 18+ service categories<br/>
-    • Advanced filtering (price, location, rating, delivery time)<br/>
-    • Search functionality with tag and keyword support<br/>
-    • Personalized recommendations<br/><br/>
-    
-    <b>Gig Management:</b><br/>
-    • Intuitive gig creation workflow<br/>
-    • Rich text descriptions and media uploads<br/>
-    • Pricing and package options<br/>
-    • Portfolio and sample work displays<br/><br/>
-    
-    <b>Communication:</b><br/>
-    • Real-time messaging system<br/>
-    • File sharing capabilities<br/>
-    • Notification system<br/>
-    • Order-specific communication threads
-    """
-    story.append(Paragraph(ux_focus, body_style))
-    
-    story.append(PageBreak())
-    
-    # Phase 3: Advanced Features & Integrations
-    story.append(Paragraph("Phase 3: Advanced Features & Integrations", heading_style))
-    story.append(Paragraph("Duration: Weeks 5-6 | Estimated Effort: 50-60 hours", subheading_style))
-    
-    story.append(Paragraph("Overview", subheading_style))
-    story.append(Paragraph("""
-    Phase 3 implements advanced features that differentiate the platform and provide comprehensive 
-    functionality for both freelancers and clients. This includes payment processing, advanced 
-    communication tools, and business intelligence features.
-    """, body_style))
-    
-    story.append(Paragraph("Payment System Integration", subheading_style))
-    payment_details = """
-    <b>Stripe Integration:</b><br/>
-    • Secure payment processing<br/>
-    • Multi-currency support<br/>
-    • Escrow system for project payments<br/>
-    • Automatic fee calculation and collection<br/>
-    • Payout management for freelancers<br/>
-    • Subscription plans for premium features<br/><br/>
-    
-    <b>Financial Features:</b><br/>
-    • Invoice generation and management<br/>
-    • Tax calculation and reporting<br/>
-    • Payment history and analytics<br/>
-    • Refund and dispute handling<br/>
-    • Revenue tracking and reporting
-    """
-    story.append(Paragraph(payment_details, body_style))
-    
-    story.append(Paragraph("Advanced Communication", subheading_style))
-    comm_details = """
-    <b>Real-time Features:</b><br/>
-    • Live chat with typing indicators<br/>
-    • File sharing and collaboration tools<br/>
-    • Video call integration (optional)<br/>
-    • Push notifications<br/>
-    • Email notification system<br/><br/>
-    
-    <b>Project Management:</b><br/>
-    • Milestone tracking<br/>
-    • Deadline management<br/>
-    • Progress reporting<br/>
-    • Revision requests and approval flows<br/>
-    • Time tracking (for hourly projects)
-    """
-    story.append(Paragraph(comm_details, body_style))
-    
-    story.append(PageBreak())
-    
-    # Phase 4: Testing & Optimization
-    story.append(Paragraph("Phase 4: Testing & Optimization", heading_style))
-    story.append(Paragraph("Duration: Week 7 | Estimated Effort: 25-35 hours", subheading_style))
-    
-    story.append(Paragraph("Testing Strategy", subheading_style))
-    testing_strategy = """
-    <b>Functional Testing:</b><br/>
-    • User registration and authentication flows<br/>
-    • Gig creation and management<br/>
-    • Search and filtering functionality<br/>
-    • Payment processing and escrow<br/>
-    • Messaging and notification systems<br/><br/>
-    
-    <b>Performance Testing:</b><br/>
-    • Page load speed optimization<br/>
-    • Database query optimization<br/>
-    • Image compression and CDN setup<br/>
-    • Mobile performance testing<br/>
-    • Stress testing for concurrent users<br/><br/>
-    
-    <b>Security Testing:</b><br/>
-    • Authentication and authorization<br/>
-    • Data validation and sanitization<br/>
-    • SQL injection prevention<br/>
-    • XSS protection<br/>
-    • Rate limiting implementation
-    """
-    story.append(Paragraph(testing_strategy, body_style))
-    
-    story.append(Paragraph("Quality Assurance", subheading_style))
-    qa_details = """
-    <b>User Acceptance Testing:</b><br/>
-    • End-to-end user workflows<br/>
-    • Cross-browser compatibility<br/>
-    • Mobile responsiveness<br/>
-    • Accessibility compliance<br/>
-    • Usability testing<br/><br/>
-    
-    <b>Bug Tracking and Resolution:</b><br/>
-    • Issue categorization and prioritization<br/>
-    • Regression testing<br/>
-    • Performance monitoring<br/>
-    • Error logging and reporting<br/>
-    • User feedback integration
-    """
-    story.append(Paragraph(qa_details, body_style))
-    
-    story.append(PageBreak())
-    
-    # Phase 5: Deployment & Launch
-    story.append(Paragraph("Phase 5: Deployment & Launch", heading_style))
-    story.append(Paragraph("Duration: Week 8 | Estimated Effort: 20-30 hours", subheading_style))
-    
-    story.append(Paragraph("Deployment Strategy", subheading_style))
-    deployment_strategy = """
-    <b>Production Environment Setup:</b><br/>
-    • Vercel deployment configuration<br/>
-    • Environment variables management<br/>
-    • Database migration and seeding<br/>
-    • CDN setup and optimization<br/>
-    • SSL certificate implementation<br/><br/>
-    
-    <b>Monitoring and Analytics:</b><br/>
-    • Application performance monitoring<br/>
-    • User analytics tracking<br/>
-    • Error monitoring and alerting<br/>
-    • Database performance monitoring<br/>
-    • Security monitoring<br/><br/>
-    
-    <b>Launch Preparation:</b><br/>
-    • Final security audit<br/>
-    • Performance optimization<br/>
-    • Backup and disaster recovery<br/>
-    • Documentation completion<br/>
-    • Team training and handover
-    """
-    story.append(Paragraph(deployment_strategy, body_style))
-    
-    story.append(PageBreak())
-    
-    # External Services Setup Guide
-    story.append(Paragraph("External Services Setup Guide", heading_style))
-    
-    story.append(Paragraph("Required Third-Party Services", subheading_style))
-    external_services = """
-    <b>1. Stripe Payment Processing</b><br/>
-    • Setup time: 2-3 hours<br/>
-    • Requirements: Business verification, bank account<br/>
-    • Integration: Stripe Connect for marketplace<br/>
-    • Features: Payments, subscriptions, payouts<br/><br/>
-    
-    <b>2. Email Service (SendGrid/Mailgun)</b><br/>
-    • Setup time: 1-2 hours<br/>
-    • Requirements: Domain verification<br/>
-    • Features: Transactional emails, templates<br/>
-    • Volume: Up to 10,000 emails/month (free tier)<br/><br/>
-    
-    <b>3. File Storage (Vercel Blob/AWS S3)</b><br/>
-    • Setup time: 1 hour<br/>
-    • Requirements: Account setup<br/>
-    • Features: Image uploads, document storage<br/>
-    • CDN integration for performance<br/><br/>
-    
-    <b>4. Push Notifications (OneSignal)</b><br/>
-    • Setup time: 2 hours<br/>
-    • Requirements: App configuration<br/>
-    • Features: Web push, email notifications<br/>
-    • Free tier: Up to 10,000 subscribers<br/><br/>
-    
-    <b>5. Video Calling (Optional - Twilio/Agora)</b><br/>
-    • Setup time: 3-4 hours<br/>
-    • Requirements: API keys, configuration<br/>
-    • Features: In-app video calls<br/>
-    • Pay-per-use pricing model
-    """
-    story.append(Paragraph(external_services, body_style))
-    
-    story.append(PageBreak())
-    
-    # Timeline Overview
-    story.append(Paragraph("Development Timeline Overview", heading_style))
-    
-    timeline_data = [
-        ["Phase", "Duration", "Key Milestones", "Effort (Hours)"],
-        ["Phase 1: Foundation", "Weeks 1-2", "Auth, Database, Core UI", "40-50"],
-        ["Phase 2: UX & Interface", "Weeks 3-4", "Gig System, Search, Profiles", "45-55"],
-        ["Phase 3: Advanced Features", "Weeks 5-6", "Payments, Messaging, Analytics", "50-60"],
-        ["Phase 4: Testing", "Week 7", "QA, Performance, Security", "25-35"],
-        ["Phase 5: Deployment", "Week 8", "Launch, Monitoring, Documentation", "20-30"],
-        ["Total", "8 Weeks", "Full Platform Launch", "180-230"]
-    ]
-    
-    timeline_table = Table(timeline_data, colWidths=[1.5*inch, 1.2*inch, 2*inch, 1.3*inch])
-    timeline_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2D5A27')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 9)
-    ]))
-    story.append(timeline_table)
-    
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Critical Path Analysis
-    story.append(Paragraph("Critical Path Analysis", subheading_style))
-    critical_path = """
-    <b>Dependencies and Risk Factors:</b><br/>
-    • Database design must be completed before UI development<br/>
-    • Authentication system required for all user features<br/>
-    • Payment integration dependent on Stripe approval (2-5 days)<br/>
-    • Email service setup required for user notifications<br/>
-    • File storage setup needed before image upload features<br/><br/>
-    
-    <b>Parallel Development Opportunities:</b><br/>
-    • UI components can be developed while backend APIs are being built<br/>
-    • Testing can begin as soon as core features are implemented<br/>
-    • Documentation can be written concurrently with development<br/>
-    • External service integrations can be prepared in advance
-    """
-    story.append(Paragraph(critical_path, body_style))
-    
-    story.append(PageBreak())
-    
-    # Technical Architecture
-    story.append(Paragraph("Technical Architecture", heading_style))
-    
-    story.append(Paragraph("Technology Stack", subheading_style))
-    tech_stack = """
-    <b>Frontend:</b><br/>
-    • Next.js 15 with App Router<br/>
-    • React 19 with Server Components<br/>
-    • TypeScript for type safety<br/>
-    • Tailwind CSS for styling<br/>
-    • Shadcn/UI component library<br/><br/>
-    
-    <b>Backend:</b><br/>
-    • Supabase for database and authentication<br/>
-    • PostgreSQL database with Row Level Security<br/>
-    • Server Actions for form handling<br/>
-    • API Routes for complex operations<br/><br/>
-    
-    <b>Infrastructure:</b><br/>
-    • Vercel for hosting and deployment<br/>
-    • Vercel Blob for file storage<br/>
-    • CDN for global content delivery<br/>
-    • Environment-based configuration<br/><br/>
-    
-    <b>Development Tools:</b><br/>
-    • Git for version control<br/>
-    • TypeScript for development<br/>
-    • ESLint and Prettier for code quality<br/>
-    • Vercel CLI for deployment
-    """
-    story.append(Paragraph(tech_stack, body_style))
-    
-    story.append(Paragraph("Database Schema Overview", subheading_style))
-    db_schema = """
-    <b>Core Tables:</b><br/>
-    • profiles: User information, skills, ratings<br/>
-    • gigs: Service listings, pricing, categories<br/>
-    • orders: Transactions, status, requirements<br/>
-    • messages: Communication between users<br/>
-    • reviews: Ratings and feedback<br/>
-    • notifications: System and user notifications<br/><br/>
-    
-    <b>Security Features:</b><br/>
-    • Row Level Security (RLS) policies<br/>
-    • User-based data access control<br/>
-    • Encrypted sensitive data<br/>
-    • API rate limiting<br/>
-    • Input validation and sanitization
-    """
-    story.append(Paragraph(db_schema, body_style))
-    
-    story.append(PageBreak())
-    
-    # Development Best Practices
-    story.append(Paragraph("Development Best Practices", heading_style))
-    
-    best_practices = """
-    <b>Code Quality:</b><br/>
-    • Consistent TypeScript usage throughout the project<br/>
-    • Component-based architecture with reusable UI elements<br/>
-    • Comprehensive error handling and logging<br/>
-    • Code reviews and pair programming<br/>
-    • Automated testing for critical workflows<br/><br/>
-    
-    <b>Performance Optimization:</b><br/>
-    • Server-side rendering for better SEO<br/>
-    • Image optimization and lazy loading<br/>
-    • Database query optimization<br/>
-    • Caching strategies for frequently accessed data<br/>
-    • Bundle size optimization<br/><br/>
-    
-    <b>Security Measures:</b><br/>
-    • Input validation on both client and server<br/>
-    • CSRF protection for form submissions<br/>
-    • Rate limiting for API endpoints<br/>
-    • Secure cookie handling<br/>
-    • Regular security audits<br/><br/>
-    
-    <b>Scalability Considerations:</b><br/>
-    • Modular architecture for easy feature additions<br/>
-    • Database indexing for query performance<br/>
-    • CDN usage for global content delivery<br/>
-    • Horizontal scaling capabilities<br/>
-    • Monitoring and alerting systems
-    """
-    story.append(Paragraph(best_practices, body_style))
-    
-    story.append(PageBreak())
-    
-    # Post-Launch Roadmap
-    story.append(Paragraph("Post-Launch Roadmap", heading_style))
-    
-    story.append(Paragraph("Phase 6: Growth & Optimization (Months 2-3)", subheading_style))
-    phase6_features = """
-    <b>Advanced Features:</b><br/>
-    • AI-powered gig recommendations<br/>
-    • Advanced analytics dashboard<br/>
-    • Multi-language support<br/>
-    • Mobile app development<br/>
-    • Advanced project management tools<br/><br/>
-    
-    <b>Business Features:</b><br/>
-    • Subscription plans for freelancers<br/>
-    • Featured listing promotions<br/>
-    • Advanced reporting and insights<br/>
-    • Bulk order management<br/>
-    • Team collaboration features
-    """
-    story.append(Paragraph(phase6_features, body_style))
-    
-    story.append(Paragraph("Phase 7: Scale & Expansion (Months 4-6)", subheading_style))
-    phase7_features = """
-    <b>Platform Expansion:</b><br/>
-    • API for third-party integrations<br/>
-    • White-label solutions<br/>
-    • Enterprise features<br/>
-    • Advanced fraud detection<br/>
-    • Machine learning recommendations<br/><br/>
-    
-    <b>Market Expansion:</b><br/>
-    • International payment methods<br/>
-    • Local currency support<br/>
-    • Regional customization<br/>
-    • Partnership integrations<br/>
-    • Compliance with local regulations
-    """
-    story.append(Paragraph(phase7_features, body_style))
-    
-    # Footer
-    story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph("End of Document", styles['Normal']))
-    story.append(Paragraph(f"Generated by Epic360 Gigs Development Team | {datetime.now().strftime('%Y')}", styles['Normal']))
-    
-    # Build PDF
-    doc.build(story)
-    return filename
+from roadmap import load_document, main, render_pdf
 
-# Generate the PDF
-filename = create_project_roadmap()
-print(f"Project roadmap generated successfully: {filename}")
-print(f"File size: {os.path.getsize(filename) / 1024:.1f} KB")
-print("\nPDF Contents:")
-print("- Executive Summary")
-print("- 5 Detailed Development Phases")
-print("- External Services Setup Guide")
-print("- Technical Architecture")
-print("- Development Timeline")
-print("- Best Practices")
-print("- Post-Launch Roadmap")
+
+def create_project_roadmap(output=None):
+    # Content comes from roadmap/roadmap.json, compiled once and cached.
+    # ``output`` is a path or a writable binary stream (default: the spec's filename).
+    document = load_document()
+    return render_pdf(document, output or document.filename)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
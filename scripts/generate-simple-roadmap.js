@@ -1,208 +0,0 @@
-import fs from "fs"
-
-// Create a detailed markdown version that can be easily converted to PDF
-const roadmapContent = `# Epic360 Gigs - Development Roadmap
-
-## Executive Summary
-This comprehensive roadmap outlines the development phases for Epic360 Gigs, a modern freelance marketplace platform. The project is structured in phases to ensure systematic development, proper testing, and successful deployment.
-
-## Phase 1: Foundation & Core Platform (Weeks 1-2)
-**Estimated Effort: 40-50 hours**
-
-### Key Deliverables
-- ✅ Database schema design and implementation
-- ✅ User authentication system (Supabase Auth)
-- ✅ User registration and profile management
-- ✅ Basic dashboard functionality
-- ✅ Core navigation structure
-- ✅ Responsive layout foundation
-- ✅ Security policies implementation
-- ✅ Development environment setup
-
-### Technical Components
-**Database Tables:**
-- profiles: User information and preferences
-- gigs: Service listings and details
-- orders: Transaction records
-- messages: Communication system
-- reviews: Rating and feedback system
-
-**Authentication:**
-- Email/password authentication
-- Social login integration
-- Role-based access control
-- Session management
-
-## Phase 2: User Experience & Interface (Weeks 3-4)
-**Estimated Effort: 45-55 hours**
-
-### Key Deliverables
-- ✅ Gig creation and management system
-- ✅ Service browsing and category pages
-- ✅ Advanced search and filtering
-- ✅ User profile enhancements
-- ✅ Gig detail pages with booking flow
-- ✅ Basic messaging interface
-- ✅ Image upload and management
-- ✅ Mobile-responsive optimizations
-
-### User Experience Focus
-**Search & Discovery:**
-- Category-based browsing with 18+ service categories
-- Advanced filtering (price, location, rating, delivery time)
-- Search functionality with tag and keyword support
-- Personalized recommendations
-
-**Gig Management:**
-- Intuitive gig creation workflow
-- Rich text descriptions and media uploads
-- Pricing and package options
-- Portfolio and sample work displays
-
-## Phase 3: Advanced Features & Integrations (Weeks 5-6)
-**Estimated Effort: 50-60 hours**
-
-### Payment System Integration
-**Stripe Integration:**
-- Secure payment processing
-- Multi-currency support
-- Escrow system for project payments
-- Automatic fee calculation and collection
-- Payout management for freelancers
-- Subscription plans for premium features
-
-### Advanced Communication
-**Real-time Features:**
-- Live chat with typing indicators
-- File sharing and collaboration tools
-- Video call integration (optional)
-- Push notifications
-- Email notification system
-
-## Phase 4: Testing & Optimization (Week 7)
-**Estimated Effort: 25-35 hours**
-
-### Testing Strategy
-**Functional Testing:**
-- User registration and authentication flows
-- Gig creation and management
-- Search and filtering functionality
-- Payment processing and escrow
-- Messaging and notification systems
-
-**Performance Testing:**
-- Page load speed optimization
-- Database query optimization
-- Image compression and CDN setup
-- Mobile performance testing
-- Stress testing for concurrent users
-
-## Phase 5: Deployment & Launch (Week 8)
-**Estimated Effort: 20-30 hours**
-
-### Deployment Strategy
-**Production Environment Setup:**
-- Vercel deployment configuration
-- Environment variables management
-- Database migration and seeding
-- CDN setup and optimization
-- SSL certificate implementation
-
-## External Services Setup Guide
-
-### Required Third-Party Services
-
-**1. Stripe Payment Processing**
-- Setup time: 2-3 hours
-- Requirements: Business verification, bank account
-- Integration: Stripe Connect for marketplace
-- Features: Payments, subscriptions, payouts
-
-**2. Email Service (SendGrid/Mailgun)**
-- Setup time: 1-2 hours
-- Requirements: Domain verification
-- Features: Transactional emails, templates
-- Volume: Up to 10,000 emails/month (free tier)
-
-**3. File Storage (Vercel Blob/AWS S3)**
-- Setup time: 1 hour
-- Requirements: Account setup
-- Features: Image uploads, document storage
-- CDN integration for performance
-
-## Development Timeline Overview
-
-| Phase | Duration | Key Milestones | Effort (Hours) |
-|-------|----------|----------------|----------------|
-| Phase 1: Foundation | Weeks 1-2 | Auth, Database, Core UI | 40-50 |
-| Phase 2: UX & Interface | Weeks 3-4 | Gig System, Search, Profiles | 45-55 |
-| Phase 3: Advanced Features | Weeks 5-6 | Payments, Messaging, Analytics | 50-60 |
-| Phase 4: Testing | Week 7 | QA, Performance, Security | 25-35 |
-| Phase 5: Deployment | Week 8 | Launch, Monitoring, Documentation | 20-30 |
-| **Total** | **8 Weeks** | **Full Platform Launch** | **180-230** |
-
-## Technical Architecture
-
-### Technology Stack
-**Frontend:**
-- Next.js 15 with App Router
-- React 19 with Server Components
-- TypeScript for type safety
-- Tailwind CSS for styling
-- Shadcn/UI component library
-
-**Backend:**
-- Supabase for database and authentication
-- PostgreSQL database with Row Level Security
-- Server Actions for form handling
-- API Routes for complex operations
-
-**Infrastructure:**
-- Vercel for hosting and deployment
-- Vercel Blob for file storage
-- CDN for global content delivery
-- Environment-based configuration
-
-## Post-Launch Roadmap
-
-### Phase 6: Growth & Optimization (Months 2-3)
-**Advanced Features:**
-- AI-powered gig recommendations
-- Advanced analytics dashboard
-- Multi-language support
-- Mobile app development
-- Advanced project management tools
-
-### Phase 7: Scale & Expansion (Months 4-6)
-**Platform Expansion:**
-- API for third-party integrations
-- White-label solutions
-- Enterprise features
-- Advanced fraud detection
-- Machine learning recommendations
-
----
-
-**Generated by Epic360 Gigs Development Team**
-**Total Development Time: 8 Weeks (180-230 hours)**
-**Recommended Approach: Phased development with weekly milestones**
-`
-
-// Write the markdown file
-fs.writeFileSync("Epic360_Gigs_Development_Roadmap.md", roadmapContent)
-
-console.log("✅ Development roadmap generated successfully!")
-console.log("📄 File: Epic360_Gigs_Development_Roadmap.md")
-console.log("📍 Location: Root directory of your project")
-console.log("")
-console.log("📋 Document includes:")
-console.log("  • 5 Detailed development phases")
-console.log("  • Timeline with effort estimates")
-console.log("  • External services setup guide")
-console.log("  • Technical architecture overview")
-console.log("  • Post-launch roadmap")
-console.log("")
-console.log("💡 You can convert this Markdown to PDF using:")
-console.log("  • Online converters (markdown-pdf.com)")
-console.log("  • VS Code extensions")
-console.log("  • Pandoc command line tool")
@@ -0,0 +1,56 @@
+"""Epic360 Gigs roadmap generator.
+
+Content lives in a declarative spec (``roadmap.json``) that is compiled once
+into a compact model; renderers consume that model.
+
+Importing the package is free: each public name is imported from its
+submodule on first access, so a command only pays for the parts of
+reportlab it actually uses.
+"""
+import importlib
+
+_EXPORTS = {
+    "CatalogError": "i18n",
+    "ContentError": "content",
+    "Document": "content",
+    "Section": "content",
+    "Snapshot": "snapshot",
+    "SnapshotError": "snapshot",
+    "Subquery": "snapshot",
+    "TaskTable": "timeline",
+    "Theme": "theme",
+    "TimelineError": "timeline",
+    "Trace": "trace",
+    "artifact_key": "artifacts",
+    "build_story": "render",
+    "get_theme": "theme",
+    "load_document": "content",
+    "main": "cli",
+    "register_font": "theme",
+    "register_theme": "theme",
+    "render_analytics_report": "analytics",
+    "render_artifact": "artifacts",
+    "render_bytes": "outputs",
+    "render_html": "text",
+    "render_locales": "i18n",
+    "render_markdown": "text",
+    "render_outputs": "outputs",
+    "render_pdf": "render",
+    "thumbnail": "thumbnail",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name)) from None
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
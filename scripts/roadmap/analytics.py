@@ -0,0 +1,640 @@
+"""Marketplace analytics report over large ``orders``/``services``/``reviews`` exports.
+
+The report covers revenue per category, the order status funnel, delivery
+time percentiles and the rating distribution, as tables and bar charts in
+the same PDF pipeline as the order report.  Everything is computed with
+NumPy over whole columns - group-bys are ``bincount``s and stable sorts,
+joins go through hash tables or ``searchsorted`` over hashed keys - so there is no per-row Python
+code anywhere, and a 10M-row export is a few seconds of array work.
+
+A snapshot directory holds one ``<table>.csv`` or ``<table>.parquet``
+export per table.  The first time an export is read, the columns the report
+needs are converted into a column store: one ``.npy`` file per column in
+the cache directory, one store per export, rebuilt when the export's size
+or modification time changes.  Later reports memory-map those files, so they touch only the pages
+they read and start in milliseconds.  CSV files are themselves
+memory-mapped and split into rows and fields with vectorized scans, a few
+megabytes at a time; Parquet needs ``pyarrow``.
+
+Needs NumPy (see ``requirements.txt``).  Run from the ``scripts`` directory:
+
+    python -m roadmap.analytics --snapshot exports/ -o analytics.pdf
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    _NO_NUMPY = "the analytics report needs NumPy: pip install -r requirements.txt (from the scripts directory)"
+    if __name__ == "__main__":
+        sys.exit(_NO_NUMPY)
+    raise ImportError(_NO_NUMPY) from None
+
+from .cache import cache_dir, prune, touch
+from .snapshot import SnapshotError
+
+# Bump whenever the stored column format changes so stale stores are ignored.
+STORE_VERSION = 2
+
+# Column stores kept; the least recently used beyond this are removed.
+MAX_STORES = 16
+
+# Bytes of CSV scanned at a time; a chunk grows when a single row is longer.
+CHUNK_BYTES = 1 << 24
+
+# Longer fields are truncated; every column the report reads is shorter.
+MAX_FIELD = 64
+
+# How each column the report reads is stored: "number" as float64 (NaN when
+# empty), "time" as float64 epoch seconds (UTC), "category" as int32 codes into a
+# label list (-1 when empty) and "key" as a uint64 hash (0 when empty).
+TABLES = {
+    "orders": {"id": "key", "gig_id": "key", "service_id": "key", "status": "category",
+               "total_amount": "number", "created_at": "time", "completed_date": "time"},
+    "services": {"id": "key", "category": "category"},
+    "gigs": {"id": "key", "category": "category"},
+    "reviews": {"order_id": "key", "rating": "number"},
+}
+
+# Order statuses allowed by the migrations, in report order; unknown ones follow.
+STATUSES = ("pending", "in_progress", "completed", "cancelled", "disputed")
+
+# Funnel stages and the statuses of the orders that reached them (None: every order).
+FUNNEL = (("Placed", None), ("Started", ("in_progress", "completed")), ("Completed", ("completed",)))
+
+PERCENTILES = (50, 75, 90, 95, 99)
+
+# Joins into smaller tables go through a hash table, larger ones through a sort.
+HASH_JOIN_ROWS = 1 << 20
+
+UNCATEGORIZED = "Uncategorized"
+
+Categorical = namedtuple("Categorical", "codes labels")
+
+# ``categories`` rows are (name, orders, completed, revenue, average order,
+# average rating, median delivery days, p90 delivery days); ``funnel`` rows
+# (stage, orders); ``statuses`` rows (status, orders); ``delivery`` maps each
+# percentile to days; ``ratings`` counts 1..5 stars.
+Analytics = namedtuple("Analytics", "orders services reviews categories funnel statuses delivery ratings")
+
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _fixed(data, starts, ends):
+    """Fields ``data[starts[i]:ends[i]]`` as one fixed-width bytes array."""
+    lengths = np.minimum(ends - starts, MAX_FIELD)
+    width = max(int(lengths.max()) if len(lengths) else 0, 1)
+    offsets = np.arange(width)
+    index = np.minimum(starts[:, None] + offsets, len(data) - 1)
+    chars = data[index]
+    chars[offsets >= lengths[:, None]] = 0
+    return chars.view("S%d" % width).ravel()
+
+
+def _hash(values):
+    """64-bit FNV-1a of each value; 0 for an empty one."""
+    width = values.dtype.itemsize
+    chars = np.ascontiguousarray(values).view(np.uint8).reshape(len(values), width)
+    lengths = (chars != 0).sum(axis=1)
+    hashes = np.full(len(values), _FNV_OFFSET, dtype=np.uint64)
+    for j in range(width):
+        live = j < lengths
+        hashes[live] = (hashes[live] ^ chars[live, j]) * _FNV_PRIME
+    hashes[lengths == 0] = 0
+    return hashes
+
+
+def _timestamps(values):
+    """Seconds since the epoch of ISO 8601 timestamps (a bytes array).
+
+    Fractions of a second are kept.  A trailing ``Z`` or UTC offset
+    (``+02:00``, ``-0500``, ``+05``) is applied; times without one are UTC.
+    """
+    width = values.dtype.itemsize
+    chars = np.ascontiguousarray(values).view(np.uint8).reshape(len(values), width).copy()
+    lengths = (chars != 0).sum(axis=1)
+    rows = np.arange(len(values))
+
+    def back(k):
+        """The k-th byte from the end of each value, 0 where it is shorter."""
+        return np.where(lengths >= k, chars[rows, np.maximum(lengths - k, 0)], 0)
+
+    def two_digits(k, picked):
+        tens, ones = back(k)[picked].astype(np.int64) - 48, back(k - 1)[picked].astype(np.int64) - 48
+        if ((tens < 0) | (tens > 9) | (ones < 0) | (ones > 9)).any():
+            raise ValueError("malformed UTC offset")
+        return 10 * tens + ones
+
+    cut = np.where(back(1) == 90, 1, 0)  # "Z"
+    offset = np.zeros(len(values))
+    # An offset sign only counts after the date, whose own dashes end at byte 7.
+    for size, minutes in ((6, 2), (5, 2), (3, None)):
+        sign = back(size)
+        has = (cut == 0) & ((sign == 43) | (sign == 45)) & (lengths - size > 10)
+        if not has.any():
+            continue
+        if size == 6 and (back(3)[has] != 58).any():
+            raise ValueError("malformed UTC offset")
+        picked = np.flatnonzero(has)
+        hours = two_digits(size - 1, picked)
+        mins = two_digits(minutes, picked) if minutes else 0
+        offset[picked] = np.where(sign[picked] == 45, -1, 1) * (3600 * hours + 60 * mins)
+        cut[picked] = size
+    chars[np.arange(width) >= (lengths - cut)[:, None]] = 0
+    base = chars.view("S%d" % width).ravel().astype("U%d" % width).astype("datetime64[us]")
+    return base.astype(np.int64) / 1e6 - offset
+
+
+def _convert(kind, values, labels, where):
+    """Store ``values`` (a bytes array) as ``kind``; ``labels`` grows with new categories."""
+    present = values != b""
+    try:
+        if kind == "number":
+            out = np.full(len(values), np.nan)
+            out[present] = values[present].astype(np.float64)
+            return out
+        if kind == "time":
+            out = np.full(len(values), np.nan)
+            out[present] = _timestamps(values[present])
+            return out
+    except ValueError as exc:
+        raise SnapshotError("%s: %s" % (where, exc)) from None
+    if kind == "key":
+        return _hash(values)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    lookup = {label: code for code, label in enumerate(labels)}
+    mapping = np.empty(len(uniques), dtype=np.int32)
+    for i, unique in enumerate(uniques):
+        label = unique.decode("utf-8", "replace")
+        if not label:
+            mapping[i] = -1
+            continue
+        if label not in lookup:
+            lookup[label] = len(labels)
+            labels.append(label)
+        mapping[i] = lookup[label]
+    return mapping[inverse.ravel()]
+
+
+def _csv_columns(path, kinds):
+    """``{column: (kind, chunks)}`` for the columns of ``kinds`` that a CSV export has."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        header = fh.readline()
+    names = next(csv.reader([header]), [])
+    columns = dict((name, (kind, [], [])) for name, kind in kinds.items() if name in names)
+    ncols = len(names)
+    size = os.path.getsize(path)
+    pos = len(header.encode("utf-8"))
+    if not ncols or pos >= size:
+        return columns
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    chunk = CHUNK_BYTES
+    while pos < size:
+        stop = min(pos + chunk, size)
+        data = np.asarray(raw[pos:stop])
+        if stop == size and data[-1] != 10:
+            data = np.append(data, np.uint8(10))
+        # Rows always start outside quotes, so the parity of the quotes seen
+        # so far in the chunk says whether a byte is inside a quoted field.
+        outside = (np.cumsum(data == 34, dtype=np.uint8) & 1) == 0
+        newline = data == 10
+        seps = np.flatnonzero((newline | (data == 44)) & outside)
+        row_ends = np.flatnonzero(newline[seps])
+        if not len(row_ends):
+            if stop == size:
+                raise SnapshotError("%s: unterminated quoted field" % path)
+            chunk *= 2
+            continue
+        seps = seps[:row_ends[-1] + 1]
+        consumed = int(seps[-1]) + 1
+        starts = np.concatenate(([0], seps[:-1] + 1))
+        empty = (seps == starts) | ((seps == starts + 1) & (data[np.minimum(starts, len(data) - 1)] == 13))
+        blank = newline[seps] & empty & np.concatenate(([True], newline[seps[:-1]]))
+        seps, starts = seps[~blank], starts[~blank]
+        pos += consumed
+        chunk = CHUNK_BYTES
+        if not len(seps):
+            continue
+        if len(seps) % ncols or not newline[seps[ncols - 1::ncols]].all():
+            raise SnapshotError("%s: malformed row near byte %d (expected %d fields)" % (
+                path, pos - consumed, ncols))
+        ends, starts = seps.reshape(-1, ncols), starts.reshape(-1, ncols)
+        for name, (kind, chunks, labels) in columns.items():
+            col = names.index(name)
+            first, last = starts[:, col], ends[:, col]
+            if col == ncols - 1:
+                last = last - ((last > first) & (data[last - 1] == 13))
+            quoted = (data[first] == 34) & (last - first >= 2)
+            values = _fixed(data, first + quoted, last - quoted)
+            if quoted.any():
+                values[quoted] = np.char.replace(values[quoted], b'""', b'"')
+            chunks.append(_convert(kind, values, labels, "%s, column %r" % (path, name)))
+    return columns
+
+
+def _parquet_columns(path, kinds):
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SnapshotError("%s: reading Parquet exports needs pyarrow" % path) from None
+    names = pq.read_schema(path).names
+    wanted = [name for name in kinds if name in names]
+    table = pq.read_table(path, columns=wanted, memory_map=True)
+    columns = {}
+    for name in wanted:
+        kind = kinds[name]
+        column = table.column(name)
+        labels = []
+        if kind == "number" and column.type != "string":
+            chunk = column.cast("float64").to_numpy()
+        elif kind == "time" and str(column.type).startswith("timestamp"):
+            chunk = column.cast("timestamp[s]").cast("int64").cast("float64").to_numpy()
+        else:
+            values = pc.fill_null(column.cast("string"), "").to_numpy(zero_copy_only=False)
+            chunk = _convert(kind, values.astype("S%d" % MAX_FIELD), labels, "%s, column %r" % (path, name))
+        columns[name] = (kind, [chunk], labels)
+    return columns
+
+
+def _export(directory, table):
+    for ext in (".parquet", ".csv"):
+        path = os.path.join(directory, table + ext)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+_DTYPES = {"number": np.float64, "time": np.float64, "category": np.int32, "key": np.uint64}
+
+
+def load_table(directory, table, use_cache=True):
+    """``{column: array or Categorical}`` for an export in ``directory``, or None if it has none.
+
+    Arrays come from the memory-mapped column store when it is current;
+    otherwise the export is converted and the store written for next time.
+    """
+    path = _export(directory, table)
+    if path is None:
+        return None
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    key = hashlib.sha256(repr((STORE_VERSION, os.path.abspath(path), sorted(TABLES[table].items())))
+                         .encode("utf8")).hexdigest()
+    store = os.path.join(cache_dir("columns"), key)
+    if use_cache:
+        loaded = _load_store(store, stamp)
+        if loaded is not None:
+            touch(store)
+            return loaded
+    convert = _parquet_columns if path.endswith(".parquet") else _csv_columns
+    columns = {}
+    for name, (kind, chunks, labels) in convert(path, TABLES[table]).items():
+        values = np.concatenate(chunks) if chunks else np.empty(0, dtype=_DTYPES[kind])
+        columns[name] = Categorical(values, tuple(labels)) if kind == "category" else values
+    if use_cache and _save_store(store, stamp, columns):
+        prune(os.path.dirname(store), MAX_STORES)
+    return columns
+
+
+def _load_store(store, stamp):
+    try:
+        with open(os.path.join(store, "columns.json"), encoding="utf-8") as fh:
+            index = json.load(fh)
+        if index.get("stamp") != stamp:
+            return None
+        columns = {}
+        for name, labels in index["columns"].items():
+            values = np.load(os.path.join(store, name + ".npy"), mmap_mode="r")
+            columns[name] = values if labels is None else Categorical(values, tuple(labels))
+        return columns
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def _save_store(store, stamp, columns):
+    """Write the column store, replacing the one for an older export.
+
+    Like every cache, silently skipped when the disk says no.
+    """
+    scratch = None
+    try:
+        scratch = tempfile.mkdtemp(dir=os.path.dirname(store), prefix=".tmp-")
+        index = {}
+        for name, column in columns.items():
+            values, labels = (column.codes, list(column.labels)) if isinstance(column, Categorical) else (column, None)
+            np.save(os.path.join(scratch, name + ".npy"), values)
+            index[name] = labels
+        with open(os.path.join(scratch, "columns.json"), "w", encoding="utf-8") as fh:
+            json.dump({"stamp": stamp, "columns": index}, fh)
+        shutil.rmtree(store, ignore_errors=True)
+        os.replace(scratch, store)
+        scratch = None
+        return True
+    except OSError:
+        return False
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _hash_lookup(keys, table_keys):
+    """``_lookup`` through an open-addressing hash table over ``table_keys``.
+
+    The table is at most half full and probed linearly; every round of the
+    loops below handles all keys still looking for a slot at once.
+    """
+    bits = max(int(2 * len(table_keys)).bit_length(), 4)
+    shift, mask = np.uint64(64 - bits), np.uint64((1 << bits) - 1)
+    slots = np.zeros(1 << bits, dtype=np.uint64)
+    rows = np.full(1 << bits, -1, dtype=np.int64)
+    pending = np.flatnonzero(table_keys != 0)
+    # A duplicate id keeps its first row, as in the sorted lookup.
+    pending = np.sort(pending[np.unique(table_keys[pending], return_index=True)[1]])
+    slot = (table_keys[pending] * _GOLDEN) >> shift
+    while len(pending):
+        wanted = table_keys[pending]
+        empty = slots[slot] == 0
+        slots[slot[empty]] = wanted[empty]
+        rows[slot[empty]] = pending[empty]
+        # Lost a race for an empty slot, or found it taken: try the next one.
+        left = (rows[slot] != pending) & (slots[slot] != wanted)
+        pending, slot = pending[left], (slot[left] + np.uint64(1)) & mask
+
+    result = np.full(len(keys), -1, dtype=np.int64)
+    todo = np.flatnonzero(keys != 0)
+    slot = (keys[todo] * _GOLDEN) >> shift
+    while len(todo):
+        found = slots[slot]
+        hit = found == keys[todo]
+        result[todo[hit]] = rows[slot[hit]]
+        going = ~hit & (found != 0)
+        todo, slot = todo[going], (slot[going] + np.uint64(1)) & mask
+    return result
+
+
+def _lookup(keys, table_keys):
+    """Row of ``table_keys`` holding each of ``keys``, or -1."""
+    keys, table_keys = np.asarray(keys), np.asarray(table_keys)
+    if len(table_keys) < HASH_JOIN_ROWS:
+        return _hash_lookup(keys, table_keys)
+    # Too big to hash cheaply: sort the table, and the probes too so the
+    # search walks the table in order rather than missing the CPU caches.
+    order = np.argsort(table_keys, kind="stable")
+    ordered = table_keys[order]
+    probes = np.argsort(keys)
+    at = np.empty(len(keys), dtype=np.int64)
+    at[probes] = np.minimum(np.searchsorted(ordered, keys[probes]), len(ordered) - 1)
+    rows = np.full(len(keys), -1, dtype=np.int64)
+    found = (ordered[at] == keys) & (keys != 0)
+    rows[found] = order[at[found]]
+    return rows
+
+
+def _order_categories(orders, lookups):
+    """Category code of every order and the category labels, via ``(order column, table)`` pairs.
+
+    An order takes its category from the first table its key is found in.
+    """
+    index = {}
+    codes = np.full(len(orders["status"].codes), -1, dtype=np.int32)
+    for key, table in lookups:
+        if table is None or key not in orders or "id" not in table or "category" not in table:
+            continue
+        category = table["category"]
+        remap = np.full(len(category.labels) + 1, -1, dtype=np.int32)  # code -1 stays -1
+        for i, label in enumerate(category.labels):
+            remap[i] = index.setdefault(label, len(index))
+        rows = _lookup(orders[key], table["id"])
+        found = (rows >= 0) & (codes < 0)
+        codes[found] = remap[category.codes[rows[found]]]
+    labels = sorted(index, key=index.get) + [UNCATEGORIZED]
+    codes[codes < 0] = len(labels) - 1
+    return codes, labels
+
+
+def _percentiles(values):
+    if not len(values):
+        return dict((p, None) for p in PERCENTILES)
+    return dict(zip(PERCENTILES, (float(v) for v in np.percentile(values, PERCENTILES))))
+
+
+def analyze(directory, use_cache=True):
+    """Compute the ``Analytics`` of the exports in ``directory``."""
+    orders = load_table(directory, "orders", use_cache)
+    if orders is None:
+        raise SnapshotError("%s has no orders.csv or orders.parquet export" % directory)
+    for name in ("status", "total_amount"):
+        if name not in orders:
+            raise SnapshotError("the orders export has no %r column" % name)
+    services = load_table(directory, "services", use_cache)
+    reviews = load_table(directory, "reviews", use_cache)
+    status = orders["status"]
+    amount = np.nan_to_num(np.asarray(orders["total_amount"]))
+    n = len(status.codes)
+
+    category, labels = _order_categories(orders, (("service_id", services),
+                                                  ("gig_id", load_table(directory, "gigs", use_cache))))
+    k = len(labels)
+    completed = status.codes == (status.labels.index("completed") if "completed" in status.labels else -2)
+    placed = np.bincount(category, minlength=k)
+    done = np.bincount(category[completed], minlength=k)
+    revenue = np.bincount(category[completed], weights=amount[completed], minlength=k)
+
+    # Delivery time of completed orders, grouped by category with one stable sort.
+    days, day_category = np.empty(0), np.empty(0, dtype=np.int32)
+    if "created_at" in orders and "completed_date" in orders:
+        days = (np.asarray(orders["completed_date"]) - np.asarray(orders["created_at"])) / 86400.0
+        timed = completed & ~np.isnan(days) & (days >= 0)
+        days, day_category = days[timed], category[timed]
+    by_category = np.argsort(day_category, kind="stable")
+    bounds = np.searchsorted(day_category[by_category], np.arange(k + 1))
+    delivery_by_category = []
+    for c in range(k):
+        group = days[by_category[bounds[c]:bounds[c + 1]]]
+        delivery_by_category.append(tuple(float(v) for v in np.percentile(group, (50, 90))) if len(group)
+                                    else (None, None))
+
+    ratings = np.zeros(5, dtype=np.int64)
+    rating_sum = np.zeros(k)
+    rating_count = np.zeros(k)
+    if reviews is not None and "rating" in reviews:
+        rating = np.asarray(reviews["rating"])
+        valid = (rating >= 1) & (rating <= 5)
+        ratings = np.bincount(rating[valid].astype(np.int64), minlength=6)[1:6]
+        if "order_id" in reviews and "id" in orders:
+            rows = _lookup(reviews["order_id"], orders["id"])
+            linked = valid & (rows >= 0)
+            rating_sum = np.bincount(category[rows[linked]], weights=rating[linked], minlength=k)
+            rating_count = np.bincount(category[rows[linked]], minlength=k)
+
+    categories = []
+    for c in np.argsort(-revenue, kind="stable"):
+        if not placed[c]:
+            continue
+        median, p90 = delivery_by_category[c]
+        categories.append((labels[c], int(placed[c]), int(done[c]), float(revenue[c]),
+                           float(revenue[c] / done[c]) if done[c] else None,
+                           float(rating_sum[c] / rating_count[c]) if rating_count[c] else None, median, p90))
+
+    counts = np.bincount(status.codes[status.codes >= 0], minlength=len(status.labels))
+    by_status = dict(zip(status.labels, counts.tolist()))
+    funnel = [(stage, n if members is None else sum(by_status.get(m, 0) for m in members))
+              for stage, members in FUNNEL]
+    statuses = [(s, by_status[s]) for s in STATUSES if s in by_status]
+    statuses += sorted((s, c) for s, c in by_status.items() if s not in STATUSES)
+    missing = int((status.codes < 0).sum())
+    if missing:
+        statuses.append(("(none)", missing))
+    return Analytics(n, len(services["id"]) if services and "id" in services else 0,
+                     int(ratings.sum()), tuple(categories), tuple(funnel), tuple(statuses),
+                     _percentiles(days), tuple(int(r) for r in ratings))
+
+
+def _money(value):
+    return "-" if value is None else "${:,.2f}".format(value)
+
+
+def _number(value, digits=1):
+    return "-" if value is None else "%.*f" % (digits, value)
+
+
+def _share(part, whole):
+    return "%.1f%%" % (100.0 * part / whole) if whole else "-"
+
+
+def bar_chart(labels, values, palette, width, bar_height=12, colour="primary"):
+    """A horizontal bar chart drawing, one bar per label."""
+    from reportlab.graphics.charts.barcharts import HorizontalBarChart
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib import colors
+
+    height = bar_height * len(labels) + 30
+    drawing = Drawing(width, height)
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 1.6 * 72, 15
+    chart.width, chart.height = width - chart.x - 10, height - 25
+    chart.data = [list(reversed(values))]
+    chart.categoryAxis.categoryNames = list(reversed(labels))
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.boxAnchor = "e"
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labelTextFormat = "{:,.0f}".format
+    chart.bars[0].fillColor = colors.HexColor(palette[colour])
+    chart.bars[0].strokeColor = None
+    drawing.add(chart)
+    return drawing
+
+
+def analytics_story(analytics, title="Marketplace Analytics Report", theme=None, now=None, top=15):
+    """Yield the flowables of the analytics report for computed ``analytics``."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import PageBreak, Paragraph, Spacer, Table
+
+    from .render import render_context
+    from .theme import get_theme
+
+    theme = theme or get_theme()
+    paragraph, style = theme.paragraph, theme.table["timeline"]
+    width = 6.2 * inch
+
+    def table(rows, widths):
+        t = Table([list(row) for row in rows], colWidths=[w * inch for w in widths], repeatRows=1)
+        t.setStyle(style)
+        return t
+
+    yield Paragraph(title, paragraph["title"])
+    yield Paragraph("Generated on: %s" % render_context(now)["generated_on"], paragraph["normal"])
+    yield Spacer(1, 0.2 * inch)
+    yield Paragraph("{:,} orders, {:,} services and {:,} rated reviews.".format(
+        analytics.orders, analytics.services, analytics.reviews), paragraph["body"])
+
+    categories = analytics.categories
+    yield Paragraph("Revenue by Category", paragraph["heading"])
+    yield table([("Category", "Orders", "Completed", "Revenue", "Avg. order", "Avg. rating")]
+                + [(name, "{:,}".format(placed), "{:,}".format(done), _money(revenue), _money(average),
+                    _number(rating, 2)) for name, placed, done, revenue, average, rating, _, _ in categories],
+                [1.6, 0.8, 0.9, 1.2, 0.9, 0.8])
+    if categories:
+        shown = categories[:top]
+        yield Spacer(1, 0.2 * inch)
+        yield bar_chart([c[0] for c in shown], [c[3] for c in shown], theme.palette, width)
+
+    yield PageBreak()
+    yield Paragraph("Order Status Funnel", paragraph["heading"])
+    placed = analytics.funnel[0][1]
+    yield table([("Stage", "Orders", "Share of placed")]
+                + [(stage, "{:,}".format(count), _share(count, placed)) for stage, count in analytics.funnel],
+                [2.0, 1.5, 1.5])
+    yield Spacer(1, 0.2 * inch)
+    yield bar_chart([s for s, _ in analytics.funnel], [c for _, c in analytics.funnel], theme.palette, width,
+                    colour="secondary")
+    yield Spacer(1, 0.2 * inch)
+    yield table([("Status", "Orders", "Share")]
+                + [(status, "{:,}".format(count), _share(count, placed)) for status, count in analytics.statuses],
+                [2.0, 1.5, 1.5])
+
+    yield Paragraph("Delivery Time", paragraph["heading"])
+    yield table([("Percentile", "Days from order to completion")]
+                + [("P%d" % p, _number(analytics.delivery[p])) for p in PERCENTILES], [2.0, 3.0])
+    yield Spacer(1, 0.2 * inch)
+    yield table([("Category", "Median days", "P90 days")]
+                + [(c[0], _number(c[6]), _number(c[7])) for c in categories], [2.4, 1.5, 1.5])
+
+    yield PageBreak()
+    yield Paragraph("Ratings", paragraph["heading"])
+    total = sum(analytics.ratings)
+    yield table([("Stars", "Reviews", "Share")]
+                + [("%d" % (i + 1), "{:,}".format(count), _share(count, total))
+                   for i, count in enumerate(analytics.ratings)], [1.5, 1.5, 1.5])
+    yield Spacer(1, 0.2 * inch)
+    yield bar_chart(["%d stars" % (i + 1) for i in range(5)], list(analytics.ratings), theme.palette, width,
+                    colour="accent")
+
+
+def render_analytics_report(directory, filename, title="Marketplace Analytics Report", now=None,
+                            use_cache=True):
+    """Analyze the exports in ``directory`` and render the report; returns the ``Analytics``."""
+    from .stream import render_streaming
+
+    analytics = analyze(directory, use_cache)
+    render_streaming(analytics_story(analytics, title, now=now), filename, title=title)
+    return analytics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the marketplace analytics report.")
+    parser.add_argument("--snapshot", required=True,
+                        help="directory of orders/services/reviews exports (.csv or .parquet)")
+    parser.add_argument("-o", "--output", default="marketplace-analytics.pdf", help="PDF to write")
+    parser.add_argument("--title", default="Marketplace Analytics Report", help="report title")
+    parser.add_argument("--no-cache", action="store_true", help="convert the exports again, ignoring the column store")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    try:
+        analytics = analyze(args.snapshot, use_cache=not args.no_cache)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    analyzed = time.perf_counter()
+    from .stream import render_streaming
+
+    render_streaming(analytics_story(analytics, args.title), args.output, title=args.title)
+    print("Analyzed {:,} orders in {:.2f}s, rendered {} in {:.2f}s".format(
+        analytics.orders, analyzed - start, args.output, time.perf_counter() - analyzed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
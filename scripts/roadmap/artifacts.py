@@ -0,0 +1,135 @@
+"""Content-addressed render artifacts.
+
+A reproducible render (``render_pdf(..., reproducible=True)``) depends only
+on its inputs, so its output can be named after them.  ``artifact_key``
+hashes everything that feeds the bytes - the spec, the SQL migrations
+behind its schema blocks, the theme, the dates substituted into the text,
+the PDF's metadata timestamp, the render options, the generator's own
+source and the reportlab version - before anything is rendered, and
+``render_artifact`` returns the stored output for that key when there is
+one instead of rendering again.  The key doubles as a stable ETag: it only
+changes when the output does.
+
+Outputs whose bytes are already in place are not rewritten, so their
+modification times - and anything syncing or uploading by them - stay put.
+"""
+import glob
+import hashlib
+import os
+import shutil
+
+import reportlab
+
+from .cache import cache_dir, prune, touch, write_bytes
+from .content import render_context, reproducible_now
+from .schema import document_digest
+
+# Bump whenever something that is not hashed changes the rendered bytes.
+ARTIFACT_VERSION = 1
+
+# Stored artifacts kept; the least recently used beyond this are removed.
+MAX_ARTIFACTS = 64
+
+# Options that do not change an artifact's bytes.
+_NEUTRAL_OPTIONS = ("section_cache", "markup_cache", "stats", "trace", "reproducible", "workers")
+
+_source_digest = None
+
+
+def source_digest():
+    """Hash of the generator's Python sources, computed once per process."""
+    global _source_digest
+    if _source_digest is None:
+        h = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+            h.update(os.path.basename(path).encode("utf8") + b"\0")
+            with open(path, "rb") as fh:
+                h.update(fh.read())
+        _source_digest = h.hexdigest()
+    return _source_digest
+
+
+def artifact_key(document, fmt="pdf", now=None, **options):
+    """Hex digest naming the output of rendering ``document`` to ``fmt`` reproducibly."""
+    items = [("version", ARTIFACT_VERSION), ("source", source_digest()), ("spec", document.digest),
+             ("schema", document_digest(document)), ("format", fmt), ("context", sorted(render_context(reproducible_now(now)).items()))]
+    if fmt == "pdf":
+        from .render import MARGINS, pdf_timestamp
+        from .theme import get_theme
+
+        theme = options.get("theme") or get_theme()
+        options = dict((k, v) for k, v in options.items() if k not in _NEUTRAL_OPTIONS and k != "theme")
+        if "pagesize" in options:
+            options["pagesize"] = tuple(options["pagesize"])
+        if options.get("optimize"):
+            # qpdf, when installed, changes the optimized bytes
+            options["linearize"] = shutil.which("qpdf") is not None
+        # the metadata dates hold the full time, not just the date in the text
+        items += [("timestamp", pdf_timestamp(reproducible_now(now))),
+                  ("reportlab", reportlab.Version), ("theme", theme.digest),
+                  ("margins", sorted(MARGINS.items())), ("options", sorted(options.items()))]
+    return hashlib.sha256(repr(items).encode("utf8")).hexdigest()
+
+
+def artifact_path(key, fmt="pdf"):
+    from .outputs import FORMATS
+
+    return os.path.join(cache_dir("artifacts"), key + FORMATS[fmt][0])
+
+
+def publish(data, filename):
+    """Write ``data`` to ``filename`` (a path or binary stream) unless the file already holds it.
+
+    Returns True if anything was written.
+    """
+    if hasattr(filename, "write"):
+        filename.write(data)
+        return True
+    try:
+        if os.path.getsize(filename) == len(data):
+            with open(filename, "rb") as fh:
+                if fh.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(filename, "wb") as fh:
+        fh.write(data)
+    return True
+
+
+def render_artifact(document, filename=None, fmt="pdf", now=None, use_cache=True, info=None, **options):
+    """Render ``document`` to ``fmt`` reproducibly, reusing the stored artifact for the same inputs.
+
+    ``filename`` is a path or writable binary stream (the spec's filename
+    with the format's extension by default) and is returned.  When
+    ``use_cache`` is false the artifact is rendered and stored regardless.
+    If ``info`` is a dict it receives the artifact ``key``, whether it was
+    ``cached`` and whether the output was ``written``.  ``options`` are
+    passed on to the renderer.
+    """
+    from .outputs import output_path, render_bytes
+
+    filename = filename or output_path(document.filename, fmt)
+    now = reproducible_now(now)
+    key = artifact_key(document, fmt, now, **options)
+    path = artifact_path(key, fmt)
+    data = None
+    if use_cache:
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            data = None
+        else:
+            touch(path)
+    cached = data is not None
+    if not cached:
+        if fmt == "pdf":
+            options["reproducible"] = True
+        data = render_bytes(document, fmt, now=now, **options)
+        if write_bytes(path, data):
+            prune(os.path.dirname(path), MAX_ARTIFACTS)
+    written = publish(data, filename)
+    if info is not None:
+        info.update(key=key, cached=cached, written=written)
+    return filename
@@ -0,0 +1,186 @@
+"""Batch generation of per-order and per-freelancer PDFs.
+
+Render jobs are fanned out across a process pool.  Each worker is warmed
+once - reportlab imported, the theme built with its font metrics loaded
+and the snapshot opened - and then renders any number of documents.  At most
+``max_in_flight`` jobs are queued at a time, so planning a batch of any size
+costs constant memory.
+
+A CSV snapshot is first copied into an indexed SQLite file, so each
+document's lookups are index seeks rather than full CSV scans.
+
+Run from the ``scripts`` directory:
+
+    python -m roadmap.batch --snapshot snapshot.db --per order --out-dir out/
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .snapshot import Snapshot
+
+Job = namedtuple("Job", "kind key output")
+
+KINDS = ("order", "freelancer")
+
+# Lookups made by every per-document render.
+INDEXES = (
+    ("orders", "id"),
+    ("orders", "freelancer_id"),
+    ("order_updates", "order_id"),
+    ("order_milestones", "order_id"),
+)
+
+
+class BatchSummary(namedtuple("BatchSummary", "completed failed elapsed bytes errors")):
+    """Outcome of a batch run; ``errors`` holds ``(job, message)`` pairs."""
+
+    __slots__ = ()
+
+    @property
+    def docs_per_second(self):
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def format(self):
+        return "Rendered %d documents (%d failed) in %.1fs: %.1f docs/s, %.1f MB written" % (
+            self.completed, self.failed, self.elapsed, self.docs_per_second, self.bytes / 1048576.0)
+
+
+def _filename(kind, key):
+    """``<kind>-<key>-<hash>.pdf``; the hash of the raw key keeps keys that read alike apart."""
+    key = str(key)
+    digest = hashlib.sha256(key.encode("utf8")).hexdigest()[:10]
+    return "%s-%s-%s.pdf" % (kind, re.sub(r"[^A-Za-z0-9_.-]", "_", key)[:64], digest)
+
+
+def plan_jobs(snapshot, kind, out_dir):
+    """Yield one ``Job`` per order or per freelancer found in ``snapshot``."""
+    if kind == "order":
+        keys = (row[0] for row in snapshot.rows("orders", ["id"], order_by="id"))
+    elif kind == "freelancer":
+        keys = snapshot.distinct("orders", "freelancer_id")
+    else:
+        raise ValueError("kind must be one of %s" % ", ".join(KINDS))
+    for key in keys:
+        yield Job(kind, key, os.path.join(out_dir, _filename(kind, key)))
+
+
+# Per-process state set up once by ``_init_worker``.
+_worker = {}
+
+
+def _init_worker(snapshot_path):
+    from .theme import get_theme
+
+    _worker["theme"] = get_theme()
+    _worker["snapshot"] = Snapshot(snapshot_path)
+
+
+def render_job(job):
+    """Render one job in a warm worker and return the size of the file written."""
+    from .orders import order_report_story
+    from .stream import render_streaming
+
+    if job.kind == "order":
+        title, where = "Order %s" % str(job.key)[:8], {"id": job.key}
+    else:
+        title, where = "Freelancer Statement %s" % str(job.key)[:8], {"freelancer_id": job.key}
+    story = order_report_story(_worker["snapshot"], title, where, theme=_worker["theme"])
+    render_streaming(story, job.output, title=title)
+    return os.path.getsize(job.output)
+
+
+def run_batch(snapshot_path, jobs, workers=None, max_in_flight=None, progress=None):
+    """Render ``jobs`` across a pool of warm worker processes.
+
+    ``progress(completed, failed, elapsed)`` is called after every finished
+    job.  Failed jobs are recorded in the summary rather than stopping the run.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    completed = failed = written = 0
+    errors = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(snapshot_path,)) as pool:
+        jobs = iter(jobs)
+        pending = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    pending[pool.submit(render_job, job)] = job
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    written += future.result()
+                    completed += 1
+                except Exception as exc:
+                    failed += 1
+                    errors.append((job, "%s: %s" % (type(exc).__name__, exc)))
+                if progress is not None:
+                    progress(completed, failed, time.perf_counter() - start)
+
+    return BatchSummary(completed, failed, time.perf_counter() - start, written, errors)
+
+
+def generate(snapshot_path, kind, out_dir, workers=None, max_in_flight=None, limit=None, progress=None):
+    """Render one document per order or freelancer in a snapshot into ``out_dir``."""
+    os.makedirs(out_dir, exist_ok=True)
+    scratch = None
+    try:
+        with Snapshot(snapshot_path) as snapshot:
+            if snapshot.kind == "csv":
+                scratch = tempfile.mkdtemp(prefix="roadmap-batch-")
+                snapshot_path = snapshot.to_sqlite(os.path.join(scratch, "snapshot.db"), INDEXES)
+        with Snapshot(snapshot_path) as snapshot:
+            jobs = plan_jobs(snapshot, kind, out_dir)
+            if limit:
+                jobs = (job for _, job in zip(range(limit), jobs))
+            return run_batch(snapshot_path, jobs, workers, max_in_flight, progress)
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one PDF per order or per freelancer.")
+    parser.add_argument("--snapshot", required=True, help="SQLite file or directory of <table>.csv exports")
+    parser.add_argument("--per", choices=KINDS, default="order", help="one document per order or per freelancer")
+    parser.add_argument("--out-dir", required=True, help="directory the PDFs are written to")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="queued jobs (default: 4 per worker)")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many documents")
+    args = parser.parse_args(argv)
+
+    last = [0.0]
+
+    def progress(completed, failed, elapsed):
+        if elapsed - last[0] >= 1.0:
+            last[0] = elapsed
+            sys.stderr.write("%d done, %d failed, %.1f docs/s\n" % (
+                completed, failed, completed / elapsed if elapsed else 0.0))
+
+    summary = generate(args.snapshot, args.per, args.out_dir, args.workers,
+                       args.max_in_flight, args.limit, progress)
+    for job, message in summary.errors[:20]:
+        sys.stderr.write("failed %s %s: %s\n" % (job.kind, job.key, message))
+    print(summary.format())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
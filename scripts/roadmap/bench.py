@@ -0,0 +1,224 @@
+"""Benchmarks for the roadmap generator at growing document sizes.
+
+Each scale builds a synthetic document whose body sections - and with them
+every task list and table - are repeated that many times, renders it with
+``render_pdf`` and records wall time, peak RSS, time per page, output size
+and the story / layout / write split.  Every scale runs in a fresh process
+so peak RSS belongs to that scale alone.  Rendering happens twice per scale:
+``cold`` with an empty section cache and ``warm`` replaying the layouts the
+cold run cached, which is what an unchanged rebuild costs.
+
+Run from the ``scripts`` directory:
+
+    python -m roadmap.bench --save baseline.json
+    python -m roadmap.bench --scales 1,10 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCALES = (1, 10, 100, 1000)
+
+BASELINE_VERSION = 1
+
+# Metrics checked by ``--compare``; larger is worse for all of them.
+COMPARED = ("cold_seconds", "warm_seconds", "peak_rss_mb", "output_bytes")
+
+# Relative change from the baseline that counts as a regression.
+THRESHOLD = 0.10
+
+# Differences below these floors are noise, whatever their relative size.
+FLOORS = {"cold_seconds": 0.05, "warm_seconds": 0.05, "peak_rss_mb": 2.0, "output_bytes": 1024}
+
+
+def scaled_document(document, scale):
+    """``document`` with every section that is not a cover or TOC repeated ``scale`` times."""
+    from .content import Section
+    from .render import has_toc
+
+    if scale == 1:
+        return document
+    head, body = [], []
+    for section in document.sections:
+        (head if not body and (has_toc(section) or section.id == "cover") else body).append(section)
+    sections = list(head)
+    for copy in range(1, scale + 1):
+        for section in body:
+            blocks = tuple(_renamed(block, copy) for block in section.blocks)
+            sections.append(Section("%s-%d" % (section.id, copy), section.title, blocks))
+    return document._replace(sections=tuple(sections), digest="%s-x%d" % (document.digest, scale))
+
+
+def _renamed(block, copy):
+    # Distinct headings keep the TOC rows and outline entries distinct too.
+    if block[0] == "heading":
+        label = block[2] and "%s #%d" % (block[2], copy)
+        return ("heading", "%s #%d" % (block[1], copy), label)
+    return block
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1048576.0 if sys.platform == "darwin" else 1024.0)
+
+
+def run_scale(scale, spec=None, workers=None):
+    """Render one scale in this process and return its measurements.
+
+    ``workers`` is passed on to the cold render (see ``render_pdf``).
+    """
+    import reportlab.platypus  # noqa: F401  keep the import out of the story timing
+
+    from .content import load_document
+    from .layout import SectionCache
+    from .markup import MarkupCache
+    from .render import render_pdf
+    from .theme import get_theme
+
+    theme = get_theme()
+    document = scaled_document(load_document(spec, use_cache=False), scale)
+    cache = SectionCache(max_entries=len(document.sections) + 8, persist=False)
+    markup_cache = MarkupCache(persist=False)
+    with tempfile.TemporaryDirectory(prefix="roadmap-bench-") as scratch:
+        filename = os.path.join(scratch, "bench.pdf")
+        cold = {}
+        start = time.perf_counter()
+        render_pdf(document, filename, section_cache=cache, stats=cold, theme=theme,
+                   markup_cache=markup_cache, workers=workers)
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        render_pdf(document, filename, section_cache=cache, theme=theme, markup_cache=markup_cache)
+        warm_seconds = time.perf_counter() - start
+        size = os.path.getsize(filename)
+    pages = cold["pages"]
+    return {
+        "scale": scale,
+        "sections": len(document.sections),
+        "pages": pages,
+        "cold_seconds": round(cold_seconds, 4),
+        "warm_seconds": round(warm_seconds, 4),
+        "ms_per_page": round(1000.0 * cold_seconds / pages, 3) if pages else 0.0,
+        "story_seconds": round(cold["timings"]["story"], 4),
+        "layout_seconds": round(cold["timings"]["layout"], 4),
+        "write_seconds": round(cold["timings"]["write"], 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "output_bytes": size,
+        "workers": workers or 1,
+    }
+
+
+def run(scales=SCALES, spec=None, repeat=1, workers=None):
+    """Measure every scale, each run in a fresh process; keep the best of ``repeat`` runs."""
+    results = {}
+    for scale in scales:
+        best = None
+        for _ in range(repeat):
+            with ProcessPoolExecutor(1, max_tasks_per_child=1) as pool:
+                result = pool.submit(run_scale, scale, spec, workers).result()
+            if best is None or result["cold_seconds"] < best["cold_seconds"]:
+                best = result
+        results[str(scale)] = best
+    return results
+
+
+def environment():
+    import reportlab
+
+    return {
+        "python": platform.python_version(),
+        "reportlab": reportlab.Version,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline, results, threshold=THRESHOLD):
+    """Return ``(scale, metric, before, after)`` for every metric that got worse than ``threshold``."""
+    regressions = []
+    for scale, result in sorted(results.items(), key=lambda kv: int(kv[0])):
+        before = baseline.get("results", {}).get(scale)
+        if before is None:
+            continue
+        for metric in COMPARED:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new - old > max(old * threshold, FLOORS[metric]):
+                regressions.append((scale, metric, old, new))
+    return regressions
+
+
+def format_regression(scale, metric, old, new):
+    """One line for a regression; the change is absolute when the baseline is zero."""
+    change = "%+.0f%%" % (100.0 * (new - old) / old) if old else "%+g" % (new - old)
+    return "REGRESSION %sx %s: %s -> %s (%s)" % (scale, metric, old, new, change)
+
+
+def format_table(results):
+    header = ("scale", "sections", "pages", "cold s", "warm s", "ms/page", "story s",
+              "layout s", "write s", "peak MB", "KB")
+    rows = [header]
+    for scale, r in sorted(results.items(), key=lambda kv: int(kv[0])):
+        rows.append(("%sx" % scale, str(r["sections"]), str(r["pages"]),
+                     "%.3f" % r["cold_seconds"], "%.3f" % r["warm_seconds"], "%.2f" % r["ms_per_page"],
+                     "%.3f" % r["story_seconds"], "%.3f" % r["layout_seconds"], "%.3f" % r["write_seconds"],
+                     "%.1f" % r["peak_rss_mb"], "%.1f" % (r["output_bytes"] / 1024.0)))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the roadmap generator at growing document sizes.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in SCALES),
+                        help="comma-separated multiples of the bundled roadmap (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scale; the fastest is kept")
+    parser.add_argument("--spec", default=None, help="roadmap spec to scale (default: the bundled one)")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="lay the cold render's sections out in N processes")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="flag regressions against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown or growth that counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    except ValueError:
+        parser.error("--scales must be a comma-separated list of integers")
+    if not scales or min(scales) < 1:
+        parser.error("--scales must list positive integers")
+
+    results = run(scales, args.spec, max(1, args.repeat), args.workers)
+    print(format_table(results))
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump({"version": BASELINE_VERSION, "environment": environment(), "results": results},
+                      fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print("\nBaseline written to %s" % args.save)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        if baseline.get("version") != BASELINE_VERSION:
+            sys.stderr.write("%s: unsupported baseline version %r\n" % (args.compare, baseline.get("version")))
+            return 2
+        regressions = compare(baseline, results, args.threshold)
+        for regression in regressions:
+            print(format_regression(*regression))
+        if regressions:
+            return 1
+        print("\nNo regressions against %s" % args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
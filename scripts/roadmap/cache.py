@@ -0,0 +1,102 @@
+"""On-disk cache helpers shared by the roadmap generator.
+
+Everything stored here is derived data: a missing, stale or unreadable
+entry is simply rebuilt, so failures are swallowed rather than raised.
+Each kind of entry lives in its own directory, which ``prune`` keeps to a
+bounded number of entries or bytes by dropping the least recently used.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+
+
+def cache_dir(*parts):
+    """Return (and create) a directory under the generator's cache root.
+
+    The root defaults to ``~/.cache/epic360-roadmap`` and can be moved with
+    the ``ROADMAP_CACHE_DIR`` environment variable.
+    """
+    root = os.environ.get("ROADMAP_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "epic360-roadmap"
+    )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def touch(path):
+    """Mark a cache entry as just used, so ``prune`` keeps it longest."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune(directory, max_entries=None, max_bytes=None):
+    """Remove the least recently used entries of ``directory`` beyond ``max_entries`` or ``max_bytes``.
+
+    Recency is the modification time, which writing an entry sets and
+    ``touch`` refreshes.  Entries may be files or directories; hidden ones
+    (writes in progress) are left alone.
+    """
+    try:
+        names = [name for name in os.listdir(directory) if not name.startswith(".")]
+    except OSError:
+        return
+    if max_bytes is None and (max_entries is None or len(names) <= max_entries):
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, path))
+    entries.sort(reverse=True)
+    total = 0
+    for count, (_, size, path) in enumerate(entries, 1):
+        total += size
+        if (max_entries is not None and count > max_entries) or (max_bytes is not None and total > max_bytes):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+def load_pickle(path):
+    """Load a pickled cache entry, or return None if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+        return None
+
+
+def dump_pickle(path, obj):
+    """Atomically write a pickled cache entry. Returns False if it could not be written."""
+    return write_bytes(path, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def write_bytes(path, data):
+    """Atomically replace ``path`` with ``data`` so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    try:
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    except OSError:
+        return False
+    return True
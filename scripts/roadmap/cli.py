@@ -0,0 +1,151 @@
+"""Command line entry point for the roadmap generator.
+
+Run from the ``scripts`` directory:
+
+    python generate-project-roadmap.py [-o roadmap.pdf] [--page-size letter]
+    python generate-project-roadmap.py --format pdf,md,html
+    python generate-project-roadmap.py -o - > roadmap.pdf
+    python generate-project-roadmap.py --reproducible --date 2025-01-31
+    python generate-project-roadmap.py --watch
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+PAGE_SIZES = ("A4", "letter")
+FORMATS = ("pdf", "md", "html")
+
+
+def format_list(value):
+    """Parse ``--format``: a comma-separated list of formats, or ``all``."""
+    if value == "all":
+        return list(FORMATS)
+    formats = [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError("expected a comma-separated list of %s, or all" % ", ".join(FORMATS))
+    return formats
+
+
+def date_arg(value):
+    """Parse ``--date``: an ISO 8601 date or timestamp."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected an ISO 8601 date such as 2025-01-31") from None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate the Epic360 Gigs development roadmap.")
+    parser.add_argument("-o", "--output", default=None,
+                        help="file to write; each format gets its own extension "
+                             "(default: the filename in the spec). Use - to write a single "
+                             "format to stdout")
+    parser.add_argument("--format", type=format_list, default=["pdf"],
+                        help="output formats, comma-separated: %s, or all (default: pdf)" % ", ".join(FORMATS))
+    parser.add_argument("--page-size", choices=PAGE_SIZES, default="A4", help="page size")
+    parser.add_argument("--spec", default=None, help="roadmap spec (default: roadmap/roadmap.json)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore the compiled-spec, section layout and parsed-markup caches")
+    parser.add_argument("--optimize", action="store_true",
+                        help="recompress and deduplicate the PDF, and linearize it when qpdf is installed")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="produce byte-identical output for identical inputs, and reuse a stored "
+                             "render of the same inputs instead of rendering again")
+    parser.add_argument("--date", type=date_arg, default=None,
+                        help="the generated-on date, ISO 8601 (default: now, or with --reproducible "
+                             "SOURCE_DATE_EPOCH or today)")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="lay sections out in N processes (default: one process); pays off "
+                             "for large documents with many uncached sections")
+    parser.add_argument("--trace", metavar="PATH", default=None,
+                        help="time every section and flowable type, write a JSON trace to PATH "
+                             "and print a summary to stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="also sample the render's call stack (implies a trace summary)")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay running and rebuild, re-laying out only the changed sections, "
+                             "whenever the spec changes")
+    return parser
+
+
+def page_size(name):
+    from reportlab.lib import pagesizes
+
+    return getattr(pagesizes, name)
+
+
+def generate(args, stats=None, caches=None):
+    """Render the roadmap described by parsed ``args``; return ``(document, {format: path})``.
+
+    ``stats`` is passed on to ``render_pdf``; ``caches`` is an optional
+    ``(section_cache, markup_cache)`` pair to use instead of the defaults.
+    """
+    from .content import load_document
+    from .outputs import render_outputs
+
+    document = load_document(args.spec, use_cache=not args.no_cache)
+    section_cache, markup_cache = caches or ((False, False) if args.no_cache else (None, None))
+    pdf_options = {"pagesize": page_size(args.page_size),
+                   "section_cache": section_cache,
+                   "markup_cache": markup_cache,
+                   "optimize": args.optimize,
+                   "workers": args.workers}
+    if stats is not None:
+        pdf_options["stats"] = stats
+    trace = None
+    if args.trace or args.profile:
+        from .trace import Trace
+
+        trace = pdf_options["trace"] = Trace(profile=args.profile)
+    output = sys.stdout.buffer if args.output == "-" else args.output
+    args.artifacts = {}
+    paths = render_outputs(document, args.format, output, now=args.date, pdf_options=pdf_options,
+                           reproducible=args.reproducible, use_cache=not args.no_cache,
+                           artifacts=args.artifacts)
+    if trace is not None and trace.pages:
+        if args.trace:
+            trace.dump(args.trace)
+        sys.stderr.write(trace.format_summary() + "\n\n")
+    return document, paths
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.watch:
+        if args.output == "-":
+            parser.error("--watch needs an output file, not stdout")
+        from .watch import watch
+
+        return watch(args)
+    if args.output == "-":
+        if len(args.format) != 1:
+            parser.error("-o - writes a single format to stdout; pick one with --format")
+        generate(args)
+        sys.stdout.buffer.flush()
+        return 0
+    document, paths = generate(args)
+    for fmt in args.format:
+        filename = paths[fmt]
+        print("Project roadmap generated successfully: %s" % filename)
+        info = args.artifacts.get(fmt)
+        if info:
+            print("Content hash: %s%s" % (info["key"], " (reused stored render)" if info["cached"] else ""))
+        if fmt == "pdf":
+            from .optimize import format_breakdown
+
+            with open(filename, "rb") as fh:
+                print(format_breakdown(fh.read(), "File size"))
+        else:
+            print("File size: %.1f KB" % (os.path.getsize(filename) / 1024.0))
+    print("\nContents:")
+    for section in document.sections:
+        if section.title:
+            print("- %s" % section.title)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
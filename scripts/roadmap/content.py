@@ -0,0 +1,371 @@
+"""Declarative roadmap content and its compiled in-memory model.
+
+The roadmap text lives in a JSON spec (``roadmap.json`` next to this file).
+``load_document`` parses and validates it once and turns it into a compact
+tree of tuples.  The compiled model is pickled into the cache directory keyed
+by a hash of the spec bytes, so later runs - and every document after the
+first in a batch - skip parsing and validation entirely.
+
+Blocks are plain tuples whose first item is the block kind:
+
+    ("title", text)
+    ("heading", text, toc_label)          # toc_label is None when left out of the TOC
+    ("subheading", text)
+    ("paragraph", style, text, is_template)   # text may use the INLINE_TAGS
+    ("checklist", (item, ...))
+    ("groups", ((group_title, (item, ...)), ...))
+    ("spacer", height_in_inches)
+    ("table", style, (col_width_in_inches, ...), ((cell, ...), ...))
+    ("toc", style, (col_width_in_inches, ...), (header_cell, ...))
+    ("gantt", unit, style, (col_width_in_inches, ...), (header_cell, ...), total_label,
+     ((id, name, start, duration, (effort_low, effort_high), (dependency_id, ...), is_milestone, note), ...))
+    ("schema", mode, title, (sql_pattern, ...), ((table, description), ...), style, (col_width_in_inches, ...))
+
+A ``gantt`` block is a task schedule (see ``roadmap.timeline``): it renders
+as an overview table, a Gantt chart and a sentence naming the critical path.
+
+A ``schema`` block is generated from the SQL migrations (see
+``roadmap.schema``) when it is rendered, not when the spec is compiled: a
+``"list"`` renders like a group titled ``title`` with one item per table, a
+``"reference"`` renders every table's columns and indexes.
+"""
+import hashlib
+import json
+import os
+import re
+import string
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from .cache import cache_dir, dump_pickle, load_pickle, prune, touch
+from .schema import DEFAULT_FILES, is_migration_pattern
+from .timeline import TimelineError, block_table
+
+# Bump whenever the compiled model layout changes so stale caches are ignored.
+MODEL_VERSION = 6
+
+# Compiled specs kept on disk; the least recently used beyond this are removed.
+MAX_STORED_SPECS = 64
+
+DEFAULT_SPEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "roadmap.json")
+
+PARAGRAPH_STYLES = ("body", "normal", "subtitle")
+SCHEMA_MODES = ("list", "reference")
+TABLE_STYLES = ("toc", "timeline")
+
+Document = namedtuple("Document", "title filename sections digest")
+Section = namedtuple("Section", "id title blocks")
+
+# Compiled documents already seen by this process, keyed by digest.
+_compiled = {}
+
+
+class ContentError(ValueError):
+    """Raised when a content spec is malformed."""
+
+
+# Inline tags a paragraph may use.  Every renderer translates them and shows
+# all other text literally, so "<", ">" and "&" need no escaping in the spec.
+INLINE_TAGS = ("b", "i")
+_INLINE_TAG = re.compile(r"</?(%s)>" % "|".join(INLINE_TAGS))
+
+# Fields a ``template`` paragraph may use; ``render_context`` supplies them.
+TEMPLATE_FIELDS = ("generated_on", "year")
+
+
+def render_context(now=None):
+    """Values substituted into ``template`` paragraphs."""
+    now = now or datetime.now()
+    return {"generated_on": now.strftime('%B %d, %Y'), "year": now.strftime('%Y')}
+
+
+def inline_markup(text, escape, tags=None):
+    """Paragraph ``text`` with ``escape`` applied between its inline tags.
+
+    ``tags`` maps each tag as written (``"<b>"``, ``"</b>"``, ...) to its
+    replacement; tags are kept as they are without it.
+    """
+    parts = []
+    end = 0
+    for match in _INLINE_TAG.finditer(text):
+        tag = match.group()
+        parts.append(escape(text[end:match.start()]))
+        parts.append(tags[tag] if tags is not None else tag)
+        end = match.end()
+    parts.append(escape(text[end:]))
+    return "".join(parts)
+
+
+def reproducible_now(now=None):
+    """The clock for a reproducible render: ``now``, else ``SOURCE_DATE_EPOCH``, else today at midnight.
+
+    Naive times are taken as UTC.  Without an explicit time every render made
+    on the same day produces the same bytes.
+    """
+    if now is not None:
+        return now
+    epoch = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None)
+    today = datetime.now(timezone.utc)
+    return datetime(today.year, today.month, today.day)
+
+
+def spec_digest(raw):
+    """Hash of the raw spec bytes plus the model version."""
+    h = hashlib.sha256(b"roadmap-model-%d\0" % MODEL_VERSION)
+    h.update(raw)
+    return h.hexdigest()
+
+
+def load_document(path=None, use_cache=True):
+    """Load the content spec at ``path`` (the bundled roadmap by default)."""
+    with open(path or DEFAULT_SPEC, "rb") as fh:
+        raw = fh.read()
+    return compile_spec(raw, use_cache=use_cache)
+
+
+def compile_spec(raw, use_cache=True):
+    """Compile raw spec bytes, reusing the in-process or on-disk cache when possible."""
+    digest = spec_digest(raw)
+    if use_cache:
+        document = _compiled.get(digest)
+        if document is not None:
+            return document
+        cached = os.path.join(cache_dir("content"), digest + ".pickle")
+        document = load_pickle(cached)
+        if isinstance(document, Document) and document.digest == digest:
+            touch(cached)
+            _compiled[digest] = document
+            return document
+
+    try:
+        spec = json.loads(raw)
+    except ValueError as exc:
+        raise ContentError("content spec is not valid JSON: %s" % exc) from None
+    document = build_document(spec, digest)
+
+    if use_cache:
+        _compiled[digest] = document
+        if dump_pickle(cached, document):
+            prune(cache_dir("content"), MAX_STORED_SPECS)
+    return document
+
+
+def build_document(spec, digest=""):
+    """Validate a parsed spec and build the compiled ``Document``."""
+    if not isinstance(spec, dict):
+        raise ContentError("content spec must be a JSON object")
+    sections = spec.get("sections")
+    if not isinstance(sections, list) or not sections:
+        raise ContentError("content spec needs a non-empty 'sections' list")
+
+    compiled = []
+    seen = set()
+    for index, section in enumerate(sections):
+        where = "sections[%d]" % index
+        section_id = _str(section, "id", where)
+        if section_id in seen:
+            raise ContentError("%s: duplicate section id %r" % (where, section_id))
+        seen.add(section_id)
+        blocks = section.get("blocks")
+        if not isinstance(blocks, list) or not blocks:
+            raise ContentError("%s: needs a non-empty 'blocks' list" % where)
+        blocks = tuple(_block(b, "%s.blocks[%d]" % (where, i)) for i, b in enumerate(blocks))
+        compiled.append(Section(section_id, section.get("title") or _section_title(blocks, section_id), blocks))
+
+    return Document(
+        _str(spec, "title", "spec"),
+        spec.get("filename") or "roadmap.pdf",
+        tuple(compiled),
+        digest,
+    )
+
+
+def _block(block, where):
+    if not isinstance(block, dict):
+        raise ContentError("%s: block must be an object" % where)
+    kind = block.get("type")
+    if kind in ("title", "subheading"):
+        return (kind, _str(block, "text", where))
+    if kind == "heading":
+        text = _str(block, "text", where)
+        label = block.get("toc", True)
+        if label is True:
+            label = text
+        elif label is False:
+            label = None
+        elif not isinstance(label, str) or not label:
+            raise ContentError("%s: 'toc' must be a label string or a boolean" % where)
+        return (kind, text, label)
+    if kind == "paragraph":
+        style = block.get("style", "body")
+        if style not in PARAGRAPH_STYLES:
+            raise ContentError("%s: unknown paragraph style %r" % (where, style))
+        text = _str(block, "text", where)
+        _check_inline(text, where)
+        template = bool(block.get("template"))
+        if template:
+            _check_template(text, where)
+        return (kind, style, text, template)
+    if kind == "checklist":
+        return (kind, _items(block, where))
+    if kind == "groups":
+        groups = block.get("groups")
+        if not isinstance(groups, list) or not groups:
+            raise ContentError("%s: needs a non-empty 'groups' list" % where)
+        return (kind, tuple((_str(g, "title", where), _items(g, where)) for g in groups))
+    if kind == "spacer":
+        height = block.get("height")
+        if not isinstance(height, (int, float)) or height < 0:
+            raise ContentError("%s: spacer needs a non-negative 'height' in inches" % where)
+        return (kind, float(height))
+    if kind == "table":
+        style = block.get("style")
+        if style not in TABLE_STYLES:
+            raise ContentError("%s: unknown table style %r" % (where, style))
+        rows = block.get("rows")
+        widths = block.get("col_widths")
+        if not isinstance(rows, list) or not rows or not isinstance(widths, list):
+            raise ContentError("%s: table needs 'rows' and 'col_widths'" % where)
+        rows = tuple(tuple(str(cell) for cell in row) for row in rows)
+        if any(len(row) != len(widths) for row in rows):
+            raise ContentError("%s: every row must have %d cells" % (where, len(widths)))
+        return (kind, style, _widths(widths, where), rows)
+    if kind == "toc":
+        style = block.get("style")
+        if style not in TABLE_STYLES:
+            raise ContentError("%s: unknown table style %r" % (where, style))
+        widths = block.get("col_widths")
+        header = block.get("header")
+        if not isinstance(widths, list) or len(widths) != 2 or not isinstance(header, list) or len(header) != 2:
+            raise ContentError("%s: toc needs two 'col_widths' and a two-cell 'header'" % where)
+        return (kind, style, _widths(widths, where), tuple(str(cell) for cell in header))
+    if kind == "gantt":
+        return _gantt(block, where)
+    if kind == "schema":
+        return _schema(block, where)
+    raise ContentError("%s: unknown block type %r" % (where, kind))
+
+
+def _number(obj, key, where, default=None):
+    value = obj.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+        raise ContentError("%s: %r must be a non-negative number" % (where, key))
+    return float(value)
+
+
+def _gantt(block, where):
+    style = block.get("style")
+    if style not in TABLE_STYLES:
+        raise ContentError("%s: unknown table style %r" % (where, style))
+    widths = block.get("col_widths")
+    header = block.get("header")
+    if not isinstance(widths, list) or len(widths) != 4 or not isinstance(header, list) or len(header) != 4:
+        raise ContentError("%s: gantt needs four 'col_widths' and a four-cell 'header'" % where)
+    tasks = block.get("tasks")
+    if not isinstance(tasks, list) or not tasks:
+        raise ContentError("%s: needs a non-empty 'tasks' list" % where)
+    compiled = []
+    for index, task in enumerate(tasks):
+        at = "%s.tasks[%d]" % (where, index)
+        effort = task.get("effort")
+        if effort is not None:
+            if (not isinstance(effort, list) or len(effort) != 2
+                    or not all(isinstance(e, (int, float)) and e >= 0 for e in effort)):
+                raise ContentError("%s: 'effort' must be a [low, high] pair of hours" % at)
+            effort = (float(effort[0]), float(effort[1]))
+        depends = task.get("depends", [])
+        if not isinstance(depends, list) or not all(isinstance(d, str) for d in depends):
+            raise ContentError("%s: 'depends' must be a list of task ids" % at)
+        compiled.append((_str(task, "id", at), _str(task, "name", at), _number(task, "start", at),
+                         _number(task, "duration", at, 0.0), effort, tuple(depends),
+                         bool(task.get("milestone")), task.get("milestones") or None))
+    compiled = ("gantt", block.get("unit", "week"), style, _widths(widths, where),
+                tuple(str(cell) for cell in header), _str(block, "total", where), tuple(compiled))
+    try:
+        block_table(compiled).schedule()
+    except TimelineError as exc:
+        raise ContentError("%s: %s" % (where, exc)) from None
+    return compiled
+
+
+def _schema(block, where):
+    mode = block.get("mode", "list")
+    if mode not in SCHEMA_MODES:
+        raise ContentError("%s: unknown schema mode %r" % (where, mode))
+    files = block.get("files", list(DEFAULT_FILES))
+    if not isinstance(files, list) or not files or not all(isinstance(f, str) and f for f in files):
+        raise ContentError("%s: 'files' must be a non-empty list of SQL file patterns" % where)
+    for pattern in files:
+        if not is_migration_pattern(pattern):
+            raise ContentError("%s: %r must be a relative '.sql' pattern inside the scripts directory"
+                               % (where, pattern))
+    describe = block.get("describe", {})
+    if not isinstance(describe, dict) or not all(isinstance(d, str) for d in describe.values()):
+        raise ContentError("%s: 'describe' must map table names to descriptions" % where)
+    if mode == "list":
+        return ("schema", mode, _str(block, "title", where), tuple(files), tuple(describe.items()), None, ())
+    style = block.get("style")
+    if style not in TABLE_STYLES:
+        raise ContentError("%s: unknown table style %r" % (where, style))
+    widths = block.get("col_widths")
+    if not isinstance(widths, list) or len(widths) != 3:
+        raise ContentError("%s: a schema reference needs three 'col_widths'" % where)
+    return ("schema", mode, None, tuple(files), tuple(describe.items()), style, _widths(widths, where))
+
+
+def _widths(widths, where):
+    if not all(isinstance(w, (int, float)) and not isinstance(w, bool) and w >= 0 for w in widths):
+        raise ContentError("%s: 'col_widths' must be non-negative numbers of inches" % where)
+    return tuple(float(w) for w in widths)
+
+
+def _check_inline(text, where):
+    opened = []
+    for match in _INLINE_TAG.finditer(text):
+        if not match.group().startswith("</"):
+            opened.append(match.group(1))
+        elif not opened or opened.pop() != match.group(1):
+            raise ContentError("%s: %s does not close an open tag" % (where, match.group()))
+    if opened:
+        raise ContentError("%s: <%s> is never closed" % (where, opened[-1]))
+
+
+def _check_template(text, where):
+    """Reject a template that ``text.format(**render_context())`` would fail on."""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(text) if field is not None]
+    except ValueError as exc:
+        raise ContentError("%s: broken template: %s" % (where, exc)) from None
+    for field in fields:
+        if field not in TEMPLATE_FIELDS:
+            raise ContentError("%s: unknown template field %r (use %s)"
+                               % (where, field, ", ".join(TEMPLATE_FIELDS)))
+    try:
+        text.format(**render_context(datetime(2000, 1, 1)))
+    except (ValueError, KeyError, IndexError) as exc:
+        raise ContentError("%s: broken template: %s" % (where, exc)) from None
+
+
+def _str(obj, key, where):
+    value = obj.get(key) if isinstance(obj, dict) else None
+    if not isinstance(value, str) or not value:
+        raise ContentError("%s: %r must be a non-empty string" % (where, key))
+    return value
+
+
+def _items(obj, where):
+    items = obj.get("items")
+    if not isinstance(items, list) or not all(isinstance(i, str) for i in items):
+        raise ContentError("%s: 'items' must be a list of strings" % where)
+    return tuple(items)
+
+
+def _section_title(blocks, default):
+    for block in blocks:
+        if block[0] in ("title", "heading"):
+            return block[1]
+    return default
@@ -0,0 +1,148 @@
+"""Vector Gantt chart flowable for a ``timeline.TaskTable``.
+
+Every task is one row: its label, then a bar from its earliest start to its
+earliest finish (a diamond for a milestone).  Tasks on the critical path
+are drawn in the accent colour, finished tasks in grey.  All bars of one
+colour go into a single path, so a page of a thousand-task chart is a
+handful of drawing operators rather than thousands.
+
+A chart longer than the frame splits between rows and repeats its time axis
+on every page; the parts share the table and its schedule.
+"""
+import math
+
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable
+
+from .timeline import EPSILON
+
+FONT = "Helvetica"
+FONT_SIZE = 7
+AXIS_HEIGHT = 16
+
+
+def _nice_step(span, target):
+    """A 1, 2 or 5 times a power of ten close to ``span / target``."""
+    raw = span / max(target, 1)
+    if raw <= 0:
+        return 1.0
+    power = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * power:
+            return max(factor * power, 1.0)
+    return 10 * power
+
+
+def _fit(text, width):
+    if stringWidth(text, FONT, FONT_SIZE) <= width:
+        return text
+    while text and stringWidth(text + "...", FONT, FONT_SIZE) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+class GanttChart(Flowable):
+    """Rows ``first``..``stop`` of a Gantt chart for ``table``."""
+
+    def __init__(self, table, palette, label_width=1.8 * inch, row_height=12, first=0, stop=None):
+        Flowable.__init__(self)
+        self.table = table
+        self.palette = palette
+        self.label_width = label_width
+        self.row_height = row_height
+        self.first = first
+        self.stop = len(table) if stop is None else stop
+        self.schedule = table.schedule()
+
+    def _rows(self):
+        return self.stop - self.first
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.height = AXIS_HEIGHT + self._rows() * self.row_height
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        fit = int((availHeight - AXIS_HEIGHT) // self.row_height)
+        if fit < 1 or self._rows() <= 1:
+            return []
+        if fit >= self._rows():
+            return [self]
+        middle = self.first + fit
+        return [self._part(self.first, middle), self._part(middle, self.stop)]
+
+    def _part(self, first, stop):
+        part = GanttChart(self.table, self.palette, self.label_width, self.row_height, first, stop)
+        part.schedule = self.schedule
+        return part
+
+    def _tick_label(self, time):
+        date = self.table.date(time)
+        if date is not None:
+            return date.strftime("%b %d")
+        return "%g" % time
+
+    def draw(self):
+        canv = self.canv
+        table, schedule = self.table, self.schedule
+        start, finish = schedule.start, schedule.finish
+        chart_width = self.width - self.label_width
+        scale = chart_width / (finish - start) if finish > start else 0.0
+        x0 = self.label_width
+        top = self.height - AXIS_HEIGHT
+
+        def x(time):
+            return x0 + (time - start) * scale
+
+        # Time axis and grid
+        canv.saveState()
+        canv.setFont(FONT, FONT_SIZE)
+        canv.setFillColor(colors.black)
+        canv.drawString(0, top + 4, "%ss" % table.unit.title() if table.origin is None else "Date")
+        canv.setStrokeColor(colors.lightgrey)
+        canv.setLineWidth(0.5)
+        step = _nice_step(finish - start, chart_width / 45.0)
+        tick = math.ceil(start / step) * step
+        while tick <= finish + EPSILON:
+            canv.line(x(tick), 0, x(tick), top + 2)
+            canv.drawCentredString(x(tick), top + 4, self._tick_label(tick))
+            tick += step
+        canv.setStrokeColor(colors.black)
+        canv.line(x0, top, self.width, top)
+
+        # Labels and bars, one path per colour
+        fills = {"critical": colors.HexColor(self.palette["accent"]),
+                 "normal": colors.HexColor(self.palette["secondary"]), "done": colors.grey}
+        paths = {}
+        height = self.row_height
+        bar = height * 0.6
+        label_room = self.label_width - 4
+        for row, task in enumerate(range(self.first, self.stop)):
+            y = top - (row + 1) * height
+            canv.drawString(0, y + (height - FONT_SIZE) / 2.0 + 1, _fit(table.label(task), label_room))
+            if table.is_done(task):
+                kind = "done"
+            elif schedule.slack[task] <= EPSILON:
+                kind = "critical"
+            else:
+                kind = "normal"
+            path = paths.get(kind)
+            if path is None:
+                path = paths[kind] = canv.beginPath()
+            middle = y + height / 2.0
+            if table.is_milestone(task):
+                cx, r = x(schedule.early_start[task]), bar / 2.0
+                path.moveTo(cx, middle + r)
+                path.lineTo(cx + r, middle)
+                path.lineTo(cx, middle - r)
+                path.lineTo(cx - r, middle)
+                path.close()
+            else:
+                left = x(schedule.early_start[task])
+                path.rect(left, middle - bar / 2.0, max(x(schedule.early_finish[task]) - left, 0.5), bar)
+        for kind, path in sorted(paths.items()):
+            canv.setFillColor(fills[kind])
+            canv.drawPath(path, stroke=0, fill=1)
+        canv.restoreState()
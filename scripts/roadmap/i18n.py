@@ -0,0 +1,267 @@
+"""Render the roadmap in several languages in one batch.
+
+A translation catalog is a JSON object mapping each locale to its
+messages, each message mapping a string of the spec - a heading, a
+paragraph with its markup, a table cell, a list item... - to its
+translation::
+
+    {"de": {"Executive Summary": "Zusammenfassung", ...},
+     "fr": {"Executive Summary": "Synthèse", ...}}
+
+Strings without a translation stay as they are, so a partial catalog
+still renders.  ``python -m roadmap.i18n --extract`` writes a catalog
+template holding every translatable string of the spec.  Text the
+generator writes itself (the schema reference's column headings, the
+critical path sentence, the generated-on date) is not translated.
+
+``render_locales`` renders every locale of a catalog in one job and does
+the language-independent work once: the spec is compiled, the theme's
+styles and fonts are built and the SQL migrations are parsed a single
+time, paragraph markup is parsed once per distinct string, and a section
+whose text comes out the same in two locales - spacers, tables of
+figures, anything not translated yet - is laid out once and replayed into
+both.  The sections that do differ are collected across all locales and
+laid out together, side by side in ``workers`` processes when given, after
+which each locale only lays out its table of contents and writes its
+pages.
+
+Run from the ``scripts`` directory::
+
+    python -m roadmap.i18n --catalog translations.json --locales de,fr
+    python -m roadmap.i18n --extract translations.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from .content import Document, Section
+
+
+class CatalogError(ValueError):
+    """Raised when a translation catalog is malformed."""
+
+
+def load_catalog(path):
+    """Load and validate the catalog at ``path``; return ``{locale: {message: translation}}``."""
+    try:
+        with open(path, "rb") as fh:
+            catalog = json.loads(fh.read())
+    except OSError as exc:
+        raise CatalogError("cannot read catalog %s: %s" % (path, exc.strerror)) from None
+    except ValueError as exc:
+        raise CatalogError("catalog %s is not valid JSON: %s" % (path, exc)) from None
+    return check_catalog(catalog)
+
+
+def check_catalog(catalog):
+    """Validate a decoded catalog and return it."""
+    if not isinstance(catalog, dict) or not catalog:
+        raise CatalogError("catalog must be a non-empty object of locales")
+    for locale, entries in catalog.items():
+        if not locale or "/" in locale or os.sep in locale:
+            raise CatalogError("invalid locale %r" % (locale,))
+        if not isinstance(entries, dict) or not all(
+                isinstance(k, str) and isinstance(v, str) for k, v in entries.items()):
+            raise CatalogError("%s: messages must map strings to strings" % locale)
+    return catalog
+
+
+def _map_block(block, t):
+    """``block`` with ``t`` applied to every translatable string in it."""
+    kind = block[0]
+    if kind in ("title", "subheading"):
+        return (kind, t(block[1]))
+    if kind == "heading":
+        return (kind, t(block[1]), block[2] and t(block[2]))
+    if kind == "paragraph":
+        return (kind, block[1], t(block[2]), block[3])
+    if kind == "checklist":
+        return (kind, tuple(t(item) for item in block[1]))
+    if kind == "groups":
+        return (kind, tuple((t(title), tuple(t(item) for item in items)) for title, items in block[1]))
+    if kind == "table":
+        return block[:3] + (tuple(tuple(t(cell) for cell in row) for row in block[3]),)
+    if kind == "toc":
+        return block[:3] + (tuple(t(cell) for cell in block[3]),)
+    if kind == "gantt":
+        tasks = tuple(task[:1] + (t(task[1]),) + task[2:7] + (task[7] and t(task[7]),) for task in block[6])
+        return block[:4] + (tuple(t(cell) for cell in block[4]), t(block[5]), tasks)
+    if kind == "schema":
+        return (kind, block[1], block[2] and t(block[2]), block[3],
+                tuple((table, t(text)) for table, text in block[4])) + block[5:]
+    return block
+
+
+def messages(document):
+    """Every translatable string of ``document``, in order of first appearance."""
+    seen = {}
+
+    def collect(text):
+        if isinstance(text, str) and text.strip():
+            seen.setdefault(text, "")
+        return text
+
+    collect(document.title)
+    for section in document.sections:
+        collect(section.title)
+        for block in section.blocks:
+            _map_block(block, collect)
+    return list(seen)
+
+
+def localized_filename(filename, locale):
+    """``roadmap.pdf`` -> ``roadmap.de.pdf``."""
+    base, ext = os.path.splitext(filename)
+    return "%s.%s%s" % (base, locale, ext)
+
+
+def translate(document, locale, catalog_messages):
+    """``document`` with its strings replaced by ``catalog_messages``, named for ``locale``.
+
+    Sections whose strings have no translation are returned unchanged (the
+    same objects), so their layouts are shared with every other locale.
+    """
+    def t(text):
+        return catalog_messages.get(text, text) if isinstance(text, str) else text
+
+    sections = []
+    for section in document.sections:
+        blocks = tuple(_map_block(block, t) for block in section.blocks)
+        title = t(section.title)
+        if blocks == section.blocks and title == section.title:
+            sections.append(section)
+        else:
+            sections.append(Section(section.id, title, blocks))
+    used = sorted((k, v) for k, v in catalog_messages.items() if k != v)
+    digest = hashlib.sha256(("%s\0%s\0%r" % (document.digest, locale, used)).encode("utf8")).hexdigest()
+    return Document(t(document.title), localized_filename(document.filename, locale), tuple(sections), digest)
+
+
+def _shared_sections(variants):
+    """The distinct sections of ``variants`` that do not depend on a table of contents."""
+    from .render import has_toc
+
+    unique = {}
+    for document in variants:
+        for section in document.sections:
+            if not has_toc(section):
+                unique.setdefault(repr(section), section)
+    return tuple(unique.values())
+
+
+def render_locales(document, catalog, locales=None, base=None, formats=("pdf",), now=None, pagesize=None,
+                   theme=None, section_cache=None, markup_cache=None, workers=None, stats=None):
+    """Render ``document`` in every locale of ``catalog`` and return ``{locale: {format: path}}``.
+
+    ``locales`` picks and orders the locales to render (all of the
+    catalog's by default).  Each file is named after ``base`` (the spec's
+    filename by default) with the locale before the extension, and every
+    locale shares one ``now``.  The sections of all locales go through one
+    layout cache - ``section_cache``, or a private in-memory one when it is
+    False - so each distinct section is laid out once; a cache too small to
+    hold the whole batch is swapped for a larger private one on the same
+    disk store rather than resized.  The sections that are not cached yet
+    are laid out in ``workers`` processes when given (see ``render_pdf``).
+    If ``stats`` is a dict it receives the number of ``sections`` across
+    all locales, how many distinct ones were ``laid_out`` up front and the
+    ``seconds`` the batch took.
+    """
+    from reportlab.lib.pagesizes import A4
+
+    from . import layout
+    from .content import render_context
+    from .outputs import render_outputs
+    from .render import lay_out_document
+    from .theme import get_theme
+
+    start = time.perf_counter()
+    locales = list(catalog) if locales is None else list(locales)
+    unknown = [locale for locale in locales if locale not in catalog]
+    if unknown:
+        raise CatalogError("catalog has no locale %s" % ", ".join(map(repr, unknown)))
+    now = now or datetime.now()
+    pagesize = pagesize or A4
+    theme = theme or get_theme()
+    if section_cache is False:
+        section_cache = layout.SectionCache(persist=False)
+    cache = layout.default_cache if section_cache is None else section_cache
+    variants = [translate(document, locale, catalog[locale]) for locale in locales]
+
+    # Every distinct section once, uncached ones in parallel, into the shared cache.
+    shared = _shared_sections(variants)
+    # Room for all of them, or the first locales' sections would be evicted before they are used.
+    if cache.max_entries < 2 * len(shared):
+        cache = layout.SectionCache(max_entries=2 * len(shared), persist=cache.persist, max_stored=cache.max_stored)
+    laid = lay_out_document(Document(document.title, document.filename, shared, document.digest), pagesize,
+                            render_context(now), cache, theme, markup_cache=markup_cache, workers=workers)
+
+    base = base or document.filename
+    pdf_options = {"pagesize": pagesize, "theme": theme, "section_cache": cache, "markup_cache": markup_cache}
+    paths = {}
+    for locale, variant in zip(locales, variants):
+        paths[locale] = render_outputs(variant, formats, localized_filename(base, locale), now=now,
+                                       pdf_options=pdf_options)
+    if stats is not None:
+        stats["sections"] = sum(len(variant.sections) for variant in variants)
+        stats["laid_out"] = len(laid.laid_out)
+        stats["seconds"] = time.perf_counter() - start
+    return paths
+
+
+def main(argv=None):
+    from .cli import PAGE_SIZES, date_arg, format_list, page_size
+    from .content import load_document
+
+    parser = argparse.ArgumentParser(description="Render the roadmap in several languages.")
+    parser.add_argument("--catalog", help="translation catalog (JSON: {locale: {message: translation}})")
+    parser.add_argument("--locales", default=None,
+                        help="comma-separated locales to render (default: all in the catalog)")
+    parser.add_argument("--extract", metavar="PATH", default=None,
+                        help="write a catalog template with every translatable string to PATH and exit")
+    parser.add_argument("--spec", default=None, help="roadmap spec (default: roadmap/roadmap.json)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="base file name; each locale is inserted before the extension "
+                             "(default: the filename in the spec)")
+    parser.add_argument("--format", type=format_list, default=["pdf"], help="output formats, comma-separated")
+    parser.add_argument("--page-size", choices=PAGE_SIZES, default="A4", help="page size")
+    parser.add_argument("--date", type=date_arg, default=None, help="the generated-on date, ISO 8601")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="lay the sections of all locales out in N processes")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the section layout and markup caches")
+    args = parser.parse_args(argv)
+
+    document = load_document(args.spec, use_cache=not args.no_cache)
+    if args.extract:
+        template = {"xx": dict((message, "") for message in messages(document))}
+        with open(args.extract, "w", encoding="utf8") as fh:
+            json.dump(template, fh, ensure_ascii=False, indent=2)
+            fh.write("\n")
+        print("Wrote %d messages to %s" % (len(template["xx"]), args.extract))
+        return 0
+    if not args.catalog:
+        parser.error("--catalog is required unless --extract is given")
+    try:
+        catalog = load_catalog(args.catalog)
+        # An untranslated message in an extracted template is an empty string.
+        catalog = dict((locale, dict((k, v) for k, v in msgs.items() if v)) for locale, msgs in catalog.items())
+        locales = args.locales.split(",") if args.locales else None
+        stats = {}
+        paths = render_locales(document, catalog, locales, args.output, args.format, args.date,
+                               page_size(args.page_size), section_cache=False if args.no_cache else None,
+                               markup_cache=False if args.no_cache else None, workers=args.workers,
+                               stats=stats)
+    except CatalogError as exc:
+        parser.error(str(exc))
+    for locale, outputs in paths.items():
+        print("%s: %s" % (locale, ", ".join(outputs.values())))
+    print("%d locales in %.2f s: %d distinct sections laid out for %d in all" % (
+        len(paths), stats["seconds"], stats["laid_out"], stats["sections"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Section-level layout cache.
+
+Sections are separated by hard page breaks, so each one lays out
+independently of the others.  A section is laid out by its own platypus
+build onto a scratch canvas that records the finished page content streams
+and where each outline heading landed.  Those recordings are cached under a
+hash of the section content, styles and page geometry, and the output PDF is
+stitched together by replaying them, so an unchanged section is never
+wrapped and split again.  Knowing every section's page count before anything
+is written is also what lets the table of contents carry real page numbers.
+"""
+import hashlib
+import io
+import os
+import re
+from collections import OrderedDict, namedtuple
+
+import reportlab
+from reportlab.pdfgen.canvas import Canvas
+
+from .cache import cache_dir, dump_pickle, load_pickle, prune, touch
+
+# Bump whenever the recorded page format changes so stale caches are ignored.
+LAYOUT_VERSION = 3
+
+# ``pages`` holds one tuple of content-stream operators per page, ``fonts``
+# the (internal name, font name) pairs those operators refer to and
+# ``outline`` an (OutlineEntry, ...) tuple for the headings in the section.
+SectionLayout = namedtuple("SectionLayout", "key pages fonts outline")
+
+# ``page`` is relative to the start of the section and ``top`` is the y
+# position of the top of the heading on that page.
+OutlineEntry = namedtuple("OutlineEntry", "level text toc_label page top")
+
+_FONT_OP = re.compile(r"(/F\d+)( \S+ Tf)")
+
+
+class RecordingCanvas(Canvas):
+    """Canvas that keeps a copy of every finished page's content stream."""
+
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self.recorded = []
+
+    def showPage(self):
+        portable = not (
+            self._annotationrefs or self._formsinuse or self._colorsUsed
+            or self._shadingUsed or self._psCommandsBeforePage or self._psCommandsAfterPage
+            or getattr(self._extgstate, "_c", None)
+        )
+        self.recorded.append((tuple(self._code), portable))
+        Canvas.showPage(self)
+
+    def replay(self, layout, on_page=None):
+        """Emit the pages of a cached ``SectionLayout`` onto this canvas.
+
+        ``on_page(canvas, page_index)`` is called before each page is shown,
+        which is where document-level extras such as bookmarks are added.
+        """
+        rename = {}
+        for internal, font in layout.fonts:
+            current = self._doc.getInternalFontName(font)
+            if current != internal:
+                rename[internal] = current
+        for index, ops in enumerate(layout.pages):
+            if rename:
+                ops = [_FONT_OP.sub(lambda m: rename.get(m.group(1), m.group(1)) + m.group(2), op)
+                       for op in ops]
+            self._code.extend(ops)
+            if on_page is not None:
+                on_page(self, index)
+            self.recorded.append((None, True))
+            Canvas.showPage(self)
+
+
+_doc_template = []
+
+
+def section_doc_template():
+    """The ``SectionDocTemplate`` class, defined on first use.
+
+    Platypus is the most expensive import reportlab has and a render whose
+    sections all replay from the cache never needs it, so the class that
+    depends on it is only created once a section actually has to be laid out.
+    """
+    if not _doc_template:
+        from reportlab.platypus import SimpleDocTemplate
+
+        class SectionDocTemplate(SimpleDocTemplate):
+            """Lays one section out onto an existing canvas without saving it.
+
+            Flowables carrying an ``outline`` attribute of ``(level, text, toc_label)``
+            are recorded in ``self.outline`` with the page they landed on.
+            """
+
+            _doSave = 0
+
+            def lay_out(self, flowables, canv, on_heading=None):
+                self.outline = []
+                self._on_heading = on_heading
+                self.build(flowables, canvasmaker=lambda *args, **kwargs: canv)
+
+            def afterFlowable(self, flowable):
+                outline = getattr(flowable, "outline", None)
+                if outline is None:
+                    return
+                top = self.frame._y + flowable.getSpaceAfter() + flowable.height
+                entry = OutlineEntry(outline[0], outline[1], outline[2], self.page - 1, top)
+                self.outline.append(entry)
+                if self._on_heading is not None:
+                    self._on_heading(self.canv, entry)
+
+        _doc_template.append(SectionDocTemplate)
+    return _doc_template[0]
+
+
+class SectionCache(object):
+    """Bounded in-process LRU of section layouts backed by the disk cache.
+
+    The disk keeps up to ``max_stored`` layouts, dropping the least recently used.
+    """
+
+    def __init__(self, max_entries=256, persist=True, max_stored=4096):
+        self.max_entries = max_entries
+        self.persist = persist
+        self.max_stored = max_stored
+        self._entries = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(cache_dir("sections"), key + ".pickle")
+
+    def get(self, key):
+        layout = self._entries.get(key)
+        if layout is not None:
+            self._entries.move_to_end(key)
+            return layout
+        if self.persist:
+            path = self._path(key)
+            layout = load_pickle(path)
+            if isinstance(layout, SectionLayout) and layout.key == key:
+                touch(path)
+                self._remember(key, layout)
+                return layout
+        return None
+
+    def put(self, layout):
+        self._remember(layout.key, layout)
+        if self.persist and dump_pickle(self._path(layout.key), layout):
+            prune(cache_dir("sections"), self.max_stored)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _remember(self, key, layout):
+        self._entries[key] = layout
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+default_cache = SectionCache()
+
+
+def section_key(section, theme_digest, geometry, context, toc_entries=None):
+    """Cache key for a section: its content, the theme and the page geometry.
+
+    Template values, table of contents entries and the SQL migrations only
+    feed the key of the sections that actually use them.
+    """
+    h = hashlib.sha256(b"roadmap-layout-%d\0" % LAYOUT_VERSION)
+    h.update(reportlab.Version.encode("ascii"))
+    h.update(theme_digest.encode("ascii"))
+    h.update(repr(geometry).encode("utf8"))
+    h.update(repr(section).encode("utf8"))
+    if any(block[0] == "paragraph" and block[3] for block in section.blocks):
+        h.update(repr(sorted(context.items())).encode("utf8"))
+    if any(block[0] == "toc" for block in section.blocks):
+        h.update(repr(toc_entries).encode("utf8"))
+    if any(block[0] == "schema" for block in section.blocks):
+        from .schema import blocks_digest
+
+        h.update(blocks_digest(section.blocks).encode("ascii"))
+    return h.hexdigest()
+
+
+def lay_out_section(flowables, key, pagesize, margins, canv=None, on_heading=None):
+    """Lay ``flowables`` out and return ``(layout, portable)``.
+
+    By default the section goes onto a private scratch canvas so it can be
+    laid out ahead of, and independently from, the output document.  The
+    layout is not ``portable`` - and must not be cached or replayed - when a
+    page used resources that a recording cannot carry (links, images,
+    forms...); such sections are laid out again directly onto the output
+    canvas, passing it as ``canv``.
+    """
+    if canv is None:
+        canv = RecordingCanvas(io.BytesIO(), pagesize=pagesize)
+    start = len(canv.recorded)
+    doc = section_doc_template()(None, pagesize=pagesize, **margins)
+    doc.lay_out(flowables, canv, on_heading)
+    recorded = canv.recorded[start:]
+    portable = all(ok for _, ok in recorded)
+    fonts = tuple((internal, font) for font, internal in canv._doc.fontMapping.items())
+    return SectionLayout(key, tuple(ops for ops, _ in recorded), fonts, tuple(doc.outline)), portable
@@ -0,0 +1,116 @@
+"""Cache of parsed paragraph markup.
+
+Most of the roadmap is long inline-markup paragraphs, and reportlab
+re-parses a paragraph's markup every time one is created - about nine
+tenths of the time it takes to build a section's flowables.  A
+``MarkupCache`` keeps the parsed fragments for each (markup, style) pair in
+a bounded LRU and builds paragraphs from them, so identical text is parsed
+once per process.  With ``persist`` the entries are also saved to the cache
+directory and loaded back by the next run.
+
+Fragments are shared between the paragraphs built from them; reportlab only
+reads them (line breaking works on copies), so sharing is safe.
+"""
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+
+import reportlab
+
+from .cache import cache_dir, dump_pickle, load_pickle, prune
+
+# Bump whenever the stored entry format changes so stale caches are ignored.
+MARKUP_VERSION = 1
+
+# Stored cache files kept, one per markup format and reportlab version.
+MAX_STORED_VERSIONS = 4
+
+
+class MarkupCache(object):
+    """Bounded LRU of parsed paragraph fragments, optionally saved to disk."""
+
+    def __init__(self, max_entries=4096, persist=True):
+        self.max_entries = max_entries
+        self.persist = persist
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._style_keys = weakref.WeakKeyDictionary()
+        self._loaded = False
+        self._dirty = False
+
+    def _path(self):
+        return os.path.join(cache_dir("markup"), "markup-%d-%s.pickle" % (MARKUP_VERSION, reportlab.Version))
+
+    def _load(self):
+        self._loaded = True
+        if not self.persist:
+            return
+        stored = load_pickle(self._path())
+        if isinstance(stored, list):
+            for key, frags in stored[-self.max_entries:]:
+                self._entries.setdefault(key, frags)
+
+    def style_key(self, style):
+        """Digest of everything in ``style`` that feeds the parsed fragments."""
+        key = self._style_keys.get(style)
+        if key is None:
+            items = sorted((k, v) for k, v in style.__dict__.items() if k != "parent")
+            key = self._style_keys[style] = hashlib.sha256(repr(items).encode("utf8")).hexdigest()
+        return key
+
+    def frags(self, text, style):
+        """Parsed fragments for ``text`` in ``style``, or None if it has bullet markup."""
+        from reportlab.platypus.paragraph import cleanBlockQuotedText, textTransformFrags
+        from reportlab.platypus.paraparser import ParaParser
+
+        if not self._loaded:
+            self._load()
+        key = (text, self.style_key(style))
+        frags = self._entries.get(key)
+        if frags is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return frags
+        self.misses += 1
+        parser = ParaParser()
+        parser.caseSensitive = 1
+        parsed_style, frags, bullet_frags = parser.parse(cleanBlockQuotedText(text), style)
+        if frags is None:
+            raise ValueError("xml parser error (%s) in paragraph beginning\n'%s'"
+                             % (parser.errors[0], text[:30]))
+        if bullet_frags or parsed_style is not style:
+            # <bullet> or <para> attributes change more than the fragments
+            return None
+        textTransformFrags(frags, style)
+        self._entries[key] = frags
+        self._dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return frags
+
+    def paragraph(self, text, style):
+        """A ``Paragraph`` for ``text`` built from cached fragments."""
+        from reportlab.platypus import Paragraph
+
+        frags = self.frags(text, style)
+        if frags is None:
+            return Paragraph(text, style)
+        return Paragraph(text, style, frags=list(frags))
+
+    def save(self):
+        """Write the entries to disk if anything was added since the last save."""
+        if self.persist and self._dirty:
+            self._dirty = False
+            if dump_pickle(self._path(), list(self._entries.items())):
+                # one file per markup format and reportlab version; keep the recent ones
+                prune(cache_dir("markup"), MAX_STORED_VERSIONS)
+                return True
+        return False
+
+    def clear(self):
+        self._entries.clear()
+        self._dirty = False
+
+
+default_cache = MarkupCache()
@@ -0,0 +1,284 @@
+"""Smaller, faster-to-display PDFs, and a breakdown of where their bytes go.
+
+``optimize_pdf`` rewrites a finished reportlab PDF:
+
+* streams are stored as plain binary Flate at the highest level instead of
+  ASCII85-wrapped Flate, which alone saves a fifth of every stream;
+* objects with identical content are stored once and every reference is
+  pointed at the survivor, repeated until nothing more merges (repeated
+  page content, font descriptors or images collapse this way; page tree
+  nodes are never merged);
+* page dictionaries lose the obsolete ``/ProcSet``, the empty ``/Trans``
+  and the default ``/Rotate 0``.
+
+Fonts need no extra work: reportlab always embeds TrueType fonts as subsets
+holding only the glyphs used, and the standard 14 fonts are not embedded.
+
+``linearize`` reorders the file for progressive display ("fast web view")
+with ``qpdf`` when it is installed, which also packs small objects into
+compressed object streams; without ``qpdf`` the file is left as it is.
+
+The parser only has to understand reportlab's own output: one object per
+``N 0 obj`` block, direct stream lengths and escaped string parentheses.
+"""
+import base64
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zlib
+from collections import OrderedDict
+
+_OBJECT = re.compile(rb"(\d+) 0 obj\r?\n")
+_LENGTH = re.compile(rb"/Length (\d+)")
+_STREAM = re.compile(rb">>\s*stream(\r\n|\n)")
+_FILTER = re.compile(rb"/Filter (\[[^\]]*\]|/\w+)")
+# String literals are skipped so a reference-like title is never rewritten.
+_REF_OR_STRING = re.compile(rb"\((?:\\.|[^\\)])*\)|(\d+) 0 R")
+_TYPE = re.compile(rb"/Type /(\w+)")
+_SUBTYPE = re.compile(rb"/Subtype /(\w+)")
+_TRAILER = re.compile(rb"trailer\s*(<<.*?>>)\s*startxref", re.S)
+# Page tree nodes and annotations must stay distinct even when their content is
+# identical, and so must any dictionary pointing back at its page (/P) or parent.
+_UNIQUE_TYPES = (b"Page", b"Pages", b"Catalog", b"Outlines", b"Annot")
+_BACK_LINK = re.compile(rb"/(?:P|Parent)(?=[\s/<>\[\]()%{}]|$)")
+_PAGE_CLUTTER = (
+    re.compile(rb"\s*/ProcSet \[[^\]]*\]"),
+    re.compile(rb"\s*/Trans <<\s*>>"),
+    re.compile(rb"\s*/Rotate 0(?![\d.])"),
+)
+
+
+class PDFObject(object):
+    """One indirect object: its dictionary or value text and optional stream bytes."""
+
+    __slots__ = ("num", "head", "stream", "size")
+
+    def __init__(self, num, head, stream, size):
+        self.num = num
+        self.head = head
+        self.stream = stream
+        self.size = size
+
+
+def parse(data):
+    """``(header, OrderedDict of num -> PDFObject, trailer dict bytes)`` for a reportlab PDF."""
+    objects = OrderedDict()
+    first = _OBJECT.search(data)
+    if first is None:
+        raise ValueError("no PDF objects found")
+    header = data[:first.start()]
+    pos = first.start()
+    while True:
+        match = _OBJECT.match(data, pos)
+        if match is None:
+            break
+        num = int(match.group(1))
+        start = match.end()
+        end = data.index(b"endobj", start)
+        body = data[start:end]
+        stream = None
+        marker = _STREAM.search(body) if body.startswith(b"<<") else None
+        if marker is not None:
+            length = int(_LENGTH.search(body[:marker.start()]).group(1))
+            data_start = start + marker.end()
+            stream = data[data_start:data_start + length]
+            end = data.index(b"endobj", data_start + length)
+            body = body[:marker.start() + 2]
+        objects[num] = PDFObject(num, body.rstrip(), stream, end + len(b"endobj") - match.start())
+        pos = end + len(b"endobj")
+        while data[pos:pos + 1] in (b"\r", b"\n", b" "):
+            pos += 1
+    trailer = _TRAILER.search(data, pos)
+    if trailer is None:
+        raise ValueError("PDF trailer not found")
+    return header, objects, trailer.group(1)
+
+
+def _decoded(obj):
+    """The stream bytes with ASCII85 and Flate removed, or None if another filter is in use."""
+    match = _FILTER.search(obj.head)
+    filters = re.findall(rb"/(\w+)", match.group(1)) if match else []
+    data = obj.stream
+    for name in filters:
+        if name == b"ASCII85Decode":
+            data = data.strip()
+            data = base64.a85decode(data[:-2] if data.endswith(b"~>") else data)
+        elif name == b"FlateDecode":
+            data = zlib.decompress(data)
+        else:
+            return None
+    return data
+
+
+def _recompress(obj, level):
+    raw = _decoded(obj)
+    if raw is None:
+        return
+    stream = zlib.compress(raw, level)
+    head = _FILTER.sub(b"", obj.head)
+    head = _LENGTH.sub(b"", head).rstrip()
+    assert head.endswith(b">>")
+    obj.head = head[:-2].rstrip() + b" /Filter /FlateDecode /Length %d >>" % len(stream)
+    obj.stream = stream
+
+
+def _renumber(text, mapping):
+    def sub(match):
+        if match.group(1) is None:
+            return match.group(0)
+        return b"%d 0 R" % mapping.get(int(match.group(1)), int(match.group(1)))
+    return _REF_OR_STRING.sub(sub, text)
+
+
+def _deduplicate(objects):
+    """Merge objects with identical content until nothing changes; return the old -> new map."""
+    merged = {}
+    while True:
+        seen = {}
+        mapping = {}
+        for num, obj in objects.items():
+            kind = _TYPE.search(obj.head)
+            if kind is not None and kind.group(1) in _UNIQUE_TYPES or _BACK_LINK.search(obj.head):
+                continue
+            key = (obj.head, obj.stream)
+            if key in seen:
+                mapping[num] = seen[key]
+            else:
+                seen[key] = num
+        if not mapping:
+            return merged
+        for num in mapping:
+            del objects[num]
+        for obj in objects.values():
+            obj.head = _renumber(obj.head, mapping)
+        for old, new in list(merged.items()):
+            merged[old] = mapping.get(new, new)
+        merged.update(mapping)
+
+
+def write(header, objects, trailer):
+    """Serialize objects, renumbered 1..n in their current order, with a fresh xref table."""
+    numbers = dict((num, index) for index, num in enumerate(objects, 1))
+    parts = [header]
+    offsets = []
+    offset = len(header)
+    for obj in objects.values():
+        chunk = b"%d 0 obj\n" % numbers[obj.num] + _renumber(obj.head, numbers)
+        if obj.stream is not None:
+            chunk += b"\nstream\n" + obj.stream + b"\nendstream"
+        chunk += b"\nendobj\n"
+        offsets.append(offset)
+        parts.append(chunk)
+        offset += len(chunk)
+    xref = [b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)]
+    xref.extend(b"%010d 00000 n \n" % o for o in offsets)
+    trailer = re.sub(rb"/Size \d+", b"/Size %d" % (len(objects) + 1), _renumber(trailer, numbers))
+    parts.append(b"".join(xref))
+    parts.append(b"trailer\n" + trailer + b"\nstartxref\n%d\n%%%%EOF\n" % offset)
+    return b"".join(parts)
+
+
+def optimize_pdf(data, level=9):
+    """Return ``data`` (a reportlab PDF) recompressed, deduplicated and trimmed."""
+    header, objects, trailer = parse(data)
+    for obj in objects.values():
+        if obj.stream is not None:
+            _recompress(obj, level)
+        elif _TYPE.search(obj.head) and _TYPE.search(obj.head).group(1) == b"Page":
+            for pattern in _PAGE_CLUTTER:
+                obj.head = pattern.sub(b"", obj.head)
+    merged = _deduplicate(objects)
+    if merged:
+        trailer = _renumber(trailer, merged)
+    return write(header, objects, trailer)
+
+
+def linearize(data):
+    """``data`` linearized by ``qpdf``, or None when ``qpdf`` is not installed or fails."""
+    qpdf = shutil.which("qpdf")
+    if qpdf is None:
+        return None
+    with tempfile.TemporaryDirectory(prefix="roadmap-qpdf-") as scratch:
+        src, dst = os.path.join(scratch, "in.pdf"), os.path.join(scratch, "out.pdf")
+        with open(src, "wb") as fh:
+            fh.write(data)
+        result = subprocess.run([qpdf, "--linearize", "--object-streams=generate", "--compress-streams=y",
+                                 "--recompress-flate", "--compression-level=9", "--deterministic-id", src, dst],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # exit status 3 means success with warnings
+        if result.returncode not in (0, 3) or not os.path.exists(dst):
+            return None
+        with open(dst, "rb") as fh:
+            return fh.read()
+
+
+def _category(obj, contents, font_files):
+    if obj.num in contents:
+        return "page content"
+    if obj.num in font_files:
+        return "font data"
+    head = obj.head
+    kind = _TYPE.search(head)
+    if kind is not None:
+        kind = kind.group(1).decode("ascii")
+        if kind == "XObject":
+            subtype = _SUBTYPE.search(head)
+            return "image" if subtype and subtype.group(1) == b"Image" else "form"
+        return {"Page": "page", "Pages": "page tree", "Font": "font", "FontDescriptor": "font",
+                "Outlines": "outline", "Annot": "annotation", "Catalog": "catalog"}.get(kind, kind.lower())
+    if b"/Title" in head and (b"/Parent" in head or b"/Dest" in head):
+        return "outline"
+    if b"/Producer" in head or b"/Creator" in head:
+        return "info"
+    if obj.stream is not None:
+        return "other stream"
+    return "other"
+
+
+def size_breakdown(data):
+    """``[(category, objects, bytes), ...]`` largest first, plus the xref/trailer overhead."""
+    _, objects, _ = parse(data)
+    contents, font_files = set(), set()
+    for obj in objects.values():
+        for name, target in re.findall(rb"/(Contents|FontFile2?|FontFile3) (\d+) 0 R", obj.head):
+            (contents if name == b"Contents" else font_files).add(int(target))
+    totals = {}
+    used = 0
+    for obj in objects.values():
+        category = _category(obj, contents, font_files)
+        count, size = totals.get(category, (0, 0))
+        totals[category] = (count + 1, size + obj.size)
+        used += obj.size
+    rows = sorted(((name, count, size) for name, (count, size) in totals.items()), key=lambda r: -r[2])
+    rows.append(("header, xref and trailer", 0, len(data) - used))
+    return rows
+
+
+def format_breakdown(data, label=None):
+    rows = size_breakdown(data)
+    total = len(data)
+    lines = ["%s%.1f KB in %d objects" % (label + ": " if label else "", total / 1024.0,
+                                         sum(count for _, count, _ in rows))]
+    width = max(len(name) for name, _, _ in rows)
+    for name, count, size in rows:
+        lines.append("  %s  %5s  %8.1f KB  %5.1f%%" % (name.ljust(width), count or "", size / 1024.0,
+                                                    100.0 * size / total if total else 0.0))
+    return "\n".join(lines)
+
+
+def write_optimized(data, filename, linearized=True):
+    """Optimize ``data``, linearize it when ``qpdf`` is available and write it to ``filename``.
+
+    ``filename`` is a path or a writable binary stream; returns the bytes written.
+    """
+    data = optimize_pdf(data)
+    if linearized:
+        data = linearize(data) or data
+    if hasattr(filename, "write"):
+        filename.write(data)
+    else:
+        with open(filename, "wb") as fh:
+            fh.write(data)
+    return data
@@ -0,0 +1,162 @@
+"""Marketplace order reports built from a data snapshot.
+
+The report lists every order, its status updates and its milestones, and
+can end with a Gantt chart of the milestones.  Its story is a generator and
+its tables are ``StreamingTable``s, so it renders in bounded memory through
+``render_streaming`` however many rows the snapshot holds.  The chart is
+opt-in and charts at most ``MAX_TIMELINE_TASKS`` milestones.
+"""
+from datetime import date
+
+from reportlab.lib.units import inch
+from reportlab.platypus import PageBreak, Paragraph, Spacer
+
+from .gantt import GanttChart
+from .render import render_context
+from .snapshot import Snapshot, Subquery
+from .stream import render_streaming, streaming_table
+from .theme import get_theme
+from .timeline import TaskTable, critical_path_text
+
+# Milestones charted at most; the chart is laid out in memory, unlike the tables.
+MAX_TIMELINE_TASKS = 500
+
+MILESTONE_COLUMNS = ["id", "order_id", "title", "created_at", "due_date", "completed_date", "is_completed"]
+
+# (heading, table, [(column, header label, width in inches), ...], sort column)
+REPORT_TABLES = (
+    ("Orders", "orders", [
+        ("id", "Order", 0.9),
+        ("status", "Status", 1.0),
+        ("total_amount", "Amount", 0.9),
+        ("delivery_date", "Delivery", 1.1),
+        ("created_at", "Created", 1.1),
+    ], "created_at"),
+    ("Order Updates", "order_updates", [
+        ("order_id", "Order", 0.9),
+        ("status", "Status", 1.0),
+        ("message", "Message", 2.2),
+        ("created_at", "Created", 1.1),
+    ], "created_at"),
+    ("Order Milestones", "order_milestones", [
+        ("order_id", "Order", 0.9),
+        ("title", "Milestone", 2.0),
+        ("due_date", "Due", 1.1),
+        ("is_completed", "Done", 0.6),
+    ], "due_date"),
+)
+
+
+def format_cell(column, value):
+    """Short, single-line text for a snapshot value."""
+    if value is None or value == "":
+        return "-"
+    if column == "id" or column.endswith("_id"):
+        return str(value)[:8]
+    if column == "total_amount":
+        try:
+            return "$%.2f" % float(value)
+        except ValueError:
+            return str(value)
+    if column.endswith("_at") or column.endswith("_date"):
+        return str(value)[:10]
+    if column.startswith("is_"):
+        return "Yes" if str(value).lower() in ("1", "t", "true", "yes") else "No"
+    text = " ".join(str(value).split())
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+def _day(value):
+    """Day number (proleptic ordinal) of a snapshot timestamp, or None."""
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal() if value else None
+    except ValueError:
+        return None
+
+
+def milestone_table(snapshot, where=None, limit=None):
+    """A day-based ``TaskTable`` of the ``order_milestones`` in ``snapshot``.
+
+    Each milestone runs from its creation to its due date (a point when it
+    has no due date) and waits for the previous milestone of its order, in
+    snapshot order.  ``where`` filters the milestones like ``Snapshot.rows``;
+    with ``limit`` only the first that many milestones are added.
+    """
+    # Times are days since 0001-01-01, so rows go straight in without a first pass.
+    table = TaskTable("day", date.fromordinal(1))
+    last = {}
+    available = snapshot.columns("order_milestones")
+    columns = [c for c in MILESTONE_COLUMNS if c in available]
+    for number, values in enumerate(snapshot.rows("order_milestones", columns, where=where,
+                                                  order_by="due_date" if "due_date" in columns else None)):
+        row = dict(zip(columns, values))
+        begin = _day(row.get("created_at")) or _day(row.get("due_date"))
+        end = _day(row.get("due_date"))
+        if begin is None:
+            continue
+        if limit is not None and len(table) >= limit:
+            break
+        key = row.get("id") or number
+        order_id = row.get("order_id")
+        previous = last.get(order_id)
+        table.add(key, row.get("title") or "Milestone", begin - 1,
+                  max(end - begin, 0) if end is not None else 0.0,
+                  depends=(previous,) if previous is not None else (), milestone=end is None or end <= begin,
+                  done=bool(row.get("completed_date")) or format_cell("is_completed", row.get("is_completed")) == "Yes")
+        last[order_id] = key
+    return table
+
+
+def order_report_story(snapshot, title="Marketplace Order Report", where=None, theme=None, now=None,
+                       timeline=False):
+    """Yield the flowables of an order report, streaming every table from ``snapshot``.
+
+    ``where`` optionally restricts the report to some orders (for example
+    ``{"freelancer_id": ...}`` or ``{"id": ...}``); updates and milestones are
+    then limited to those orders.  With ``timeline`` the report ends with a
+    Gantt chart of the first ``MAX_TIMELINE_TASKS`` milestones by due date.
+    """
+    theme = theme or get_theme()
+    paragraph, table = theme.paragraph, theme.table
+    related = {"order_id": Subquery("orders", "id", where)} if where else None
+    context = render_context(now)
+    yield Paragraph(title, paragraph["title"])
+    yield Paragraph("Generated on: %s" % context["generated_on"], paragraph["normal"])
+    yield Spacer(1, 0.3 * inch)
+
+    first = True
+    for heading, name, columns, order_by in REPORT_TABLES:
+        if not snapshot.has_table(name):
+            continue
+        if not first:
+            yield PageBreak()
+        first = False
+        yield Paragraph(heading, paragraph["heading"])
+        names = [c[0] for c in columns]
+        rows = snapshot.rows(name, names, where=where if name == "orders" else related,
+                             order_by=order_by)
+        yield streaming_table(
+            [c[1] for c in columns],
+            (tuple(format_cell(c, v) for c, v in zip(names, row)) for row in rows),
+            [c[2] * inch for c in columns],
+            table["timeline"],
+        )
+
+    if timeline and snapshot.has_table("order_milestones"):
+        tasks = milestone_table(snapshot, related, limit=MAX_TIMELINE_TASKS)
+        if len(tasks):
+            yield PageBreak()
+            yield Paragraph("Milestone Timeline", paragraph["heading"])
+            if len(tasks) == MAX_TIMELINE_TASKS:
+                yield Paragraph("The chart shows at most %d milestones, the first by due date; the Order "
+                                "Milestones table lists them all." % MAX_TIMELINE_TASKS, paragraph["normal"])
+            yield Paragraph(critical_path_text(tasks), paragraph["body"])
+            yield GanttChart(tasks, theme.palette)
+
+
+def render_order_report(snapshot_path, filename, title="Marketplace Order Report", where=None, now=None,
+                        timeline=False):
+    """Render the order report for a snapshot in streaming mode."""
+    with Snapshot(snapshot_path) as snapshot:
+        return render_streaming(order_report_story(snapshot, title, where, now=now, timeline=timeline),
+                                filename, title=title)
@@ -0,0 +1,89 @@
+"""Render one compiled document to several output formats at once.
+
+The spec is parsed once and every backend renders from the same model, with
+the backends running side by side in a thread pool.  The Markdown and HTML
+writers finish well inside the time the PDF layout takes, so producing all
+three costs about as much as producing the PDF alone.
+"""
+import importlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# format -> (file extension, module, renderer)
+FORMATS = {
+    "pdf": (".pdf", "render", "render_pdf"),
+    "md": (".md", "text", "render_markdown"),
+    "html": (".html", "text", "render_html"),
+}
+
+
+def output_path(base, fmt):
+    """``base`` with the extension of ``fmt``."""
+    return os.path.splitext(base)[0] + FORMATS[fmt][0]
+
+
+def renderer(fmt):
+    try:
+        _, module, name = FORMATS[fmt]
+    except KeyError:
+        raise ValueError("unknown format %r (expected one of %s)" % (fmt, ", ".join(FORMATS))) from None
+    return getattr(importlib.import_module("." + module, __package__), name)
+
+
+def render_outputs(document, formats, base=None, now=None, pdf_options=None, reproducible=False,
+                   use_cache=True, artifacts=None):
+    """Render ``document`` to every format in ``formats`` and return ``{format: path}``.
+
+    Files are named after ``base`` (the spec's filename by default) with each
+    format's extension.  ``base`` may instead be a writable binary stream when
+    a single format is requested.  All formats share one ``now`` so their
+    generated-on dates agree; ``pdf_options`` are passed on to ``render_pdf``.
+
+    With ``reproducible`` every format goes through
+    ``artifacts.render_artifact``, which skips the render when an identical
+    one is stored (unless ``use_cache`` is false); ``artifacts``, if a dict,
+    receives each format's artifact info.
+    """
+    base = base or document.filename
+    if reproducible:
+        from .artifacts import render_artifact
+        from .content import reproducible_now
+
+        now = reproducible_now(now)
+    else:
+        now = now or datetime.now()
+    formats = list(dict.fromkeys(formats))
+    to_stream = hasattr(base, "write")
+    if to_stream and len(formats) != 1:
+        raise ValueError("a stream can only receive one format, got %s" % ", ".join(formats))
+    jobs = []
+    for fmt in formats:
+        kwargs = dict(pdf_options or {}) if fmt == "pdf" else {}
+        render = renderer(fmt)
+        if reproducible:
+            info = {}
+            if artifacts is not None:
+                artifacts[fmt] = info
+            kwargs.update(fmt=fmt, use_cache=use_cache, info=info)
+            render = render_artifact
+        jobs.append((fmt, render, base if to_stream else output_path(base, fmt), kwargs))
+    if len(jobs) == 1:
+        fmt, render, path, kwargs = jobs[0]
+        return {fmt: render(document, path, now=now, **kwargs)}
+    with ThreadPoolExecutor(len(jobs)) as pool:
+        futures = [(fmt, pool.submit(render, document, path, now=now, **kwargs))
+                   for fmt, render, path, kwargs in jobs]
+        return dict((fmt, future.result()) for fmt, future in futures)
+
+
+def render_bytes(document, fmt="pdf", now=None, **options):
+    """Render ``document`` in memory and return the file contents as bytes.
+
+    Nothing touches the filesystem, so concurrent renders cannot collide;
+    ``options`` are passed on to the renderer.
+    """
+    buffer = io.BytesIO()
+    renderer(fmt)(document, buffer, now=now, **options)
+    return buffer.getvalue()
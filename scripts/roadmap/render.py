@@ -0,0 +1,450 @@
+"""PDF renderer for the compiled roadmap model."""
+import calendar
+import io
+import os
+import time
+from collections import namedtuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+
+from . import layout, markup
+from . import trace as tracing
+from .content import inline_markup, render_context, reproducible_now
+from .theme import get_theme
+
+MARGINS = {"rightMargin": 72, "leftMargin": 72, "topMargin": 72, "bottomMargin": 18}
+
+# A table of contents that changes length shifts every page number after it;
+# give up re-flowing it after this many attempts.
+MAX_TOC_PASSES = 4
+
+# Written into reproducible PDFs in place of reportlab's own producer string.
+PRODUCER = "Epic360 roadmap generator"
+
+# ``layouts`` holds a ``(SectionLayout, portable)`` pair per section and
+# ``entries`` the table of contents rows; ``reused``, ``laid_out`` and
+# ``timings`` are as described for ``render_pdf``'s ``stats``.
+DocumentLayout = namedtuple("DocumentLayout", "layouts entries reused laid_out timings")
+
+
+def groups_markup(groups):
+    """Render ``groups`` blocks to the inline markup reportlab paragraphs understand."""
+    return "<br/><br/>".join(
+        "<b>%s</b><br/>%s" % (title, "<br/>".join("• " + item for item in items))
+        for title, items in groups
+    )
+
+
+def _escape(text):
+    """Plain text as reportlab paragraph markup."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def section_flowables(section, theme, context, toc_entries=(), markup_cache=None):
+    """Flowables for one section, without the page break that separates sections.
+
+    Titles and headings carry an ``outline`` attribute so the layout records
+    where they land; ``toc_entries`` holds the (label, page) rows for a
+    ``toc`` block.  Paragraphs are built through ``markup_cache`` (the
+    process-wide ``markup.default_cache`` by default, False to parse every
+    time).
+    """
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    if markup_cache is None:
+        markup_cache = markup.default_cache
+    make_paragraph = markup_cache.paragraph if markup_cache else Paragraph
+
+    paragraph, table = theme.paragraph, theme.table
+    story = []
+    for block in section.blocks:
+        kind = block[0]
+        if kind == "title":
+            p = make_paragraph(block[1], paragraph[kind])
+            p.outline = (0, block[1], None)
+            story.append(p)
+        elif kind == "heading":
+            p = make_paragraph(block[1], paragraph[kind])
+            p.outline = (0, block[1], block[2])
+            story.append(p)
+        elif kind == "subheading":
+            story.append(make_paragraph(block[1], paragraph[kind]))
+        elif kind == "paragraph":
+            _, style, text, is_template = block
+            text = inline_markup(text.format(**context) if is_template else text, _escape)
+            story.append(make_paragraph(text, paragraph[style]))
+        elif kind == "checklist":
+            for item in block[1]:
+                story.append(make_paragraph("✓ " + item, paragraph["body"]))
+        elif kind == "groups":
+            story.append(make_paragraph(groups_markup(block[1]), paragraph["body"]))
+        elif kind == "spacer":
+            story.append(Spacer(1, block[1] * inch))
+        elif kind == "table":
+            _, style, widths, rows = block
+            t = Table([list(row) for row in rows], colWidths=[w * inch for w in widths])
+            t.setStyle(table[style])
+            story.append(t)
+        elif kind == "toc":
+            _, style, widths, header = block
+            t = Table([list(header)] + [list(entry) for entry in toc_entries],
+                      colWidths=[w * inch for w in widths])
+            t.setStyle(table[style])
+            story.append(t)
+        elif kind == "gantt":
+            story.extend(gantt_flowables(block, theme, make_paragraph))
+        elif kind == "schema":
+            story.extend(schema_flowables(block, theme, make_paragraph))
+    return story
+
+
+def gantt_flowables(block, theme, make_paragraph):
+    """Overview table, chart and critical-path summary for a ``gantt`` block."""
+    from reportlab.platypus import Spacer, Table
+
+    from .gantt import GanttChart
+    from .timeline import block_table, critical_path_text, slack_text, timeline_rows
+
+    _, _, style, widths, header, total, _ = block
+    tasks = block_table(block)
+    t = Table([list(row) for row in timeline_rows(tasks, header, total)], colWidths=[w * inch for w in widths])
+    t.setStyle(theme.table[style])
+    story = [t, Spacer(1, 0.3 * inch), GanttChart(tasks, theme.palette), Spacer(1, 0.15 * inch),
+             make_paragraph(critical_path_text(tasks), theme.paragraph["body"])]
+    slack = slack_text(tasks)
+    if slack:
+        story.append(make_paragraph(slack, theme.paragraph["body"]))
+    return story
+
+
+def schema_flowables(block, theme, make_paragraph):
+    """A table list, or per-table column tables and indexes, for a ``schema`` block."""
+    from reportlab.platypus import Spacer, Table
+
+    from .schema import column_notes, index_summary, load_schema, table_heading, table_summary
+
+    _, mode, title, files, describe, style, widths = block
+    tables = load_schema(files).tables.values()
+    if mode == "list":
+        describe = dict(describe)
+        items = tuple(table_summary(info, describe.get(info.name)) for info in tables)
+        return [make_paragraph(groups_markup(((title, items),)), theme.paragraph["body"])]
+    story = []
+    for info in tables:
+        story.append(make_paragraph("<b>%s</b>" % table_heading(info), theme.paragraph["body"]))
+        rows = [["Column", "Type", "Constraints"]]
+        rows.extend([column.name, column.type, column_notes(column)] for column in info.columns.values())
+        t = Table(rows, colWidths=[w * inch for w in widths], repeatRows=1)
+        t.setStyle(theme.table[style])
+        story.append(t)
+        indexes = index_summary(info)
+        if indexes:
+            story.append(Spacer(1, 0.05 * inch))
+            story.append(make_paragraph(indexes, theme.paragraph["body"]))
+        story.append(Spacer(1, 0.2 * inch))
+    return story
+
+
+def has_toc(section):
+    return any(block[0] == "toc" for block in section.blocks)
+
+
+def toc_entries(document, layouts, toc_pages):
+    """(label, page number) rows for every heading that belongs in the TOC.
+
+    ``layouts`` holds the laid-out sections; the length of the sections that
+    contain a TOC is taken from ``toc_pages`` instead.
+    """
+    entries = []
+    page = 1
+    for index, section in enumerate(document.sections):
+        if index in toc_pages:
+            page += toc_pages[index]
+            continue
+        laid_out = layouts[index][0]
+        for entry in laid_out.outline:
+            if entry.toc_label is not None:
+                entries.append((entry.toc_label, str(page + entry.page)))
+        page += len(laid_out.pages)
+    return tuple(entries)
+
+
+class _Bookmarks(object):
+    """Adds a bookmark and an outline entry for each recorded heading."""
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, canv, entry):
+        self.count += 1
+        key = "h%d" % self.count
+        canv.bookmarkHorizontal(key, 0, entry.top)
+        canv.addOutlineEntry(entry.text, key, level=entry.level)
+
+    def page_hook(self, outline):
+        def on_page(canv, page):
+            for entry in outline:
+                if entry.page == page:
+                    self.add(canv, entry)
+        return on_page
+
+
+def pdf_timestamp(now):
+    """Seconds since the epoch that ``pin_timestamp`` writes for ``now`` (naive times are UTC)."""
+    return now.timestamp() if now.tzinfo else calendar.timegm(now.timetuple())
+
+
+def pin_timestamp(canv, now):
+    """Stamp ``canv``'s creation and modification dates with ``now`` (naive times are UTC)."""
+    from reportlab.pdfbase.pdfdoc import TimeStamp
+
+    stamp = TimeStamp(invariant=1)
+    stamp.t = pdf_timestamp(now)
+    stamp.lt = time.gmtime(stamp.t)
+    stamp.YMDhms = tuple(stamp.lt)[:6]
+    canv._doc._timeStamp = stamp
+
+
+def build_story(document, theme=None, context=None):
+    """Flowables for the whole document, sections separated by page breaks."""
+    from reportlab.platypus import PageBreak
+
+    theme = theme or get_theme()
+    context = context or render_context()
+    story = []
+    for index, section in enumerate(document.sections):
+        if index:
+            story.append(PageBreak())
+        story.extend(section_flowables(section, theme, context))
+    return story
+
+
+def lay_out_remote(sections, keys, theme_name, context, pagesize, markup_cache=True):
+    """Lay sections out in a worker process.
+
+    Paragraph markup goes through the worker's own ``markup.default_cache``
+    unless ``markup_cache`` is False.  Returns ``(layout, portable, story
+    seconds, layout seconds)`` for each section.
+    """
+    theme = get_theme(theme_name)
+    markup_cache = None if markup_cache else False
+    results = []
+    for section, key in zip(sections, keys):
+        start = time.perf_counter()
+        flowables = section_flowables(section, theme, context, markup_cache=markup_cache)
+        built = time.perf_counter()
+        result, portable = layout.lay_out_section(flowables, key, pagesize, MARGINS)
+        results.append((result, portable, built - start, time.perf_counter() - built))
+    return results
+
+
+def _layout_pool(workers, theme, jobs):
+    """``(executor, number of workers)`` for laying out ``jobs`` sections, or ``(None, 0)``."""
+    if not workers or jobs < 2:
+        return None, 0
+    try:
+        # workers look the theme up by name, so it has to be the registered one
+        if get_theme(theme.name) is not theme:
+            return None, 0
+    except KeyError:
+        return None, 0
+    if hasattr(workers, "submit"):
+        # an executor does not tell its size; batch for the machine instead
+        return workers, os.cpu_count() or 1
+    if workers < 2:
+        return None, 0
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = min(workers, jobs)
+    return ProcessPoolExecutor(size), size
+
+
+def lay_out_document(document, pagesize=A4, context=None, section_cache=None, theme=None, trace=None,
+                     markup_cache=None, workers=None):
+    """Lay every section of ``document`` out and return a ``DocumentLayout``.
+
+    This is ``render_pdf`` up to the point where pages are written; see
+    there for the arguments.  ``trace`` must already be started.
+    """
+    cache = layout.default_cache if section_cache is None else section_cache
+    markup_cache = markup.default_cache if markup_cache is None else markup_cache
+    theme = theme or get_theme()
+    context = context or render_context()
+    geometry = (tuple(pagesize), sorted(MARGINS.items()))
+    reused, laid_out = [], []
+    timings = {"story": 0.0, "layout": 0.0, "write": 0.0}
+    clock = time.perf_counter
+
+    def cached_layout(section, key, start):
+        cached = cache.get(key) if cache else None
+        if cached is None:
+            return None
+        reused.append(section.id)
+        if trace is not None:
+            trace.add_section(section.id, clock() - start, len(cached.pages), cached=True)
+        return cached, True
+
+    def laid_out_section(section, result, portable, seconds):
+        if trace is not None:
+            trace.add_section(section.id, seconds, len(result.pages))
+        if cache and portable:
+            cache.put(result)
+        laid_out.append(section.id)
+        return result, portable
+
+    def lay_out_here(section, key, entries, start):
+        flowables = section_flowables(section, theme, context, entries or (), markup_cache)
+        if trace is not None:
+            trace.instrument(flowables)
+        built = clock()
+        result, portable = layout.lay_out_section(flowables, key, pagesize, MARGINS)
+        timings["story"] += built - start
+        timings["layout"] += clock() - built
+        return laid_out_section(section, result, portable, clock() - start)
+
+    def lay_out(section, entries=None):
+        start = clock()
+        key = layout.section_key(section, theme.digest, geometry, context, entries)
+        return cached_layout(section, key, start) or lay_out_here(section, key, entries, start)
+
+    # Pass one: every section without a TOC.  They are independent of each
+    # other, so the uncached ones can be laid out side by side.
+    sections = document.sections
+    layouts = [None] * len(sections)
+    misses = []
+    for index, section in enumerate(sections):
+        if not has_toc(section):
+            key = layout.section_key(section, theme.digest, geometry, context)
+            layouts[index] = cached_layout(section, key, clock())
+            if layouts[index] is None:
+                misses.append((index, key))
+    pool, size = _layout_pool(workers, theme, len(misses))
+    if pool is None:
+        for index, key in misses:
+            layouts[index] = lay_out_here(sections[index], key, None, clock())
+    else:
+        # A few batches per worker: enough to balance the load, few enough
+        # that process round trips stay negligible.
+        batch = -(-len(misses) // (size * 4))
+        batches = [misses[i:i + batch] for i in range(0, len(misses), batch)]
+        try:
+            futures = [pool.submit(lay_out_remote, [sections[index] for index, _ in jobs],
+                                   [key for _, key in jobs], theme.name, context, pagesize,
+                                   bool(markup_cache))
+                       for jobs in batches]
+            for jobs, future in zip(batches, futures):
+                for (index, _), (result, portable, story_seconds, layout_seconds) in zip(jobs, future.result()):
+                    timings["story"] += story_seconds
+                    timings["layout"] += layout_seconds
+                    layouts[index] = laid_out_section(sections[index], result, portable,
+                                                      story_seconds + layout_seconds)
+        finally:
+            if size and not hasattr(workers, "submit"):
+                pool.shutdown()
+
+    # Pass two: the TOC sections, starting from a guess of their own length.
+    toc_pages = dict((index, 1) for index, section in enumerate(sections) if has_toc(section))
+    entries = ()
+    for _ in range(MAX_TOC_PASSES):
+        entries = toc_entries(document, layouts, toc_pages)
+        for index in toc_pages:
+            layouts[index] = lay_out(sections[index], entries)
+        actual = dict((index, len(layouts[index][0].pages)) for index in toc_pages)
+        if actual == toc_pages:
+            break
+        toc_pages = actual
+    return DocumentLayout(layouts, entries, reused, laid_out, timings)
+
+
+def render_pdf(document, filename=None, pagesize=A4, now=None, section_cache=None, stats=None,
+               theme=None, trace=None, markup_cache=None, optimize=False, reproducible=False,
+               workers=None):
+    """Render ``document`` to a PDF file and return its path.
+
+    ``filename`` may also be a writable binary stream (an HTTP response, a
+    pipe, ``io.BytesIO``...); the finished PDF is written to it in one call
+    and the stream is returned.
+
+    Every section is laid out ahead of writing, reusing layouts cached by
+    ``section_cache`` (the process-wide cache backed by the disk cache by
+    default, pass False to disable) for sections whose content, styles and
+    geometry are unchanged.  The page counts this yields fill in the table of
+    contents, so only the TOC section is flowed a second time - and only when
+    its entries changed.  If ``stats`` is a dict it receives the ids of the
+    sections that were ``reused`` and ``laid_out``, the number of ``pages``
+    and the seconds spent in each phase under ``timings``: building flowables
+    (``story``), laying them out (``layout``) and stitching and saving the
+    file (``write``).  Pass a ``trace.Trace`` as ``trace`` for per-section and
+    per-flowable timings.  Paragraph markup is parsed through ``markup_cache``
+    (see ``section_flowables``), which is saved once the file is written.
+    With ``optimize`` the finished file is recompressed, deduplicated and,
+    when ``qpdf`` is installed, linearized (see ``roadmap.optimize``).
+    With ``reproducible`` the output depends only on the inputs: the dates
+    come from ``now`` (see ``content.reproducible_now``), and the document
+    ID, producer and metadata dates are fixed, so identical inputs give
+    identical bytes.
+
+    ``workers`` lays the sections that are not cached out in parallel: a
+    number of processes to start for this render, or an existing
+    ``concurrent.futures`` executor to reuse.  Each section goes onto its
+    own scratch canvas as usual and the recorded pages are stitched in
+    order, so page numbers, the outline and the shared fonts come out
+    exactly as in a serial render.  Sections laid out in a worker are
+    traced per section but not per flowable, and ``timings`` then add up
+    the workers' time rather than wall time.
+    """
+    filename = filename or document.filename
+    markup_cache = markup.default_cache if markup_cache is None else markup_cache
+    theme = theme or get_theme()
+    if reproducible:
+        now = reproducible_now(now)
+    context = render_context(now)
+    clock = time.perf_counter
+    trace = tracing.active(trace)
+    if trace is not None:
+        trace.start()
+    pages = 0
+    try:
+        layouts, entries, reused, laid_out, timings = lay_out_document(
+            document, pagesize, context, section_cache, theme, trace, markup_cache, workers)
+
+        start = clock()
+        target = io.BytesIO() if optimize else filename
+        canv = layout.RecordingCanvas(target, pagesize=pagesize, invariant=1 if reproducible else None)
+        if reproducible:
+            pin_timestamp(canv, now)
+            canv.setProducer(PRODUCER)
+            canv.setCreator(PRODUCER)
+        canv.setTitle(document.title)
+        canv.showOutline()
+        bookmarks = _Bookmarks()
+        for section, (result, portable) in zip(document.sections, layouts):
+            if portable:
+                canv.replay(result, on_page=bookmarks.page_hook(result.outline))
+            else:
+                flowables = section_flowables(section, theme, context, entries, markup_cache)
+                if trace is not None:
+                    trace.instrument(flowables)
+                layout.lay_out_section(flowables, result.key, pagesize, MARGINS,
+                                       canv=canv, on_heading=bookmarks.add)
+        pages = canv.getPageNumber() - 1
+        canv.save()
+        if optimize:
+            from .optimize import write_optimized
+
+            write_optimized(target.getvalue(), filename)
+        timings["write"] += clock() - start
+        if markup_cache:
+            markup_cache.save()
+    finally:
+        # Stops the profiler's sampler thread even when the render fails.
+        if trace is not None:
+            trace.finish(pages)
+
+    if stats is not None:
+        stats["reused"] = reused
+        stats["laid_out"] = laid_out
+        stats["pages"] = pages
+        stats["timings"] = timings
+    return filename
@@ -0,0 +1,365 @@
+"""Database schema model parsed from the SQL migrations.
+
+``load_schema`` reads the ``CREATE TABLE``, ``CREATE INDEX`` and ``ALTER
+TABLE`` statements of the migration scripts (``scripts/*.sql``) and merges
+them, in file order, into a ``Schema``: every table with its columns,
+indexes, row level security and the files that define it.  ``schema``
+blocks in the content spec render it, so the roadmap's table lists always
+match the migrations.  Function bodies, policies, triggers and data
+statements are skipped.
+
+Each file's parse is cached, in the process and in the cache directory.
+An entry is reused without reading the file while its modification time
+and size are unchanged, and without parsing it again while the hash of
+its contents is.
+"""
+import glob
+import hashlib
+import os
+import re
+from collections import OrderedDict, namedtuple
+
+from .cache import cache_dir, dump_pickle, load_pickle, prune, touch
+
+# Bump whenever the parser's output changes so stale caches are ignored.
+SCHEMA_VERSION = 1
+
+# Parsed migration files kept on disk; the least recently used beyond this are removed.
+MAX_STORED_FILES = 256
+
+# Relative migration paths and patterns are resolved against the scripts directory.
+SQL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FILES = ("[0-9][0-9]-*.sql", "setup-database.sql")
+
+Column = namedtuple("Column", "name type primary_key not_null unique references")
+Index = namedtuple("Index", "name table columns unique")
+
+# Comments are dropped; string literals and dollar-quoted bodies are kept
+# whole so a semicolon inside them does not end the statement.
+_TOKEN = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\$(\w*)\$.*?\$\1\$|;", re.S)
+_NAME = r'((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)'
+_CREATE_TABLE = re.compile(r"CREATE\s+(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMP|TEMPORARY|UNLOGGED)\s+)?TABLE\s+"
+                           r"(?:IF\s+NOT\s+EXISTS\s+)?" + _NAME + r"\s*\((.*)\)", re.I | re.S)
+_CREATE_INDEX = re.compile(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+                           r"(\w+)\s+ON\s+(?:ONLY\s+)?" + _NAME + r"\s*(?:USING\s+\w+\s*)?\((.*)\)", re.I | re.S)
+_ALTER_TABLE = re.compile(r"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?" + _NAME + r"\s+(.*)", re.I | re.S)
+_COLUMN_CONSTRAINT = re.compile(r"\b(?:CONSTRAINT|PRIMARY\s+KEY|NOT\s+NULL|NULL|UNIQUE|DEFAULT|REFERENCES|"
+                                r"CHECK|GENERATED|COLLATE)\b", re.I)
+_TABLE_CONSTRAINT = re.compile(r"(?:CONSTRAINT\s+\S+\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK|EXCLUDE)\b"
+                               r"\s*(?:\(([^)]*)\))?(?:.*?\bREFERENCES\s+" + _NAME + r")?", re.I | re.S)
+_REFERENCES = re.compile(r"\bREFERENCES\s+" + _NAME, re.I)
+
+
+def _unquote(name):
+    """Table or column name without quotes and without the default ``public`` schema."""
+    name = name.replace('"', "")
+    return name[len("public."):] if name.lower().startswith("public.") else name
+
+
+def statements(sql):
+    """Split ``sql`` into statements with comments removed."""
+    parts = []
+    current = []
+    pos = 0
+    for match in _TOKEN.finditer(sql):
+        current.append(sql[pos:match.start()])
+        token = match.group(0)
+        if token == ";":
+            parts.append("".join(current))
+            current = []
+        elif not token.startswith(("--", "/*")):
+            current.append(token)
+        pos = match.end()
+    current.append(sql[pos:])
+    parts.append("".join(current))
+    return [" ".join(part.split()) for part in parts if part.strip()]
+
+
+def _split(text):
+    """Split on the commas that are not inside parentheses or quotes."""
+    items, depth, start, quote = [], 0, 0, False
+    for i, char in enumerate(text):
+        if char == "'":
+            quote = not quote
+        elif quote:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(text[start:i].strip())
+            start = i + 1
+    items.append(text[start:].strip())
+    return [item for item in items if item]
+
+
+def _column(definition):
+    name, _, rest = definition.partition(" ")
+    match = _COLUMN_CONSTRAINT.search(rest)
+    column_type = (rest[:match.start()] if match else rest).strip().upper()
+    constraints = rest[match.start():].upper() if match else ""
+    references = _REFERENCES.search(rest)
+    return Column(_unquote(name), column_type, "PRIMARY KEY" in constraints,
+                  "NOT NULL" in constraints or "PRIMARY KEY" in constraints,
+                  bool(re.search(r"\bUNIQUE\b", constraints)),
+                  _unquote(references.group(1)) if references else None)
+
+
+def _table_constraint(item):
+    """``(kind, columns, referenced table)`` for a table constraint, or None for a column."""
+    match = _TABLE_CONSTRAINT.match(item)
+    if match is None:
+        return None
+    columns = tuple(_unquote(c.strip()) for c in (match.group(2) or "").split(",") if c.strip())
+    return " ".join(match.group(1).upper().split()), columns, match.group(3) and _unquote(match.group(3))
+
+
+def parse_sql(sql):
+    """The schema operations in ``sql``, in order, as plain tuples:
+
+    ``("table", name, (Column, ...))``, ``("column", table, Column)``,
+    ``("drop_column", table, name)``, ``("not_null", table, column, flag)``,
+    ``("index", Index)`` and ``("rls", table)``.
+    """
+    ops = []
+    for statement in statements(sql):
+        head = statement[:40].upper()
+        if head.startswith("CREATE") and " TABLE " in head + " ":
+            match = _CREATE_TABLE.match(statement)
+            if match is None:
+                continue
+            columns = OrderedDict()
+            constraints = []
+            for item in _split(match.group(2)):
+                constraint = _table_constraint(item)
+                if constraint is None:
+                    column = _column(item)
+                    columns[column.name] = column
+                else:
+                    constraints.append(constraint)
+            for kind, names, target in constraints:
+                for name in names:
+                    column = columns.get(name)
+                    if column is None:
+                        continue
+                    if kind == "PRIMARY KEY":
+                        columns[name] = column._replace(primary_key=True, not_null=True)
+                    elif kind == "UNIQUE" and len(names) == 1:
+                        columns[name] = column._replace(unique=True)
+                    elif kind == "FOREIGN KEY" and target:
+                        columns[name] = column._replace(references=target)
+            ops.append(("table", _unquote(match.group(1)), tuple(columns.values())))
+        elif head.startswith("CREATE") and "INDEX" in head:
+            match = _CREATE_INDEX.match(statement)
+            if match is not None:
+                ops.append(("index", Index(match.group(2), _unquote(match.group(3)),
+                                           tuple(" ".join(c.split()) for c in _split(match.group(4))),
+                                           bool(match.group(1)))))
+        elif head.startswith("ALTER TABLE"):
+            match = _ALTER_TABLE.match(statement)
+            if match is not None:
+                ops.extend(_alter(_unquote(match.group(1)), match.group(2)))
+    return ops
+
+
+def _alter(table, actions):
+    for action in _split(actions):
+        upper = action.upper()
+        if upper.startswith("ENABLE ROW LEVEL SECURITY"):
+            yield ("rls", table)
+        elif upper.startswith("ADD"):
+            rest = re.sub(r"^ADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?", "", action, flags=re.I)
+            if rest == action[3:].strip() and _table_constraint(rest) is not None:
+                continue
+            yield ("column", table, _column(rest))
+        elif upper.startswith("DROP COLUMN"):
+            rest = re.sub(r"^DROP\s+COLUMN\s+(?:IF\s+EXISTS\s+)?", "", action, flags=re.I)
+            yield ("drop_column", table, _unquote(rest.split()[0]))
+        elif upper.startswith("ALTER COLUMN"):
+            match = re.match(r"ALTER\s+COLUMN\s+(\S+)\s+(SET|DROP)\s+NOT\s+NULL", action, re.I)
+            if match:
+                yield ("not_null", table, _unquote(match.group(1)), match.group(2).upper() == "SET")
+
+
+class TableInfo(object):
+    """One table of a ``Schema``."""
+
+    __slots__ = ("name", "columns", "indexes", "rls", "sources")
+
+    def __init__(self, name):
+        self.name = name
+        self.columns = OrderedDict()
+        self.indexes = []
+        self.rls = False
+        self.sources = []
+
+
+class Schema(object):
+    """Tables defined by a set of migration files, in the order they are created."""
+
+    def __init__(self, files, digest):
+        self.files = files
+        self.digest = digest
+        self.tables = OrderedDict()
+
+    def _source(self, table, path):
+        info = self.tables.get(table)
+        if info is not None and path not in info.sources:
+            info.sources.append(path)
+        return info
+
+    def apply(self, ops, path):
+        """Merge one file's parse into the schema."""
+        name = os.path.basename(path)
+        for op in ops:
+            kind = op[0]
+            if kind == "table":
+                info = self.tables.get(op[1])
+                if info is None:
+                    info = self.tables[op[1]] = TableInfo(op[1])
+                self._source(op[1], name)
+                for column in op[2]:
+                    info.columns.setdefault(column.name, column)
+                continue
+            table = op[1].table if kind == "index" else op[1]
+            info = self._source(table, name)
+            if info is None:
+                continue  # a table created elsewhere, such as auth.users
+            if kind == "column":
+                info.columns.setdefault(op[2].name, op[2])
+            elif kind == "drop_column":
+                info.columns.pop(op[2], None)
+            elif kind == "not_null" and op[2] in info.columns:
+                info.columns[op[2]] = info.columns[op[2]]._replace(not_null=op[3])
+            elif kind == "index" and all(index.name != op[1].name for index in info.indexes):
+                info.indexes.append(op[1])
+            elif kind == "rls":
+                info.rls = True
+
+
+_parsed = {}
+
+
+def parse_file(path, use_cache=True):
+    """``(content digest, operations)`` for one SQL file, reusing cached parses."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _parsed.get(path) if use_cache else None
+    if entry is not None and entry[0] == stamp:
+        return entry[1], entry[2]
+    cached = os.path.join(cache_dir("schema"), hashlib.sha256(os.path.abspath(path).encode("utf8")).hexdigest()
+                          + ".pickle")
+    if use_cache and entry is None:
+        entry = load_pickle(cached)
+        if not (isinstance(entry, tuple) and len(entry) == 3):
+            entry = None
+        elif entry[0] == stamp:
+            touch(cached)
+            _parsed[path] = entry
+            return entry[1], entry[2]
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    digest = hashlib.sha256(b"roadmap-schema-%d\0" % SCHEMA_VERSION + raw).hexdigest()
+    if entry is not None and entry[1] == digest:
+        ops = entry[2]  # touched, not changed
+    else:
+        ops = parse_sql(raw.decode("utf-8"))
+    entry = (stamp, digest, ops)
+    if use_cache:
+        _parsed[path] = entry
+        if dump_pickle(cached, entry):
+            prune(cache_dir("schema"), MAX_STORED_FILES)
+    return digest, ops
+
+
+def is_migration_pattern(pattern):
+    """Whether ``pattern`` can only match ``.sql`` files under ``SQL_DIR``."""
+    parts = pattern.replace("\\", "/").split("/")
+    return (not os.path.isabs(pattern) and not os.path.splitdrive(pattern)[0] and ".." not in parts
+            and pattern.endswith(".sql"))
+
+
+def source_files(patterns=DEFAULT_FILES):
+    """Migration files matched by ``patterns``, in pattern order then name order, each once.
+
+    Patterns that could reach outside ``SQL_DIR``, and matches that do
+    (through a symlink), are skipped.
+    """
+    root = os.path.realpath(SQL_DIR) + os.sep
+    files = []
+    for pattern in patterns or DEFAULT_FILES:
+        if not is_migration_pattern(pattern):
+            continue
+        for path in sorted(glob.glob(os.path.join(SQL_DIR, pattern))):
+            if path not in files and os.path.realpath(path).startswith(root):
+                files.append(path)
+    return files
+
+
+def load_schema(patterns=DEFAULT_FILES, use_cache=True):
+    """The ``Schema`` defined by the migration files matching ``patterns``."""
+    files = source_files(patterns)
+    parsed = [(path, parse_file(path, use_cache)) for path in files]
+    digest = hashlib.sha256("\n".join("%s %s" % (os.path.basename(path), file_digest)
+                                      for path, (file_digest, _) in parsed).encode("utf8")).hexdigest()
+    schema = Schema(tuple(files), digest)
+    for path, (_, ops) in parsed:
+        schema.apply(ops, path)
+    return schema
+
+
+def blocks_digest(blocks):
+    """Digest of the migrations behind the ``schema`` blocks in ``blocks`` ("" if there are none)."""
+    digests = [load_schema(block[3]).digest for block in blocks if block[0] == "schema"]
+    return hashlib.sha256(" ".join(digests).encode("ascii")).hexdigest() if digests else ""
+
+
+def document_digest(document):
+    """``blocks_digest`` over every section of ``document``."""
+    return blocks_digest([block for section in document.sections for block in section.blocks])
+
+
+def document_files(document):
+    """Every migration file read by ``document``'s ``schema`` blocks."""
+    files = []
+    for section in document.sections:
+        for block in section.blocks:
+            if block[0] == "schema":
+                files.extend(path for path in source_files(block[3]) if path not in files)
+    return files
+
+
+def column_notes(column):
+    notes = []
+    if column.primary_key:
+        notes.append("primary key")
+    elif column.not_null:
+        notes.append("not null")
+    if column.unique:
+        notes.append("unique")
+    if column.references:
+        notes.append("references %s" % column.references)
+    return ", ".join(notes)
+
+
+def table_summary(info, description=None):
+    """``name: description (n columns, m indexes)`` for a table list."""
+    counts = "%d column%s" % (len(info.columns), "" if len(info.columns) == 1 else "s")
+    if info.indexes:
+        counts += ", %d index%s" % (len(info.indexes), "" if len(info.indexes) == 1 else "es")
+    return "%s: %s (%s)" % (info.name, description, counts) if description else "%s: %s" % (info.name, counts)
+
+
+def index_summary(info):
+    """``Indexes: name (columns), ...`` for one table, or None."""
+    if not info.indexes:
+        return None
+    return "Indexes: " + ", ".join("%s%s (%s)" % (index.name, " unique" if index.unique else "",
+                                                 ", ".join(index.columns)) for index in info.indexes)
+
+
+def table_heading(info):
+    """``name - defined in a.sql, b.sql; row level security``."""
+    text = "%s - defined in %s" % (info.name, ", ".join(info.sources))
+    return text + "; row level security" if info.rls else text
@@ -0,0 +1,414 @@
+"""Long-running render service for the web app.
+
+Spawning the generator per request pays for the interpreter, the reportlab
+import and the theme build every time.  This service pays them once: it
+keeps a pool of worker processes that have already imported reportlab,
+built the theme and rendered the roadmap once (which fills the layout and
+markup caches), and hands them JSON render jobs over a small HTTP/1.1
+interface on a Unix socket or a localhost port.
+
+    POST /render    {"format": "pdf", "page_size": "A4", "spec": {...},
+                     "now": "2025-01-31T00:00:00", "timeout": 10}
+                    -> the rendered document; every field is optional
+                    {"format": "png", "page": 1, "width": 200, ...}
+                    -> a thumbnail of one page (see ``roadmap.thumbnail``)
+    GET  /health    -> {"status": "ok", ...}
+    GET  /metrics   -> request counters and latency percentiles
+
+Jobs wait in a bounded queue; when it is full the service answers 503 with
+``Retry-After`` instead of queueing without limit.  A job that runs past its
+timeout is answered with 504.  Its worker cannot be interrupted, so it stays
+busy until that job finishes and keeps counting against capacity.
+
+Run from the ``scripts`` directory:
+
+    python -m roadmap.server --socket /tmp/roadmap.sock
+    python -m roadmap.server --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+PAGE_SIZES = ("A4", "letter")
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "md": "text/markdown; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "png": "image/png",
+}
+
+MAX_BODY = 1 << 20
+MAX_HEADER_LINES = 100
+DEFAULT_TIMEOUT = 30.0
+
+# Latencies kept for the percentiles reported by /metrics.
+LATENCY_WINDOW = 2048
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+class JobError(ValueError):
+    """A render job was rejected; carries the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        ValueError.__init__(self, message)
+        self.status = status
+
+
+# Per-process state set up once by ``_init_worker``.
+_worker = {}
+
+
+def _init_worker():
+    import reportlab.platypus  # noqa: F401
+
+    from .content import load_document
+    from .outputs import render_bytes
+    from .theme import get_theme
+
+    get_theme()
+    render_bytes(load_document())
+
+
+def render_job(job):
+    """Render one validated job in a warm worker and return the document bytes."""
+    from reportlab.lib import pagesizes
+
+    from .content import compile_spec, load_document
+    from .layout import SectionCache
+    from .outputs import render_bytes
+
+    fmt = job.get("format", "pdf")
+    options = {}
+    if fmt in ("pdf", "png"):
+        options["pagesize"] = getattr(pagesizes, job.get("page_size", "A4"))
+    if job.get("spec") is not None:
+        # Every client spec is different: caching them would only grow the
+        # worker's memory and the disk cache with each request.
+        document = compile_spec(json.dumps(job["spec"], sort_keys=True).encode("utf8"), use_cache=False)
+        if fmt in ("pdf", "png"):
+            options["section_cache"] = SectionCache(persist=False)
+    else:
+        document = load_document()
+    now = datetime.fromisoformat(job["now"]) if job.get("now") else None
+    if fmt == "png":
+        from .thumbnail import DEFAULT_WIDTH, thumbnail
+
+        return thumbnail(document, job.get("page", 1), job.get("width", DEFAULT_WIDTH), now, **options)
+    return render_bytes(document, fmt, now=now, **options)
+
+
+def validate_job(job):
+    """Check a decoded job in the server process, so bad requests never reach a worker."""
+    if not isinstance(job, dict):
+        raise JobError(400, "job must be a JSON object")
+    unknown = set(job) - {"format", "page_size", "spec", "now", "timeout", "page", "width"}
+    if unknown:
+        raise JobError(400, "unknown job fields: %s" % ", ".join(sorted(unknown)))
+    if job.get("format", "pdf") not in CONTENT_TYPES:
+        raise JobError(400, "format must be one of %s" % ", ".join(CONTENT_TYPES))
+    if job.get("page_size", "A4") not in PAGE_SIZES:
+        raise JobError(400, "page_size must be one of %s" % ", ".join(PAGE_SIZES))
+    from .thumbnail import MAX_WIDTH
+
+    for field, limit in (("page", None), ("width", MAX_WIDTH)):
+        value = job.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1
+                                  or (limit and value > limit)):
+            raise JobError(400, "%s must be a positive integer%s" % (field, " up to %d" % limit if limit else ""))
+    if job.get("spec") is not None and not isinstance(job["spec"], dict):
+        raise JobError(400, "spec must be a JSON object")
+    if job.get("now") is not None:
+        try:
+            datetime.fromisoformat(job["now"])
+        except (TypeError, ValueError):
+            raise JobError(400, "now must be an ISO 8601 timestamp") from None
+    timeout = job.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                or timeout <= 0):
+        raise JobError(400, "timeout must be a positive number of seconds")
+    return job
+
+
+class Metrics(object):
+    """Request counters and a sliding window of render latencies."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.counts = dict.fromkeys(("requests", "completed", "failed", "rejected", "timeouts", "restarts"), 0)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def percentiles(self):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {}
+        pick = lambda q: round(1000.0 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+        return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+                "max_ms": round(1000.0 * ordered[-1], 2)}
+
+    def to_dict(self):
+        data = dict(self.counts)
+        data["uptime_seconds"] = round(time.time() - self.started, 1)
+        data["latency"] = self.percentiles()
+        return data
+
+
+class RenderService(object):
+    """Queue, warm worker pool and HTTP front end; see the module docstring."""
+
+    def __init__(self, workers=None, queue_size=64, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.metrics = Metrics()
+        self.queue = asyncio.Queue(queue_size)
+        self.busy = 0
+        self._pool = None
+        self._dispatchers = []
+
+    async def start(self):
+        await self._start_pool()
+        self._dispatchers = [asyncio.ensure_future(self._dispatch()) for _ in range(self.workers)]
+
+    async def _start_pool(self):
+        loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        # Start every worker now so the first request does not pay for it.
+        await asyncio.gather(*[loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)])
+
+    async def _replace_pool(self, broken):
+        """Start a new pool after a worker died, unless another dispatcher already did."""
+        if self._pool is not broken:
+            return
+        self.metrics.counts["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            await self._start_pool()
+        except BrokenProcessPool:
+            pass  # the next job finds it broken and tries again
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, reply = await self.queue.get()
+            self.busy += 1
+            pool = self._pool
+            try:
+                try:
+                    running = loop.run_in_executor(pool, render_job, job)
+                    result = await asyncio.wait_for(asyncio.shield(running), job.get("timeout") or self.timeout)
+                except asyncio.TimeoutError:
+                    if not reply.done():
+                        reply.set_exception(JobError(504, "render timed out"))
+                    # The worker is still busy; wait for it before taking another job.
+                    await asyncio.gather(running, return_exceptions=True)
+                    continue
+                except BrokenProcessPool:
+                    if not reply.done():
+                        reply.set_exception(JobError(500, "render worker died; restarting the pool"))
+                    await self._replace_pool(pool)
+                    continue
+                except Exception as exc:
+                    if not reply.done():
+                        reply.set_exception(exc)
+                    continue
+                if not reply.done():
+                    reply.set_result(result)
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+
+    async def submit(self, job):
+        """Queue a validated job and wait for its bytes; raises ``JobError`` when full or late."""
+        reply = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((job, reply))
+        except asyncio.QueueFull:
+            raise JobError(503, "render queue is full") from None
+        return await reply
+
+    def health(self):
+        return {"status": "ok", "workers": self.workers, "busy": self.busy,
+                "queued": self.queue.qsize(), "queue_size": self.queue.maxsize}
+
+    async def handle(self, method, path, body):
+        """Answer one request with ``(status, content type, body bytes, extra headers)``."""
+        if path == "/health":
+            return 200, "application/json", _json(self.health()), ()
+        if path == "/metrics":
+            data = self.metrics.to_dict()
+            data.update(self.health())
+            return 200, "application/json", _json(data), ()
+        if path != "/render":
+            return 404, "application/json", _json({"error": "not found"}), ()
+        if method != "POST":
+            return 405, "application/json", _json({"error": "use POST"}), (("Allow", "POST"),)
+
+        metrics = self.metrics
+        metrics.counts["requests"] += 1
+        start = time.perf_counter()
+        try:
+            try:
+                job = validate_job(json.loads(body.decode("utf8") or "{}"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+                raise JobError(400, "invalid JSON: %s" % exc) from None
+            data = await self.submit(job)
+        except JobError as exc:
+            if exc.status == 503:
+                metrics.counts["rejected"] += 1
+                extra = (("Retry-After", "1"),)
+            else:
+                metrics.counts["timeouts" if exc.status == 504 else "failed"] += 1
+                extra = ()
+            return exc.status, "application/json", _json({"error": str(exc)}), extra
+        except ValueError as exc:
+            # ContentError and friends: the spec itself is invalid
+            metrics.counts["failed"] += 1
+            return 422, "application/json", _json({"error": str(exc)}), ()
+        except Exception as exc:
+            metrics.counts["failed"] += 1
+            return 500, "application/json", _json({"error": "%s: %s" % (type(exc).__name__, exc)}), ()
+        metrics.counts["completed"] += 1
+        metrics.latencies.append(time.perf_counter() - start)
+        return 200, CONTENT_TYPES[job.get("format", "pdf")], data, ()
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body, error = request
+                if error is not None:
+                    status, content_type, payload, extra = error, "application/json", \
+                        _json({"error": REASONS[error]}), ()
+                    keep_alive = False
+                else:
+                    status, content_type, payload, extra = await self.handle(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, content_type, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _json(data):
+    return json.dumps(data, sort_keys=True).encode("utf8")
+
+
+async def _read_request(reader):
+    """``(method, path, headers, body, error status)``, or None once the client is gone."""
+    try:
+        return await _read_request_lines(reader)
+    except ValueError:
+        # a request or header line longer than the stream's buffer limit
+        return None, None, {}, b"", 400
+
+
+async def _read_request_lines(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin1").split()
+    if len(parts) != 3:
+        return None, None, {}, b"", 400
+    method, path = parts[0].upper(), parts[1].split("?", 1)[0]
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        return method, path, headers, b"", 400
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        return method, path, headers, b"", 400
+    if length < 0 or length > MAX_BODY:
+        return method, path, headers, b"", 413
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body, None
+
+
+def _write_response(writer, status, content_type, payload, extra, keep_alive):
+    head = ["HTTP/1.1 %d %s" % (status, REASONS.get(status, "")),
+            "Content-Type: %s" % content_type,
+            "Content-Length: %d" % len(payload),
+            "Connection: %s" % ("keep-alive" if keep_alive else "close")]
+    head.extend("%s: %s" % header for header in extra)
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin1"))
+    writer.write(payload)
+
+
+async def serve(socket_path=None, host="127.0.0.1", port=8765, workers=None, queue_size=64,
+                timeout=DEFAULT_TIMEOUT, ready=None):
+    """Run the service until SIGINT or SIGTERM."""
+    service = RenderService(workers, queue_size, timeout)
+    await service.start()
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(service.serve_connection, path=socket_path)
+        where = socket_path
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        where = "http://%s:%d" % (host, port)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    sys.stderr.write("Render service on %s with %d warm workers\n" % (where, service.workers))
+    if ready is not None:
+        ready(service)
+    try:
+        await stopping.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve roadmap renders from a pool of warm workers.")
+    parser.add_argument("--socket", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="jobs that may wait for a worker before requests get 503 (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="default per-job timeout in seconds (default: %(default)s)")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.socket, args.host, args.port, args.workers, args.queue_size, args.timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Read-only access to marketplace data snapshots.
+
+A snapshot is either a SQLite database or a directory holding one
+``<table>.csv`` file per table, both following the schema in
+``scripts/01-create-tables.sql`` and ``scripts/05-order-tracking.sql``.
+Rows are always yielded lazily so callers can stream tables of any size.
+"""
+import csv
+import os
+import pathlib
+import re
+import sqlite3
+from collections import namedtuple
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SnapshotError(ValueError):
+    """Raised for a missing table or column, or an unreadable snapshot."""
+
+
+class Subquery(namedtuple("Subquery", "table column where")):
+    """A ``where`` value matching the ``column`` values of the ``table`` rows that pass ``where``.
+
+    ``{"order_id": Subquery("orders", "id", {"freelancer_id": f})}`` selects
+    the rows of one freelancer's orders.  SQLite evaluates it as a nested
+    ``SELECT``; a CSV snapshot collects the matching values in a set.
+    """
+
+
+def _check_identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise SnapshotError("invalid table or column name %r" % name)
+    return name
+
+
+def _members(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return frozenset(str(v) for v in value)
+    return frozenset((str(value),))
+
+
+class Snapshot(object):
+    """A SQLite file or a directory of CSV exports."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        if os.path.isdir(path):
+            self.kind = "csv"
+        elif os.path.isfile(path):
+            self.kind = "sqlite"
+            # A URI escapes "?", "#" and "%" in the path, which would otherwise end it early.
+            self._conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        else:
+            raise SnapshotError("snapshot %r does not exist" % path)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def to_sqlite(self, dest, indexes=()):
+        """Copy a CSV snapshot into a SQLite file at ``dest`` and return its path.
+
+        ``indexes`` lists ``(table, column)`` pairs to index, which turns the
+        per-document lookups of a batch run from file scans into index seeks.
+        """
+        if self.kind != "csv":
+            raise SnapshotError("snapshot is already a SQLite database")
+        conn = sqlite3.connect(dest)
+        try:
+            for name in sorted(os.listdir(self.path)):
+                table, ext = os.path.splitext(name)
+                if ext != ".csv" or not _IDENTIFIER.match(table):
+                    continue
+                columns = [_check_identifier(c) for c in self.columns(table)]
+                conn.execute("CREATE TABLE %s (%s)" % (table, ", ".join(columns)))
+                conn.executemany(
+                    "INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * len(columns))),
+                    self._csv_rows(table, columns, columns, None))
+            for table, column in indexes:
+                if self.has_table(table) and column in self.columns(table):
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_%s_%s ON %s(%s)" % (
+                        table, _check_identifier(column), table, column))
+            conn.commit()
+        finally:
+            conn.close()
+        return dest
+
+    def _csv_path(self, table):
+        return os.path.join(self.path, _check_identifier(table) + ".csv")
+
+    def has_table(self, table):
+        if self.kind == "csv":
+            return os.path.isfile(self._csv_path(table))
+        row = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+            (_check_identifier(table),)).fetchone()
+        return row is not None
+
+    def columns(self, table):
+        """Column names of ``table`` in snapshot order."""
+        if not self.has_table(table):
+            raise SnapshotError("snapshot has no %r table" % table)
+        if self.kind == "csv":
+            with open(self._csv_path(table), newline="", encoding="utf-8") as fh:
+                return next(csv.reader(fh), [])
+        return [row[1] for row in self._conn.execute("PRAGMA table_info(%s)" % table)]
+
+    def rows(self, table, columns, where=None, order_by=None):
+        """Yield tuples of ``columns`` from ``table``.
+
+        ``where`` is an optional ``{column: value}`` filter; a list, tuple or
+        set value matches any of its members, and a ``Subquery`` the values
+        it selects.  ``order_by`` is a column to sort on (SQLite only; CSV
+        rows keep file order).
+        """
+        available = self._check_columns(table, columns, where)
+        if self.kind == "csv":
+            return self._csv_rows(table, available, columns, where)
+        return self._sqlite_rows(table, columns, where, order_by)
+
+    def _check_columns(self, table, columns, where):
+        available = self.columns(table)
+        for name in list(columns) + list(where or ()):
+            if name not in available:
+                raise SnapshotError("table %r has no column %r" % (table, name))
+        for value in (where or {}).values():
+            if isinstance(value, Subquery):
+                self._check_columns(value.table, [value.column], value.where)
+        return available
+
+    def distinct(self, table, column):
+        """Yield the distinct non-empty values of ``column`` in ``table``."""
+        if column not in self.columns(table):
+            raise SnapshotError("table %r has no column %r" % (table, column))
+        if self.kind == "sqlite":
+            sql = "SELECT DISTINCT %s FROM %s WHERE %s IS NOT NULL ORDER BY %s" % (
+                column, table, column, column)
+            for (value,) in self._conn.execute(sql):
+                yield value
+            return
+        seen = set()
+        for (value,) in self._csv_rows(table, self.columns(table), [column], None):
+            if value and value not in seen:
+                seen.add(value)
+                yield value
+
+    def _csv_rows(self, table, available, columns, where):
+        picks = [available.index(name) for name in columns]
+        tests = [(available.index(name), self._members(value)) for name, value in (where or {}).items()]
+        with open(self._csv_path(table), newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            next(reader, None)
+            for record in reader:
+                if len(record) < len(available):
+                    if not record:
+                        continue
+                    raise SnapshotError("%s.csv line %d: expected %d fields, got %d" % (
+                        table, reader.line_num, len(available), len(record)))
+                if all(record[i] in values for i, values in tests):
+                    yield tuple(record[i] for i in picks)
+
+    def _members(self, value):
+        if isinstance(value, Subquery):
+            return frozenset(str(row[0]) for row in self._csv_rows(
+                value.table, self.columns(value.table), [value.column], value.where))
+        return _members(value)
+
+    def _sqlite_rows(self, table, columns, where, order_by):
+        params = []
+        sql = _select(table, columns, where, params)
+        if order_by:
+            sql += " ORDER BY %s" % _check_identifier(order_by)
+        cursor = self._conn.execute(sql, params)
+        try:
+            while True:
+                batch = cursor.fetchmany(512)
+                if not batch:
+                    break
+                for row in batch:
+                    yield row
+        finally:
+            cursor.close()
+
+
+def _select(table, columns, where, params):
+    """SQL selecting ``columns`` of ``table`` filtered by ``where``; appends the bound values to ``params``."""
+    sql = "SELECT %s FROM %s" % (", ".join(_check_identifier(c) for c in columns), _check_identifier(table))
+    if where:
+        tests = []
+        for column, value in where.items():
+            if isinstance(value, Subquery):
+                tests.append("%s IN (%s)" % (_check_identifier(column),
+                                             _select(value.table, [value.column], value.where, params)))
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                value = list(value)
+                tests.append("%s IN (%s)" % (_check_identifier(column), ", ".join("?" * len(value)) or "NULL"))
+                params.extend(value)
+            else:
+                tests.append("%s = ?" % _check_identifier(column))
+                params.append(value)
+        sql += " WHERE " + " AND ".join(tests)
+    return sql
@@ -0,0 +1,285 @@
+"""Streaming render mode for very large generated documents.
+
+``render_streaming`` lays out a story supplied by an iterator instead of a
+list, so only the flowables around the current page exist at any time.
+``StreamingTable`` pulls its rows from an iterator one frame at a time and
+splits across pages with the header repeated, so a table's memory use is
+bounded by what fits on a page rather than by its row count.  Each finished
+page's content stream is compressed and written to the output as soon as the
+page is shown (``StreamingCanvas``), so the file is never assembled in memory.
+"""
+import os
+import zlib
+from array import array
+from collections import deque
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfdoc import (PDFArray, PDFFile, PDFIndirectObject, PDFName, PDFObjectReference,
+                                      PDFStream, PDFTrailer)
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, Table
+from reportlab.platypus.flowables import Flowable
+
+from .render import MARGINS
+
+# How many flowables to pull ahead of the one being laid out, so that
+# keep-with-next chains and split remainders have something to look at.
+LOOKAHEAD = 8
+
+
+class StreamedStory(object):
+    """The subset of the list API platypus uses, fed lazily from an iterator."""
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        self._buffer = deque()
+
+    def _fill(self, n):
+        buffer = self._buffer
+        while len(buffer) < n:
+            try:
+                buffer.append(next(self._source))
+            except StopIteration:
+                self._source = iter(())
+                break
+
+    def __len__(self):
+        self._fill(LOOKAHEAD)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else LOOKAHEAD)
+            return list(self._buffer)[index]
+        self._fill(index + 1)
+        return self._buffer[index]
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for _ in range(len(range(*index.indices(len(self._buffer))))):
+                self._buffer.popleft()
+        else:
+            self._fill(index + 1)
+            del self._buffer[index]
+
+    def __setitem__(self, index, items):
+        # platypus only ever does ``flowables[0:0] = split_parts``
+        if not (isinstance(index, slice) and index.start in (0, None) and index.stop == 0):
+            raise TypeError("StreamedStory only supports inserting at the front")
+        self._buffer.extendleft(reversed(list(items)))
+
+    def insert(self, index, flowable):
+        if index != 0:
+            raise TypeError("StreamedStory only supports inserting at the front")
+        self._buffer.appendleft(flowable)
+
+
+class _RowSource(object):
+    """Row iterator shared by the pieces of a split ``StreamingTable``."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.pushed = []
+
+    def take(self, n):
+        batch = self.pushed[:n]
+        del self.pushed[:n]
+        while len(batch) < n:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            batch.append(list(row))
+        return batch
+
+    def push_back(self, rows):
+        self.pushed[0:0] = rows
+
+    def more(self):
+        if not self.pushed:
+            row = next(self.rows, None)
+            if row is None:
+                return False
+            self.pushed.append(list(row))
+        return True
+
+
+class StreamingTable(Flowable):
+    """A table whose rows are pulled from an iterator one frame at a time.
+
+    It never fits as a whole; platypus asks it to split, and each split emits
+    a regular ``Table`` holding the header plus as many rows as fit in the
+    space left, followed by a fresh ``StreamingTable`` for the remaining rows.
+    """
+
+    def __init__(self, header, rows, col_widths, style, source=None, metrics=None):
+        Flowable.__init__(self)
+        self.header = list(header)
+        self.col_widths = list(col_widths)
+        self.style = style
+        self._source = source or _RowSource(rows)
+        self._metrics = metrics if metrics is not None else {}
+
+    def _table(self, rows):
+        t = Table([self.header] + rows, colWidths=self.col_widths, repeatRows=1)
+        t.setStyle(self.style)
+        return t
+
+    def _row_heights(self, availWidth, sample):
+        m = self._metrics
+        if "row" not in m:
+            header_h = self._table([]).wrap(availWidth, 1e6)[1]
+            m["header"] = header_h
+            m["row"] = max(self._table([sample]).wrap(availWidth, 1e6)[1] - header_h, 1)
+        return m["header"], m["row"]
+
+    def wrap(self, availWidth, availHeight):
+        # Always too tall, so the frame asks us to split.
+        self.width = sum(self.col_widths)
+        self.height = availHeight + 1
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        first = self._source.take(1)
+        if not first:
+            return []
+        header_h, row_h = self._row_heights(availWidth, first[0])
+        fit = int((availHeight - header_h) // row_h)
+        if fit < 1:
+            self._source.push_back(first)
+            return []
+        rows = first + self._source.take(fit - 1)
+        table = self._table(rows)
+        # Rows with wrapped or multi-line cells are taller than the sample.
+        while table.wrap(availWidth, availHeight)[1] > availHeight and len(rows) > 1:
+            cut = max(1, len(rows) // 8)
+            self._source.push_back(rows[-cut:])
+            rows = rows[:-cut]
+            table = self._table(rows)
+        parts = [table]
+        if self._source.more():
+            parts.append(StreamingTable(self.header, None, self.col_widths, self.style,
+                                        source=self._source, metrics=self._metrics))
+        return parts
+
+    def draw(self):
+        pass
+
+
+def streaming_table(header, rows, col_widths, style):
+    """A page-splitting table fed from ``rows``; a plain header-only table when empty."""
+    source = _RowSource(rows)
+    if not source.more():
+        t = Table([list(header)], colWidths=list(col_widths))
+        t.setStyle(style)
+        return t
+    return StreamingTable(header, None, col_widths, style, source=source)
+
+
+class StreamingCanvas(Canvas):
+    """Canvas that writes each page to the output as soon as the page ends.
+
+    A finished page's content stream is compressed and written, then its
+    page dictionary; the document keeps only the page's object number and
+    the offsets for the cross-reference table.  Fonts, the outline and the
+    table itself are written when the canvas is saved.
+    """
+
+    _out = None
+
+    def _output(self):
+        if self._out is None:
+            target = self._filename
+            self._own = not hasattr(target, "write")
+            self._out = PDFFile(self._doc._pdfVersion)
+            header = b"".join(self._out.strings)
+            self._file = open(target, "wb") if self._own else target
+            self._file.write(header)
+            self._out.strings = None
+            self._out.write = self._file.write
+            self._offsets = array("q")
+        return self._out
+
+    def _write(self, obj, name=None):
+        """Write ``obj`` as an indirect object now and return a reference to it."""
+        doc = self._doc
+        out = self._output()
+        name = doc.Reference(obj, name).name
+        number = doc.idToObjectNumberAndVersion[name][0]
+        _record(self._offsets, number, out.add(PDFIndirectObject(name, obj).format(doc)))
+        del doc.idToObject[name], doc.numberToId[number]
+        return PDFObjectReference(name)
+
+    def showPage(self):
+        Canvas.showPage(self)
+        doc = self._doc
+        page = doc.Pages.pages[-1]
+        stream = page.stream
+        if stream and not page.Contents:
+            if not isinstance(stream, bytes):
+                stream = stream.encode("latin1")
+            contents = PDFStream(content=zlib.compress(stream))
+            contents.dictionary["Filter"] = PDFArray([PDFName("FlateDecode")])
+            page.Contents = self._write(contents)
+            page.stream = None
+        # the page tree only needs a reference to the page from now on
+        doc.Pages.pages[-1] = self._write(page, page.__InternalName__)
+        if isinstance(page.Contents, PDFObjectReference):
+            # nothing but the page dictionary refers to its content stream
+            del doc.idToObjectNumberAndVersion[page.Contents.name]
+
+    def save(self):
+        if len(self._code):
+            self.showPage()
+        doc = self._doc
+        out = self._output()
+        # GetPDFData prepares fonts and the outline, then calls format()
+        doc.format = lambda: _write_objects(doc, out, self._offsets)
+        try:
+            doc.GetPDFData(self)
+        finally:
+            self.close()
+
+    def close(self, discard=False):
+        """Close the output file if the canvas opened it; ``discard`` also deletes it."""
+        if self._out is not None and self._own:
+            self._file.close()
+            if discard and os.path.exists(self._filename):
+                os.remove(self._filename)
+
+
+def _record(offsets, number, offset):
+    if len(offsets) < number:
+        offsets.extend([-1] * (number - len(offsets)))
+    offsets[number - 1] = offset
+
+
+def _write_objects(doc, out, offsets):
+    """``PDFDocument.format`` writing to ``out`` around the objects already written."""
+    # formatting an object may register more, so the count is read every time round
+    number = 1
+    while number <= doc.objectcounter:
+        if number > len(offsets) or offsets[number - 1] < 0:
+            oid = doc.numberToId[number]
+            _record(offsets, number, out.add(PDFIndirectObject(oid, doc.idToObject[oid]).format(doc)))
+        number += 1
+    start = out.add(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+    for offset in offsets:
+        out.add(b"%010d 00000 n \n" % offset)
+    out.add(PDFTrailer(startxref=start, Size=len(offsets) + 1, Root=doc.Reference(doc.Catalog),
+                       Info=doc.Reference(doc.info), ID=doc.ID()).format(doc))
+    return b""
+
+
+def render_streaming(flowables, filename, pagesize=A4, title=None, margins=None):
+    """Lay out an iterable of flowables into ``filename`` without materializing it."""
+    doc = SimpleDocTemplate(filename, pagesize=pagesize, title=title or "(untitled)",
+                            **(margins or MARGINS))
+    try:
+        doc.build(StreamedStory(flowables), canvasmaker=StreamingCanvas)
+    except BaseException:
+        # pages already written would otherwise leave a truncated file behind
+        canvas = getattr(doc, "canv", None)
+        if canvas is not None:
+            canvas.close(discard=True)
+        raise
+    return filename
@@ -0,0 +1,243 @@
+"""Markdown and static HTML renderers for the compiled roadmap model.
+
+Both walk the same block tuples as the PDF renderer, so every output format
+is generated from one spec.  Neither has pages, so the table of contents
+links to the headings instead of listing page numbers.
+"""
+import html
+import re
+
+from .content import inline_markup, render_context
+from .schema import column_notes, index_summary, load_schema, table_heading, table_summary
+from .timeline import block_table, critical_path_text, slack_text, timeline_rows
+
+_SLUG_DROP = re.compile(r"[^\w\- ]+", re.UNICODE)
+
+# Characters that would start Markdown markup the paragraph did not ask for.
+_MD_SPECIAL = re.compile(r"([\\<*])")
+_MD_TAGS = {"<b>": "**", "</b>": "**", "<i>": "*", "</i>": "*"}
+# A subtitle is bold already.
+_MD_SUBTITLE_TAGS = dict(_MD_TAGS, **{"<b>": "", "</b>": ""})
+
+STYLESHEET = """
+body { font-family: Helvetica, Arial, sans-serif; max-width: 46em; margin: 2em auto; padding: 0 1em;
+       line-height: 1.45; color: #222; }
+h1 { color: #2D5A27; text-align: center; font-size: 2em; }
+h2 { color: #2D5A27; margin-top: 1.6em; }
+h3 { color: #1B4D3E; }
+p.body { text-align: justify; }
+p.subtitle { font-size: 1.3em; font-weight: bold; text-align: center; }
+ul.checklist { list-style: none; padding-left: 0; }
+ul.checklist li:before { content: "\\2713  "; }
+table { border-collapse: collapse; margin: 1em 0; }
+th { background: #2D5A27; color: whitesmoke; }
+td { background: beige; }
+th, td { border: 1px solid black; padding: 4px 8px; }
+table.timeline th, table.timeline td { text-align: center; font-size: 0.9em; }
+"""
+
+
+def slug(text):
+    """GitHub-style anchor for a heading."""
+    return _SLUG_DROP.sub("", text).strip().lower().replace(" ", "-")
+
+
+def toc_links(document):
+    """(label, anchor) rows for every heading that belongs in the TOC."""
+    links = []
+    for section in document.sections:
+        for block in section.blocks:
+            if block[0] == "heading" and block[2] is not None:
+                links.append((block[2], slug(block[1])))
+    return tuple(links)
+
+
+def _paragraph_text(block, context):
+    _, style, text, is_template = block
+    return text.format(**context) if is_template else text
+
+
+def _md_text(text):
+    return _MD_SPECIAL.sub(r"\\\1", text)
+
+
+def _md_cell(text):
+    return text.replace("|", "\\|")
+
+
+def gantt_text(block):
+    """(table rows, summary sentences) for a ``gantt`` block."""
+    tasks = block_table(block)
+    summary = [critical_path_text(tasks, markup=False), slack_text(tasks, markup=False)]
+    return timeline_rows(tasks, block[4], block[5]), [line for line in summary if line]
+
+
+def schema_text(block):
+    """Table list items for a ``"list"`` schema block, or (heading, rows, indexes) per table."""
+    _, mode, _, files, describe, _, _ = block
+    tables = load_schema(files).tables.values()
+    if mode == "list":
+        describe = dict(describe)
+        return [table_summary(info, describe.get(info.name)) for info in tables]
+    return [(table_heading(info),
+             [("Column", "Type", "Constraints")] + [(c.name, c.type, column_notes(c)) for c in info.columns.values()],
+             index_summary(info))
+            for info in tables]
+
+
+def _md_table(rows):
+    yield "| %s |" % " | ".join(_md_cell(cell) for cell in rows[0])
+    yield "|%s|" % "|".join(" --- " for _ in rows[0])
+    for row in rows[1:]:
+        yield "| %s |" % " | ".join(_md_cell(cell) for cell in row)
+
+
+def _html_table(style, rows):
+    esc = html.escape
+    yield '<table class="%s">' % style
+    yield "<tr>%s</tr>" % "".join("<th>%s</th>" % esc(cell) for cell in rows[0])
+    for row in rows[1:]:
+        yield "<tr>%s</tr>" % "".join("<td>%s</td>" % esc(cell) for cell in row)
+    yield "</table>"
+
+
+def markdown_lines(document, context):
+    """Yield the lines of the Markdown rendering of ``document``."""
+    links = None
+    for section in document.sections:
+        for block in section.blocks:
+            kind = block[0]
+            if kind == "title":
+                yield "# %s" % block[1]
+            elif kind == "heading":
+                yield "## %s" % block[1]
+            elif kind == "subheading":
+                yield "### %s" % block[1]
+            elif kind == "paragraph":
+                text = _paragraph_text(block, context)
+                if block[1] == "subtitle":
+                    yield "**%s**" % inline_markup(text, _md_text, _MD_SUBTITLE_TAGS)
+                else:
+                    yield inline_markup(text, _md_text, _MD_TAGS)
+            elif kind == "checklist":
+                for item in block[1]:
+                    yield "- ✅ %s" % item
+            elif kind == "groups":
+                for title, items in block[1]:
+                    yield "**%s**" % title
+                    yield ""
+                    for item in items:
+                        yield "- %s" % item
+                    yield ""
+                continue
+            elif kind == "spacer":
+                continue
+            elif kind == "table":
+                yield from _md_table(block[3])
+            elif kind == "gantt":
+                rows, summary = gantt_text(block)
+                yield from _md_table(rows)
+                for line in summary:
+                    yield ""
+                    yield line
+            elif kind == "schema" and block[1] == "list":
+                yield "**%s**" % block[2]
+                yield ""
+                for item in schema_text(block):
+                    yield "- %s" % item
+            elif kind == "schema":
+                for heading, rows, indexes in schema_text(block):
+                    yield "**%s**" % heading
+                    yield ""
+                    yield from _md_table(rows)
+                    if indexes:
+                        yield ""
+                        yield indexes
+                    yield ""
+                continue
+            elif kind == "toc":
+                links = links or toc_links(document)
+                for label, anchor in links:
+                    yield "- [%s](#%s)" % (label, anchor)
+            yield ""
+
+
+def html_lines(document, context):
+    """Yield the lines of a standalone HTML page for ``document``."""
+    esc = html.escape
+    yield "<!DOCTYPE html>"
+    yield '<html lang="en">'
+    yield "<head>"
+    yield '<meta charset="utf-8">'
+    yield "<title>%s</title>" % esc(document.title)
+    yield "<style>%s</style>" % STYLESHEET
+    yield "</head>"
+    yield "<body>"
+    links = None
+    for section in document.sections:
+        yield '<section id="%s">' % esc(section.id)
+        for block in section.blocks:
+            kind = block[0]
+            if kind == "title":
+                yield "<h1>%s</h1>" % esc(block[1])
+            elif kind == "heading":
+                yield '<h2 id="%s">%s</h2>' % (slug(block[1]), esc(block[1]))
+            elif kind == "subheading":
+                yield "<h3>%s</h3>" % esc(block[1])
+            elif kind == "paragraph":
+                yield '<p class="%s">%s</p>' % (block[1], inline_markup(_paragraph_text(block, context), esc))
+            elif kind == "checklist":
+                yield '<ul class="checklist">'
+                for item in block[1]:
+                    yield "<li>%s</li>" % esc(item)
+                yield "</ul>"
+            elif kind == "groups":
+                for title, items in block[1]:
+                    yield "<p><b>%s</b></p>" % esc(title)
+                    yield "<ul>%s</ul>" % "".join("<li>%s</li>" % esc(item) for item in items)
+            elif kind == "table":
+                yield from _html_table(block[1], block[3])
+            elif kind == "gantt":
+                rows, summary = gantt_text(block)
+                yield from _html_table(block[2], rows)
+                for line in summary:
+                    yield '<p class="body">%s</p>' % esc(line)
+            elif kind == "schema" and block[1] == "list":
+                yield "<p><b>%s</b></p>" % esc(block[2])
+                yield "<ul>%s</ul>" % "".join("<li>%s</li>" % esc(item) for item in schema_text(block))
+            elif kind == "schema":
+                for heading, rows, indexes in schema_text(block):
+                    yield "<p><b>%s</b></p>" % esc(heading)
+                    yield from _html_table(block[5], rows)
+                    if indexes:
+                        yield '<p class="body">%s</p>' % esc(indexes)
+            elif kind == "toc":
+                links = links or toc_links(document)
+                yield '<ul class="toc">'
+                for label, anchor in links:
+                    yield '<li><a href="#%s">%s</a></li>' % (anchor, esc(label))
+                yield "</ul>"
+        yield "</section>"
+    yield "</body>"
+    yield "</html>"
+
+
+def _write(lines, filename):
+    if hasattr(filename, "write"):
+        filename.write("".join(line + "\n" for line in lines).encode("utf-8"))
+        return filename
+    with open(filename, "w", encoding="utf-8", newline="\n") as fh:
+        for line in lines:
+            fh.write(line)
+            fh.write("\n")
+    return filename
+
+
+def render_markdown(document, filename, now=None):
+    """Render ``document`` to a Markdown file (or binary stream) and return it."""
+    return _write(markdown_lines(document, render_context(now)), filename)
+
+
+def render_html(document, filename, now=None):
+    """Render ``document`` to a standalone HTML file (or binary stream) and return it."""
+    return _write(html_lines(document, render_context(now)), filename)
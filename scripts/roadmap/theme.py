@@ -0,0 +1,200 @@
+"""Process-wide theme registry: brand palette, fonts, paragraph and table styles.
+
+Building stylesheets is pure setup cost, so each named theme is built once
+per process on first use and the same ``Theme`` is handed to every render
+after that.  Themes are shared: treat their styles as read-only and derive
+a new ``ParagraphStyle`` (``ParagraphStyle("x", parent=theme.paragraph[...])``)
+rather than changing one in place.
+
+Table styles are kept as command lists and only turned into ``TableStyle``
+objects on first use, so loading a theme does not import platypus - a
+render whose sections all come from the layout cache never needs it.
+"""
+import hashlib
+import threading
+from types import MappingProxyType
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+
+# Brand colours
+PALETTE = MappingProxyType({
+    "primary": "#2D5A27",
+    "secondary": "#1B4D3E",
+    "accent": "#B5452B",
+})
+
+
+class Theme(object):
+    """A built theme.
+
+    ``paragraph`` maps spec style names to ``ParagraphStyle``s, ``table``
+    maps them to ``TableStyle``s (built lazily), ``fonts`` lists every font
+    the styles use and ``digest`` fingerprints the whole theme.
+    """
+
+    __slots__ = ("name", "palette", "paragraph", "table_commands", "fonts", "digest", "_table")
+
+    def __init__(self, name, palette, paragraph, table_commands, fonts, digest):
+        self.name = name
+        self.palette = palette
+        self.paragraph = paragraph
+        self.table_commands = table_commands
+        self.fonts = fonts
+        self.digest = digest
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            from reportlab.platypus import TableStyle
+
+            self._table = MappingProxyType(dict(
+                (name, TableStyle(list(commands))) for name, commands in self.table_commands.items()))
+        return self._table
+
+    def __repr__(self):
+        return "<Theme %r>" % self.name
+
+
+_factories = {}
+_themes = {}
+_lock = threading.Lock()
+
+
+def register_theme(name, factory):
+    """Register ``factory() -> (paragraph_styles, table_commands)`` under ``name``.
+
+    ``table_commands`` maps table style names to ``TableStyle`` command lists.
+    """
+    with _lock:
+        _factories[name] = factory
+        _themes.pop(name, None)
+
+
+def get_theme(name="default"):
+    """The named theme, built on first use and memoized for the process."""
+    theme = _themes.get(name)
+    if theme is not None:
+        return theme
+    with _lock:
+        theme = _themes.get(name)
+        if theme is None:
+            try:
+                factory = _factories[name]
+            except KeyError:
+                raise KeyError("unknown theme %r" % name) from None
+            theme = _themes[name] = _build(name, factory)
+    return theme
+
+
+def register_font(name, path):
+    """Register a TrueType font once per process; repeated calls are no-ops."""
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+def _build(name, factory):
+    paragraph, table = factory()
+    fonts = set()
+    for style in paragraph.values():
+        fonts.add(style.fontName)
+    for commands in table.values():
+        for command in commands:
+            if command[0] in ("FONT", "FONTNAME"):
+                fonts.add(command[3])
+    # Load metrics now rather than during the first render's layout.
+    for font in fonts:
+        pdfmetrics.getFont(font)
+    return Theme(
+        name,
+        PALETTE,
+        MappingProxyType(dict(paragraph)),
+        MappingProxyType(dict((name, tuple(commands)) for name, commands in table.items())),
+        tuple(sorted(fonts)),
+        _fingerprint(paragraph, table),
+    )
+
+
+def _fingerprint(paragraph, table):
+    parts = []
+    for name in sorted(paragraph):
+        parts.append("%s=%r" % (name, sorted(paragraph[name].__dict__.items(), key=lambda kv: kv[0])))
+    for name in sorted(table):
+        parts.append("%s=%r" % (name, list(table[name])))
+    return hashlib.sha256("\n".join(parts).encode("utf8")).hexdigest()
+
+
+def _default_styles():
+    styles = getSampleStyleSheet()
+    primary = colors.HexColor(PALETTE["primary"])
+    secondary = colors.HexColor(PALETTE["secondary"])
+
+    paragraph = {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=primary
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor=primary
+        ),
+        "subheading": ParagraphStyle(
+            'CustomSubHeading',
+            parent=styles['Heading3'],
+            fontSize=14,
+            spaceAfter=8,
+            spaceBefore=12,
+            textColor=secondary
+        ),
+        "body": ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=8,
+            alignment=TA_JUSTIFY
+        ),
+        "subtitle": styles['Heading2'],
+        "normal": styles['Normal'],
+    }
+
+    table = {
+        "toc": [
+            ('BACKGROUND', (0, 0), (-1, 0), primary),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ],
+        "timeline": [
+            ('BACKGROUND', (0, 0), (-1, 0), primary),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 9)
+        ],
+    }
+    return paragraph, table
+
+
+register_theme("default", _default_styles)
@@ -0,0 +1,456 @@
+"""PNG preview thumbnails of rendered pages.
+
+``thumbnail(document, page)`` returns the PNG bytes of one page of the
+PDF ``render_pdf`` would produce (the first by default), reduced to
+``width`` pixels across.  Nothing is drawn until a thumbnail is asked for;
+the result is then stored under the content hash of everything that feeds
+the page (see ``artifacts.artifact_key``), so a repeat request for the same
+inputs is a single file read.  The store is capped at ``MAX_BYTES`` and the
+least recently used thumbnails beyond it are removed.
+
+Pages are rasterized straight from the content streams the layout step
+records, without writing or parsing a PDF: a small interpreter follows the
+graphics state, fills and strokes the paths with Pillow (already installed
+with reportlab) and draws text "greeked" - a bar per word, measured with
+the real font metrics - which is what a text line looks like at thumbnail
+size anyway.  Images are shown as grey boxes.  Drawing happens at
+``SUPERSAMPLE`` times the size and is scaled down for anti-aliasing.
+
+Run from the ``scripts`` directory::
+
+    python -m roadmap.thumbnail -o preview.png --page 1 --width 300
+"""
+import argparse
+import hashlib
+import io
+import math
+import os
+import re
+import sys
+
+from .cache import cache_dir, prune, touch, write_bytes
+
+# Bump whenever the rasterizer's output changes.
+THUMBNAIL_VERSION = 1
+
+DEFAULT_WIDTH = 200
+MAX_WIDTH = 2000
+
+# Total size of the stored thumbnails; the least recently used beyond it are removed.
+MAX_BYTES = 32 << 20
+
+SUPERSAMPLE = 3
+
+# Line segments each Bezier curve is flattened into.
+CURVE_STEPS = 8
+
+IMAGE_COLOR = (200, 200, 200)
+
+_TOKEN = re.compile(
+    r"\((?:\\.|[^\\)])*\)"                   # literal string
+    r"|<[0-9A-Fa-f\s]*>"                       # hex string
+    r"|BI\b.*?\bEI\b"                          # inline image
+    r"|[\[\]]"
+    r"|/[^\s/\[\]()<>]+"                       # name
+    r"|[-+]?(?:\d+\.?\d*|\.\d+)"               # number
+    r"|[A-Za-z'\"]+\*?",                       # operator
+    re.S)
+
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f"}
+_ESCAPE = re.compile(r"\\([0-7]{1,3}|\r\n|.)", re.S)
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _unescape(match):
+    code = match.group(1)
+    if code[0] in "01234567":
+        return chr(int(code, 8) & 0xFF)
+    if code in ("\n", "\r", "\r\n"):
+        return ""
+    return _ESCAPES.get(code, code)
+
+
+def _string(token):
+    if token[0] == "(":
+        return _ESCAPE.sub(_unescape, token[1:-1])
+    digits = re.sub(r"\s", "", token[1:-1])
+    if len(digits) % 2:
+        digits += "0"
+    return bytes.fromhex(digits).decode("latin-1")
+
+
+def _tokens(ops):
+    """Operands and operators of a page's content stream, as Python values."""
+    for op in ops:
+        for token in _TOKEN.findall(op):
+            first = token[0]
+            if first in "(<":
+                yield "string", _string(token)
+            elif first == "/":
+                yield "name", token
+            elif first in "[]":
+                yield "operator", token
+            elif first in "+-.0123456789":
+                yield "number", float(token)
+            elif token.startswith("BI"):
+                yield "operator", "BI"
+            else:
+                yield "operator", token
+
+
+def _multiply(m, n):
+    """The matrix ``m`` followed by ``n``."""
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n
+    return (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D, e * A + f * C + E, e * B + f * D + F)
+
+
+def _apply(m, x, y):
+    return m[0] * x + m[2] * y + m[4], m[1] * x + m[3] * y + m[5]
+
+
+def _rgb(values):
+    return tuple(max(0, min(255, int(round(255 * v)))) for v in values)
+
+
+def _cmyk(c, m, y, k):
+    return _rgb((1 - min(1, c + k), 1 - min(1, m + k), 1 - min(1, y + k)))
+
+
+class _GraphicsState(object):
+
+    __slots__ = ("ctm", "fill", "stroke", "line_width")
+
+    def __init__(self):
+        self.ctm = _IDENTITY
+        self.fill = (0, 0, 0)
+        self.stroke = (0, 0, 0)
+        self.line_width = 1.0
+
+    def copy(self):
+        state = _GraphicsState()
+        state.ctm, state.fill, state.stroke, state.line_width = self.ctm, self.fill, self.stroke, self.line_width
+        return state
+
+
+class PageRasterizer(object):
+    """Draws one recorded page onto a Pillow image; see the module docstring."""
+
+    def __init__(self, draw, pagesize, scale, fonts):
+        self.draw = draw
+        self.fonts = dict(fonts)
+        # PDF user space to image pixels: scaled, with the y axis flipped.
+        self.device = (scale, 0.0, 0.0, -scale, 0.0, pagesize[1] * scale)
+        self.scale = scale
+        self.state = _GraphicsState()
+        self.stack = []
+        self.subpaths = []
+        self.current = None
+        self.font = ("Helvetica", 10.0)
+        self.leading = 0.0
+        self.char_space = 0.0
+        self.word_space = 0.0
+        self.text_matrix = self.line_matrix = _IDENTITY
+
+    def run(self, ops):
+        operands = []
+        array = None
+        for kind, value in _tokens(ops):
+            if kind != "operator":
+                (operands if array is None else array).append(value)
+            elif value == "[":
+                array = []
+            elif value == "]":
+                operands.append(array or [])
+                array = None
+            else:
+                handler = self._handlers.get(value)
+                if handler is not None:
+                    try:
+                        handler(self, *operands)
+                    except (TypeError, ValueError, IndexError):
+                        pass  # malformed operands: skip the operator, as viewers do
+                operands = []
+
+    # Graphics state
+
+    def _save(self):
+        self.stack.append(self.state.copy())
+
+    def _restore(self):
+        if self.stack:
+            self.state = self.stack.pop()
+
+    def _concat(self, a, b, c, d, e, f):
+        self.state.ctm = _multiply((a, b, c, d, e, f), self.state.ctm)
+
+    def _line_width(self, width):
+        self.state.line_width = width
+
+    def _set(self, attr, color):
+        setattr(self.state, attr, color)
+
+    # Paths
+
+    def _to_device(self, x, y):
+        return _apply(self.device, *_apply(self.state.ctm, x, y))
+
+    def _move(self, x, y):
+        self.current = [(x, y)]
+        self.subpaths.append(self.current)
+
+    def _line(self, x, y):
+        if self.current is None:
+            self._move(x, y)
+        else:
+            self.current.append((x, y))
+
+    def _curve(self, x1, y1, x2, y2, x3, y3):
+        if self.current is None:
+            self._move(x1, y1)
+        x0, y0 = self.current[-1]
+        for step in range(1, CURVE_STEPS + 1):
+            t = step / float(CURVE_STEPS)
+            u = 1 - t
+            self.current.append((u * u * u * x0 + 3 * u * u * t * x1 + 3 * u * t * t * x2 + t * t * t * x3,
+                                 u * u * u * y0 + 3 * u * u * t * y1 + 3 * u * t * t * y2 + t * t * t * y3))
+
+    def _curve_v(self, x2, y2, x3, y3):
+        x1, y1 = self.current[-1] if self.current else (x2, y2)
+        self._curve(x1, y1, x2, y2, x3, y3)
+
+    def _curve_y(self, x1, y1, x3, y3):
+        self._curve(x1, y1, x3, y3, x3, y3)
+
+    def _close(self):
+        if self.current:
+            self.current.append(self.current[0])
+            self.current = [self.current[0]]
+            self.subpaths.append(self.current)
+
+    def _rect(self, x, y, w, h):
+        self._move(x, y)
+        self.current.extend(((x + w, y), (x + w, y + h), (x, y + h), (x, y)))
+
+    def _paint(self, fill=False, stroke=False, close=False):
+        if close:
+            self._close()
+        state = self.state
+        for subpath in self.subpaths:
+            points = [self._to_device(x, y) for x, y in subpath]
+            if fill and len(points) > 2:
+                self.draw.polygon(points, fill=state.fill)
+            if stroke and len(points) > 1:
+                a, b, c, d = state.ctm[:4]
+                width = state.line_width * math.sqrt(abs(a * d - b * c)) * self.scale
+                self.draw.line(points, fill=state.stroke, width=max(1, int(round(width))))
+        self.subpaths = []
+        self.current = None
+
+    def _image(self, *operands):
+        points = [self._to_device(x, y) for x, y in ((0, 0), (1, 0), (1, 1), (0, 1))]
+        self.draw.polygon(points, fill=IMAGE_COLOR)
+
+    # Text
+
+    def _begin_text(self):
+        self.text_matrix = self.line_matrix = _IDENTITY
+
+    def _set_font(self, name, size):
+        self.font = (self.fonts.get(name, "Helvetica"), size)
+
+    def _leading(self, leading):
+        self.leading = leading
+
+    def _char_space(self, space):
+        self.char_space = space
+
+    def _word_space(self, space):
+        self.word_space = space
+
+    def _matrix(self, a, b, c, d, e, f):
+        self.text_matrix = self.line_matrix = (a, b, c, d, e, f)
+
+    def _offset(self, x, y):
+        self.text_matrix = self.line_matrix = _multiply((1.0, 0.0, 0.0, 1.0, x, y), self.line_matrix)
+
+    def _offset_leading(self, x, y):
+        self.leading = -y
+        self._offset(x, y)
+
+    def _next_line(self):
+        self._offset(0.0, -self.leading)
+
+    def _width(self, text):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        font, size = self.font
+        try:
+            width = stringWidth(text, font, size)
+        except KeyError:
+            width = 0.5 * size * len(text)
+        return width + self.char_space * len(text)
+
+    def _advance(self, width):
+        self.text_matrix = _multiply((1.0, 0.0, 0.0, 1.0, width, 0.0), self.text_matrix)
+
+    def _show(self, text):
+        size = self.font[1]
+        matrix = _multiply(self.text_matrix, self.state.ctm)
+        x = 0.0
+        for word in text.split(" "):
+            width = self._width(word)
+            if word.strip():
+                corners = ((x, 0.0), (x + width, 0.0), (x + width, 0.5 * size), (x, 0.5 * size))
+                self.draw.polygon([_apply(self.device, *_apply(matrix, cx, cy)) for cx, cy in corners],
+                                  fill=self.state.fill)
+            x += width + self._width(" ") + self.word_space
+        self._advance(x - self._width(" ") - self.word_space)
+
+    def _show_array(self, items):
+        for item in items:
+            if isinstance(item, str):
+                self._show(item)
+            else:
+                self._advance(-item / 1000.0 * self.font[1])
+
+    def _next_line_show(self, text):
+        self._next_line()
+        self._show(text)
+
+    def _spaced_show(self, word_space, char_space, text):
+        self.word_space, self.char_space = word_space, char_space
+        self._next_line_show(text)
+
+    _handlers = {
+        "q": _save, "Q": _restore, "cm": _concat, "w": _line_width,
+        "rg": lambda self, r, g, b: self._set("fill", _rgb((r, g, b))),
+        "RG": lambda self, r, g, b: self._set("stroke", _rgb((r, g, b))),
+        "g": lambda self, v: self._set("fill", _rgb((v, v, v))),
+        "G": lambda self, v: self._set("stroke", _rgb((v, v, v))),
+        "k": lambda self, *cmyk: self._set("fill", _cmyk(*cmyk)),
+        "K": lambda self, *cmyk: self._set("stroke", _cmyk(*cmyk)),
+        "m": _move, "l": _line, "c": _curve, "v": _curve_v, "y": _curve_y, "h": _close, "re": _rect,
+        "f": lambda self: self._paint(fill=True), "F": lambda self: self._paint(fill=True),
+        "f*": lambda self: self._paint(fill=True),
+        "S": lambda self: self._paint(stroke=True), "s": lambda self: self._paint(stroke=True, close=True),
+        "B": lambda self: self._paint(True, True), "B*": lambda self: self._paint(True, True),
+        "b": lambda self: self._paint(True, True, True), "b*": lambda self: self._paint(True, True, True),
+        "n": _paint,
+        "Do": _image, "BI": _image,
+        "BT": _begin_text, "Tf": _set_font, "TL": _leading, "Tc": _char_space, "Tw": _word_space,
+        "Tm": _matrix, "Td": _offset, "TD": _offset_leading, "T*": _next_line,
+        "Tj": _show, "TJ": _show_array, "'": _next_line_show, '"': _spaced_show,
+    }
+
+
+def rasterize(ops, fonts, pagesize, width=DEFAULT_WIDTH):
+    """PNG bytes of a page from its recorded content stream ``ops``, ``width`` pixels across.
+
+    ``fonts`` pairs the stream's internal font names with reportlab font
+    names, as in ``SectionLayout.fonts``.
+    """
+    from PIL import Image, ImageDraw
+
+    height = max(1, int(round(width * pagesize[1] / float(pagesize[0]))))
+    image = Image.new("RGB", (width * SUPERSAMPLE, height * SUPERSAMPLE), (255, 255, 255))
+    PageRasterizer(ImageDraw.Draw(image), pagesize, width * SUPERSAMPLE / float(pagesize[0]), fonts).run(ops)
+    out = io.BytesIO()
+    image.resize((width, height), Image.LANCZOS).save(out, "PNG")
+    return out.getvalue()
+
+
+def thumbnail_key(document, page=1, width=DEFAULT_WIDTH, now=None, pagesize=None, theme=None):
+    """Hex digest naming the thumbnail of ``page`` for these inputs."""
+    import PIL
+    from reportlab.lib.pagesizes import A4
+
+    from .artifacts import artifact_key
+
+    pdf = artifact_key(document, "pdf", now, pagesize=pagesize or A4, theme=theme)
+    items = (THUMBNAIL_VERSION, pdf, page, width, PIL.__version__)
+    return hashlib.sha256(repr(items).encode("utf8")).hexdigest()
+
+
+def render_page(document, page=1, width=DEFAULT_WIDTH, now=None, pagesize=None, theme=None, section_cache=None):
+    """Lay ``document`` out as ``render_pdf`` would and rasterize ``page`` (1-based) to PNG bytes."""
+    from reportlab.lib.pagesizes import A4
+
+    from .content import render_context, reproducible_now
+    from .render import lay_out_document
+
+    pagesize = pagesize or A4
+    context = render_context(reproducible_now(now))
+    layouts = lay_out_document(document, pagesize, context, section_cache, theme).layouts
+    total = sum(len(result.pages) for result, _ in layouts)
+    if not 1 <= page <= total:
+        raise ValueError("page %d is out of range (the document has %d pages)" % (page, total))
+    index = page - 1
+    for result, _ in layouts:
+        if index < len(result.pages):
+            return rasterize(result.pages[index], result.fonts, pagesize, width)
+        index -= len(result.pages)
+
+
+def thumbnail(document, page=1, width=DEFAULT_WIDTH, now=None, pagesize=None, theme=None, use_cache=True,
+              max_bytes=MAX_BYTES, info=None, section_cache=None):
+    """PNG bytes of ``page`` (1-based) of ``document``, ``width`` pixels across.
+
+    The dates come from ``now`` as in a reproducible render.  Thumbnails are
+    stored by content hash under the cache directory, which is kept within
+    ``max_bytes``; with ``use_cache`` false one is rendered and stored
+    regardless.  If ``info`` is a dict it receives the ``key`` and whether
+    the thumbnail was ``cached``.
+    """
+    if not 1 <= width <= MAX_WIDTH:
+        raise ValueError("width must be between 1 and %d pixels" % MAX_WIDTH)
+    key = thumbnail_key(document, page, width, now, pagesize, theme)
+    path = os.path.join(cache_dir("thumbnails"), key + ".png")
+    data = None
+    if use_cache:
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            data = None
+        else:
+            touch(path)
+    cached = data is not None
+    if not cached:
+        data = render_page(document, page, width, now, pagesize, theme, section_cache)
+        if write_bytes(path, data):
+            prune(os.path.dirname(path), max_bytes=max_bytes)
+    if info is not None:
+        info.update(key=key, cached=cached)
+    return data
+
+
+def main(argv=None):
+    from .cli import date_arg
+    from .content import DEFAULT_SPEC, load_document
+
+    parser = argparse.ArgumentParser(description="Write a PNG thumbnail of a page of the roadmap PDF.")
+    parser.add_argument("--spec", default=DEFAULT_SPEC, help="content spec (default: %(default)s)")
+    parser.add_argument("-o", "--output", default="roadmap-preview.png", help="PNG file to write")
+    parser.add_argument("--page", type=int, default=1, help="page number, from 1 (default: %(default)s)")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="width in pixels (default: %(default)s)")
+    parser.add_argument("--date", type=date_arg, default=None,
+                        help="the generated-on date, ISO 8601 (default: SOURCE_DATE_EPOCH or today)")
+    parser.add_argument("--no-cache", action="store_true", help="render even if a stored thumbnail exists")
+    args = parser.parse_args(argv)
+
+    info = {}
+    try:
+        data = thumbnail(load_document(args.spec), args.page, args.width, args.date, use_cache=not args.no_cache,
+                         info=info)
+    except ValueError as exc:
+        parser.error(str(exc))
+    with open(args.output, "wb") as fh:
+        fh.write(data)
+    print("%s %s (%d bytes)" % ("Reused" if info["cached"] else "Wrote", args.output, len(data)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
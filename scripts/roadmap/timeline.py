@@ -0,0 +1,295 @@
+"""Task and milestone schedules and their critical path.
+
+A ``TaskTable`` stores tasks column-wise in typed arrays: one slot per task
+in each of ``start``, ``duration``, ``effort_low``, ``effort_high``,
+``flags`` and ``label_ids``, with dependencies packed into two integer
+arrays (``dep_ids[dep_offsets[i]:dep_offsets[i + 1]]`` are the tasks task
+``i`` waits for).  Labels are pooled, so a thousand milestones called
+"Final delivery" keep one string.  A task costs a few dozen bytes however
+many there are, which keeps charts of real ``order_milestones`` data small.
+
+``critical_path`` schedules a table in time linear in tasks plus
+dependencies: a topological order (Kahn's algorithm over the packed
+arrays), a forward pass for the earliest start and finish of every task, a
+backward pass for the slack, and the chain of tasks that drives the finish.
+
+Times are plain numbers in the table's ``unit`` (``"day"`` or ``"week"``);
+when ``origin`` is set, time 0 is that date.
+"""
+from array import array
+from collections import deque, namedtuple
+from datetime import timedelta
+from xml.sax.saxutils import escape
+
+MILESTONE = 1
+DONE = 2
+FIXED_START = 4
+
+UNIT_DAYS = {"day": 1, "week": 7}
+
+# Slack below this counts as none.
+EPSILON = 1e-9
+
+
+class TimelineError(ValueError):
+    """Raised for an unknown or circular dependency, or an invalid task."""
+
+
+# ``order``, ``early_start``, ``early_finish``, ``slack`` and ``path`` are
+# arrays indexed by task (``order`` and ``path`` hold task indexes);
+# ``start`` and ``finish`` bound the whole schedule.
+Schedule = namedtuple("Schedule", "order early_start early_finish slack path start finish")
+
+
+class TaskTable(object):
+    """Tasks and milestones in array-backed, slot-per-task columns."""
+
+    __slots__ = ("unit", "origin", "keys", "label_ids", "start", "duration", "effort_low", "effort_high",
+                 "flags", "dep_offsets", "dep_ids", "notes", "_index", "_labels", "_label_ids", "_pending",
+                 "_schedule")
+
+    def __init__(self, unit="week", origin=None):
+        if unit not in UNIT_DAYS:
+            raise TimelineError("unknown time unit %r (expected %s)" % (unit, " or ".join(UNIT_DAYS)))
+        self.unit = unit
+        self.origin = origin
+        self.keys = []
+        self.label_ids = array("i")
+        self.start = array("d")
+        self.duration = array("d")
+        self.effort_low = array("d")
+        self.effort_high = array("d")
+        self.flags = array("b")
+        self.dep_offsets = array("i", [0])
+        self.dep_ids = array("i")
+        self.notes = {}
+        self._index = {}
+        self._labels = []
+        self._label_ids = {}
+        self._pending = []
+        self._schedule = None
+
+    def __len__(self):
+        return len(self.flags)
+
+    def add(self, key, label, start=None, duration=0.0, effort=None, depends=(), milestone=False,
+            done=False, note=None):
+        """Append a task and return its index.
+
+        ``start`` is the earliest time it may begin (otherwise as soon as its
+        ``depends`` - keys of other tasks, which may be added later - have
+        finished).  ``effort`` is a ``(low, high)`` range in hours.
+        """
+        if key in self._index:
+            raise TimelineError("duplicate task %r" % (key,))
+        if duration < 0:
+            raise TimelineError("task %r has a negative duration" % (key,))
+        index = len(self.flags)
+        self._index[key] = index
+        self.keys.append(key)
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        self.label_ids.append(label_id)
+        self.start.append(0.0 if start is None else float(start))
+        self.duration.append(0.0 if milestone else float(duration))
+        low, high = effort or (0.0, 0.0)
+        self.effort_low.append(float(low))
+        self.effort_high.append(float(high))
+        self.flags.append((MILESTONE if milestone else 0) | (DONE if done else 0)
+                          | (FIXED_START if start is not None else 0))
+        for dep in depends:
+            target = self._index.get(dep)
+            if target is None:
+                self._pending.append((len(self.dep_ids), dep))
+                target = -1
+            self.dep_ids.append(target)
+        self.dep_offsets.append(len(self.dep_ids))
+        if note:
+            self.notes[index] = note
+        self._schedule = None
+        return index
+
+    def label(self, index):
+        return self._labels[self.label_ids[index]]
+
+    def index(self, key):
+        return self._index[key]
+
+    def dependencies(self, index):
+        return self.dep_ids[self.dep_offsets[index]:self.dep_offsets[index + 1]]
+
+    def is_milestone(self, index):
+        return bool(self.flags[index] & MILESTONE)
+
+    def is_done(self, index):
+        return bool(self.flags[index] & DONE)
+
+    def _resolve(self):
+        for slot, key in self._pending:
+            target = self._index.get(key)
+            if target is None:
+                raise TimelineError("unknown dependency %r" % (key,))
+            self.dep_ids[slot] = target
+        self._pending = []
+
+    def schedule(self):
+        """The ``Schedule`` of this table, computed once until a task is added."""
+        if self._schedule is None:
+            self._schedule = critical_path(self)
+        return self._schedule
+
+    def date(self, time):
+        """The calendar date of ``time``, or None without an ``origin``."""
+        if self.origin is None:
+            return None
+        return self.origin + timedelta(days=time * UNIT_DAYS[self.unit])
+
+
+def _zeros(typecode, n):
+    return array(typecode, bytes(array(typecode).itemsize * n))
+
+
+def critical_path(table):
+    """Schedule every task as early as its start and dependencies allow; see the module docstring."""
+    table._resolve()
+    n = len(table)
+    offsets, deps = table.dep_offsets, table.dep_ids
+    start, duration, flags = table.start, table.duration, table.flags
+
+    # Successors in the same packed form, by counting sort over the dependencies.
+    succ_offsets = _zeros("i", n + 1)
+    for dep in deps:
+        succ_offsets[dep + 1] += 1
+    for i in range(n):
+        succ_offsets[i + 1] += succ_offsets[i]
+    fill = array("i", succ_offsets)
+    succ = _zeros("i", len(deps))
+    waiting = _zeros("i", n)
+    for task in range(n):
+        waiting[task] = offsets[task + 1] - offsets[task]
+        for k in range(offsets[task], offsets[task + 1]):
+            dep = deps[k]
+            succ[fill[dep]] = task
+            fill[dep] += 1
+
+    order = array("i")
+    ready = deque(task for task in range(n) if not waiting[task])
+    while ready:
+        task = ready.popleft()
+        order.append(task)
+        for k in range(succ_offsets[task], succ_offsets[task + 1]):
+            nxt = succ[k]
+            waiting[nxt] -= 1
+            if not waiting[nxt]:
+                ready.append(nxt)
+    if len(order) != n:
+        stuck = next(task for task in range(n) if waiting[task])
+        raise TimelineError("dependency cycle through task %r" % (table.keys[stuck],))
+
+    early_start = _zeros("d", n)
+    early_finish = _zeros("d", n)
+    driver = array("i", [-1]) * n
+    for task in order:
+        begin = start[task] if flags[task] & FIXED_START else 0.0
+        for k in range(offsets[task], offsets[task + 1]):
+            dep = deps[k]
+            if early_finish[dep] >= begin:
+                begin = early_finish[dep]
+                driver[task] = dep
+        early_start[task] = begin
+        early_finish[task] = begin + duration[task]
+
+    first = min(early_start) if n else 0.0
+    finish = max(early_finish) if n else 0.0
+    late_finish = array("d", [finish]) * n
+    for task in reversed(order):
+        late_start = late_finish[task] - duration[task]
+        for k in range(offsets[task], offsets[task + 1]):
+            dep = deps[k]
+            if late_start < late_finish[dep]:
+                late_finish[dep] = late_start
+    slack = array("d", (late_finish[i] - early_finish[i] for i in range(n)))
+
+    path = array("i")
+    if n:
+        task = max(range(n), key=lambda i: (early_finish[i], i))
+        while task != -1:
+            path.append(task)
+            task = driver[task]
+        path.reverse()
+    return Schedule(order, early_start, early_finish, slack, path, first, finish)
+
+
+def format_span(value, unit):
+    """``"1 week"``, ``"2.5 days"``..."""
+    return "%g %s%s" % (value, unit, "" if value == 1 else "s")
+
+
+def _plain(text):
+    return text
+
+
+def critical_path_text(table, schedule=None, max_items=12, markup=True):
+    """One sentence naming the tasks on the critical path and the total length.
+
+    With ``markup`` the task labels are escaped for a reportlab ``Paragraph``.
+    """
+    schedule = schedule or table.schedule()
+    quote = escape if markup else _plain
+    names = [quote(table.label(i)) for i in schedule.path]
+    if len(names) > max_items:
+        names = names[:max_items] + ["%d more" % (len(names) - max_items)]
+    return "Critical path: %s (%s)." % (" → ".join(names) or "none",
+                                        format_span(schedule.finish - schedule.start, table.unit))
+
+
+def slack_text(table, schedule=None, max_items=12, markup=True):
+    """One sentence naming the tasks that can slip without delaying the finish, or None.
+
+    ``markup`` is as for ``critical_path_text``.
+    """
+    schedule = schedule or table.schedule()
+    quote = escape if markup else _plain
+    floating = [i for i in range(len(table)) if schedule.slack[i] > EPSILON and not table.is_done(i)]
+    if not floating:
+        return None
+    parts = ["%s (%s)" % (quote(table.label(i)), format_span(schedule.slack[i], table.unit)) for i in floating[:max_items]]
+    if len(floating) > max_items:
+        parts.append("%d more" % (len(floating) - max_items))
+    return "Slack: %s." % ", ".join(parts)
+
+
+def _range(low, high):
+    return "%g" % low if low == high else "%g-%g" % (low, high)
+
+
+def timeline_rows(table, header, total_label, schedule=None):
+    """Overview table rows: one per task with an effort estimate, then a total row.
+
+    Each row is (label, when, note, effort); ``when`` reads like ``Weeks 1-2``.
+    """
+    schedule = schedule or table.schedule()
+    unit = table.unit.title()
+    rows = [tuple(header)]
+    low = high = 0.0
+    for i in range(len(table)):
+        if not table.effort_high[i]:
+            continue
+        first = int(schedule.early_start[i]) + 1
+        last = max(first, int(round(schedule.early_finish[i])))
+        when = "%s %d" % (unit, first) if first == last else "%ss %d-%d" % (unit, first, last)
+        rows.append((table.label(i), when, table.notes.get(i, ""), _range(table.effort_low[i], table.effort_high[i])))
+        low += table.effort_low[i]
+        high += table.effort_high[i]
+    rows.append(("Total", format_span(schedule.finish - schedule.start, unit), total_label, _range(low, high)))
+    return tuple(rows)
+
+
+def block_table(block):
+    """The ``TaskTable`` for a compiled ``gantt`` block."""
+    table = TaskTable(block[1])
+    for key, label, start, duration, effort, depends, milestone, note in block[6]:
+        table.add(key, label, start, duration, effort, depends, milestone, note=note)
+    return table
@@ -0,0 +1,241 @@
+"""Opt-in instrumentation for renders.
+
+A ``Trace`` passed to ``render_pdf`` records, for every section laid out,
+how long it took, how many pages it produced and whether it came from the
+layout cache, and for every flowable type how often it was wrapped, split
+and drawn and how long each of those took.  Timings are inclusive: a
+flowable that wraps others (a table of paragraphs, say) counts their time
+too.  With ``profile=True`` a background thread also samples the rendering
+thread's stack, which points at the functions behind a slow section.
+
+Functions subscribed with ``subscribe`` are called as ``hook(event, data)``
+for every ``"section"`` record and once with the finished ``"render"``
+trace.  While any hook is subscribed every render is traced, so a batch
+runner or server can collect metrics without threading a ``Trace`` through.
+A hook that raises is logged and otherwise ignored: it cannot fail a render.
+
+Untraced renders pay nothing: no flowable is touched unless a trace is active.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+TRACE_VERSION = 1
+
+_hooks = []
+
+_log = logging.getLogger(__name__)
+
+
+def subscribe(hook):
+    """Call ``hook(event, data)`` for the events of every render from now on."""
+    if hook not in _hooks:
+        _hooks.append(hook)
+    return hook
+
+
+def unsubscribe(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def active(trace=None):
+    """``trace``, or a fresh ``Trace`` when hooks are subscribed, or None."""
+    if trace is None and _hooks:
+        return Trace()
+    return trace or None
+
+
+def _emit(event, data):
+    for hook in list(_hooks):
+        try:
+            hook(event, data)
+        except Exception:
+            _log.exception("trace hook %r failed on a %r event", hook, event)
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        threading.Thread.__init__(self, name="roadmap-trace-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.own = Counter()
+        self.total = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.own[_frame_name(frame)] += 1
+            seen = set()
+            while frame is not None:
+                name = _frame_name(frame)
+                if name not in seen:
+                    seen.add(name)
+                    self.total[name] += 1
+                frame = frame.f_back
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return "%s:%d(%s)" % (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class Trace(object):
+    """Timings collected over one render; see the module docstring."""
+
+    def __init__(self, profile=False, interval=0.005):
+        self.profile = profile
+        self.interval = interval
+        self.sections = []
+        self.flowables = {}
+        self.seconds = 0.0
+        self.pages = 0
+        self._sampler = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.profile:
+            self._sampler = _Sampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+
+    def finish(self, pages):
+        self.seconds = time.perf_counter() - self._started
+        self.pages = pages
+        if self._sampler is not None:
+            self._sampler.stop()
+        _emit("render", self.to_dict())
+
+    def add_section(self, section_id, seconds, pages, cached=False):
+        """Record one laid-out (or cache-replayed) section."""
+        record = {"id": section_id, "cached": cached, "seconds": seconds, "pages": pages}
+        self.sections.append(record)
+        _emit("section", record)
+        return record
+
+    def _stats(self, flowable):
+        name = type(flowable).__name__
+        stats = self.flowables.get(name)
+        if stats is None:
+            stats = self.flowables[name] = {
+                "count": 0, "wraps": 0, "splits": 0, "draws": 0,
+                "wrap_seconds": 0.0, "split_seconds": 0.0, "draw_seconds": 0.0,
+            }
+        return stats
+
+    def instrument(self, flowables):
+        """Time the wrap, split and draw calls of ``flowables``; returns them."""
+        for flowable in flowables:
+            self._instrument(flowable)
+        return flowables
+
+    def _instrument(self, flowable):
+        if getattr(flowable, "_traced", False):
+            return
+        stats = self._stats(flowable)
+        stats["count"] += 1
+        wrap, split, draw = flowable.wrap, flowable.split, flowable.draw
+        clock = time.perf_counter
+
+        def traced_wrap(availWidth, availHeight):
+            start = clock()
+            try:
+                return wrap(availWidth, availHeight)
+            finally:
+                stats["wraps"] += 1
+                stats["wrap_seconds"] += clock() - start
+
+        def traced_split(availWidth, availHeight):
+            start = clock()
+            try:
+                parts = split(availWidth, availHeight)
+            finally:
+                stats["splits"] += 1
+                stats["split_seconds"] += clock() - start
+            for part in parts:
+                self._instrument(part)
+            return parts
+
+        def traced_draw():
+            start = clock()
+            try:
+                return draw()
+            finally:
+                stats["draws"] += 1
+                stats["draw_seconds"] += clock() - start
+
+        flowable.wrap, flowable.split, flowable.draw = traced_wrap, traced_split, traced_draw
+        flowable._traced = True
+
+    def to_dict(self, top=25):
+        data = {
+            "version": TRACE_VERSION,
+            "seconds": round(self.seconds, 6),
+            "pages": self.pages,
+            "sections": [dict(record, seconds=round(record["seconds"], 6)) for record in self.sections],
+            "flowables": dict((name, dict((k, round(v, 6) if isinstance(v, float) else v)
+                                          for k, v in stats.items()))
+                              for name, stats in sorted(self.flowables.items())),
+        }
+        sampler = self._sampler
+        if sampler is not None:
+            data["profile"] = {
+                "interval": self.interval,
+                "samples": sampler.samples,
+                "own": sampler.own.most_common(top),
+                "total": sampler.total.most_common(top),
+            }
+        return data
+
+    def dump(self, path):
+        with open(path, "w") as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+            fh.write("\n")
+        return path
+
+    def format_summary(self, top=10):
+        """Plain-text tables: sections slowest first, then flowable types, then hot functions."""
+        lines = ["Rendered %d pages in %.3fs" % (self.pages, self.seconds), ""]
+        rows = [("section", "cached", "pages", "ms")]
+        for record in sorted(self.sections, key=lambda r: -r["seconds"]):
+            rows.append((record["id"], "yes" if record["cached"] else "no", str(record["pages"]),
+                         "%.1f" % (1000.0 * record["seconds"])))
+        lines.extend(_table(rows))
+        if self.flowables:
+            rows = [("flowable", "count", "wraps", "splits", "draws", "wrap ms", "split ms", "draw ms")]
+            for name, s in sorted(self.flowables.items(), key=lambda kv: -kv[1]["wrap_seconds"]):
+                rows.append((name, str(s["count"]), str(s["wraps"]), str(s["splits"]), str(s["draws"]),
+                             "%.1f" % (1000.0 * s["wrap_seconds"]), "%.1f" % (1000.0 * s["split_seconds"]),
+                             "%.1f" % (1000.0 * s["draw_seconds"])))
+            lines.append("")
+            lines.extend(_table(rows))
+        sampler = self._sampler
+        if sampler is not None and sampler.samples:
+            rows = [("function", "own %", "total %")]
+            for name, own in sampler.own.most_common(top):
+                rows.append((name, "%.1f" % (100.0 * own / sampler.samples),
+                             "%.1f" % (100.0 * sampler.total[name] / sampler.samples)))
+            lines.append("")
+            lines.append("%d samples every %.0f ms" % (sampler.samples, 1000.0 * self.interval))
+            lines.extend(_table(rows))
+        return "\n".join(lines)
+
+
+def _table(rows):
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return ["  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(row, widths)))
+            for row in rows]
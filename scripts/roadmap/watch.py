@@ -0,0 +1,115 @@
+"""Rebuild the roadmap whenever its content spec or SQL migrations change.
+
+``python generate-project-roadmap.py --watch`` renders once and then stays
+running.  The process keeps everything warm between rebuilds - reportlab,
+the theme's styles and font metrics, the parsed markup and the layout of
+every section - so a change only pays for the sections it touched; the
+rest are replayed from the in-memory layout cache.  Each rebuild reports
+how long it took and which sections were laid out again.
+
+Files are polled (a ``stat`` call per file per interval) rather than
+watched with inotify, which keeps the loop portable and dependency free.
+A change is only acted on once the file has stopped changing, so an
+editor's save-in-several-writes triggers one rebuild.
+"""
+import os
+import sys
+import time
+
+
+def _signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def changes(paths, interval=0.2, settle=0.05):
+    """Yield whenever any of ``paths`` changes, once it has been still for ``settle`` seconds."""
+    last = _signature(paths)
+    while True:
+        time.sleep(interval)
+        current = _signature(paths)
+        if current == last:
+            continue
+        while True:
+            time.sleep(settle)
+            settled = _signature(paths)
+            if settled == current:
+                break
+            current = settled
+        last = current
+        yield current
+
+
+def watched_paths(args):
+    """The files a rebuild depends on: the spec and the migrations its schema blocks read."""
+    from .content import DEFAULT_SPEC, load_document
+    from .schema import document_files
+
+    spec = os.path.abspath(args.spec or DEFAULT_SPEC)
+    try:
+        return [spec] + document_files(load_document(spec))
+    except Exception:
+        return [spec]  # the first build reports what is wrong with it
+
+
+def format_rebuild(seconds, stats, document, verb="Rebuilt"):
+    """One line describing a rebuild."""
+    line = "%s in %.0f ms" % (verb, 1000.0 * seconds)
+    if stats:
+        laid_out = stats["laid_out"]
+        line += ": %d of %d sections laid out%s, %d pages" % (
+            len(laid_out), len(document.sections), " (%s)" % ", ".join(laid_out) if laid_out else "",
+            stats["pages"])
+    return line
+
+
+def watch(args, interval=0.2, out=None):
+    """Rebuild as described by parsed ``args`` on every change to its inputs, until interrupted."""
+    from .cli import generate
+    from .layout import SectionCache
+    from .markup import MarkupCache
+
+    out = out or sys.stderr
+    # --no-cache keeps the disk out of it, but rebuilds still reuse this process's work.
+    caches = (SectionCache(persist=False), MarkupCache(persist=False)) if args.no_cache else None
+    paths = watched_paths(args)
+
+    def rebuild(verb):
+        stats = {}
+        start = time.perf_counter()
+        try:
+            document, outputs = generate(args, stats=stats, caches=caches)
+        except Exception as exc:
+            out.write("[%s] Failed: %s\n" % (time.strftime("%H:%M:%S"), exc))
+        else:
+            line = format_rebuild(time.perf_counter() - start, stats, document, verb)
+            out.write("[%s] %s -> %s\n" % (time.strftime("%H:%M:%S"), line, ", ".join(outputs.values())))
+        out.flush()
+
+    def announce(paths):
+        out.write("Watching %s for changes (Ctrl+C to stop)\n" % ", ".join(paths))
+        out.flush()
+
+    rebuild("Built")
+    announce(paths)
+    try:
+        while True:
+            for _ in changes(paths, interval):
+                rebuild("Rebuilt")
+                # an edit to the spec can add or drop the migrations it reads
+                current = watched_paths(args)
+                if current != paths:
+                    paths = current
+                    announce(paths)
+                    break
+            else:
+                break
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,24 @@
+"""Shared fixtures for the roadmap generator tests.
+
+Run from the ``scripts`` directory: python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def cache_root(tmp_path, monkeypatch):
+    """Point the on-disk caches at a fresh directory and empty the in-process ones for every test."""
+    from roadmap import content, layout, markup, schema
+
+    root = tmp_path / "cache"
+    monkeypatch.setenv("ROADMAP_CACHE_DIR", str(root))
+    content._compiled.clear()
+    schema._parsed.clear()
+    layout.default_cache.clear()
+    markup.default_cache.clear()
+    return root
@@ -0,0 +1,93 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from roadmap import analytics  # noqa: E402
+from roadmap.snapshot import SnapshotError  # noqa: E402
+
+ORDERS = (
+    'id,status,total_amount,created_at,notes,category\r\n'
+    '1,completed,10.5,2025-01-01T10:00:00Z,"plain",Writing\r\n'
+    '2,"in_progress","1000.25",2025-01-02 12:30:00+02:00,"says ""hi"", twice","Writing, ""Copy"""\r\n'
+    '\r\n'
+    '3,pending,,2025-01-03T08:00:00.250-0500,"two\r\nlines",Design\r\n'
+    '4,"",7,,"",""\r\n'
+)
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def reference(text):
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    header = rows[0]
+    return [dict(zip(header, row)) for row in rows[1:] if row]
+
+
+@pytest.mark.parametrize("chunk", [analytics.CHUNK_BYTES, 7])
+def test_csv_matches_the_csv_module(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(analytics, "CHUNK_BYTES", chunk)
+    path = write(tmp_path, "orders.csv", ORDERS)
+    kinds = {"status": "category", "category": "category", "total_amount": "category"}
+    columns = analytics._csv_columns(str(path), kinds)
+    expected = reference(ORDERS)
+    for name in kinds:
+        _, chunks, labels = columns[name]
+        codes = np.concatenate(chunks)
+        got = [labels[code] if code >= 0 else "" for code in codes]
+        assert got == [row[name] for row in expected], name
+
+
+def test_times_apply_utc_offsets(tmp_path):
+    write(tmp_path, "orders.csv", ORDERS)
+    orders = analytics.load_table(str(tmp_path), "orders", use_cache=False)
+    expected = [datetime(2025, 1, 1, 10), datetime(2025, 1, 2, 10, 30), datetime(2025, 1, 3, 13, 0, 0, 250000)]
+    got = orders["created_at"]
+    for value, when in zip(got, expected):
+        assert value == when.replace(tzinfo=timezone.utc).timestamp()
+    assert np.isnan(got[3])
+
+
+def test_malformed_offsets_are_rejected(tmp_path):
+    write(tmp_path, "orders.csv", "id,created_at\n1,2025-01-01T10:00:00+0x:00\n")
+    with pytest.raises(SnapshotError):
+        analytics.load_table(str(tmp_path), "orders", use_cache=False)
+
+
+def test_short_rows_are_rejected(tmp_path):
+    write(tmp_path, "orders.csv", "id,status\n1,completed\n2\n")
+    with pytest.raises(SnapshotError):
+        analytics.load_table(str(tmp_path), "orders", use_cache=False)
+
+
+@pytest.mark.parametrize("hash_rows", [analytics.HASH_JOIN_ROWS, 0])
+def test_duplicate_ids_join_to_their_first_row(monkeypatch, hash_rows):
+    monkeypatch.setattr(analytics, "HASH_JOIN_ROWS", hash_rows)
+    table = np.array([5, 7, 5, 9], dtype=np.uint64)
+    keys = np.array([5, 9, 8, 0], dtype=np.uint64)
+    assert analytics._lookup(keys, table).tolist() == [0, 3, -1, -1]
+
+
+def test_column_store_round_trip(tmp_path):
+    write(tmp_path, "orders.csv", ORDERS)
+    first = analytics.load_table(str(tmp_path), "orders")
+    again = analytics.load_table(str(tmp_path), "orders")
+    assert isinstance(again["id"], np.memmap)
+    assert again["status"].labels == first["status"].labels
+    assert np.array_equal(again["total_amount"], first["total_amount"], equal_nan=True)
+
+
+def test_analyze_joins_categories(tmp_path):
+    write(tmp_path, "orders.csv", "id,service_id,status,total_amount\n1,s1,completed,10\n2,s2,completed,5\n"
+                                  "3,s1,pending,1\n4,s9,completed,2\n")
+    write(tmp_path, "services.csv", 'id,category\ns1,"Writing, ""Copy"""\ns2,Design\n')
+    result = analytics.analyze(str(tmp_path), use_cache=False)
+    revenue = dict((row[0], row[3]) for row in result.categories)
+    assert revenue == {'Writing, "Copy"': 10.0, "Design": 5.0, analytics.UNCATEGORIZED: 2.0}
@@ -0,0 +1,49 @@
+import io
+from datetime import datetime
+
+from roadmap.artifacts import artifact_key, render_artifact
+from roadmap.content import load_document
+from roadmap.layout import SectionCache
+from roadmap.outputs import render_bytes
+
+
+def reproducible(document, now, **options):
+    options.setdefault("section_cache", False)
+    options.setdefault("markup_cache", False)
+    return render_bytes(document, "pdf", now=now, reproducible=True, **options)
+
+
+def test_reproducible_renders_are_byte_identical():
+    document = load_document()
+    now = datetime(2025, 1, 31, 10)
+    cache = SectionCache(persist=False)
+    cold = reproducible(document, now, section_cache=cache)
+    warm = reproducible(document, now, section_cache=cache)
+    assert cold == warm == reproducible(document, now)
+
+
+def test_key_covers_the_time_of_day():
+    document = load_document()
+    ten, eleven = datetime(2025, 1, 31, 10), datetime(2025, 1, 31, 11)
+    assert reproducible(document, ten) != reproducible(document, eleven)
+    assert artifact_key(document, "pdf", ten) != artifact_key(document, "pdf", eleven)
+    assert artifact_key(document, "pdf", ten) == artifact_key(document, "pdf", datetime(2025, 1, 31, 10))
+
+
+def test_stored_artifact_is_only_served_for_the_same_inputs():
+    document = load_document()
+    outputs = {}
+    for hour in (10, 11, 10):
+        info = {}
+        out = io.BytesIO()
+        render_artifact(document, out, now=datetime(2025, 1, 31, hour), info=info)
+        assert out.getvalue() == reproducible(document, datetime(2025, 1, 31, hour))
+        outputs.setdefault(hour, []).append(info["cached"])
+    assert outputs == {10: [False, True], 11: [False]}
+
+
+def test_options_that_do_not_change_bytes_share_a_key():
+    document = load_document()
+    now = datetime(2025, 1, 31)
+    assert artifact_key(document, "pdf", now) == artifact_key(document, "pdf", now, workers=4, stats={})
+    assert artifact_key(document, "pdf", now) != artifact_key(document, "pdf", now, optimize=True)
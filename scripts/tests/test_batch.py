@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from roadmap import batch
+from roadmap.snapshot import Snapshot
+
+ORDERS = "id,freelancer_id,status,total_amount,delivery_date,created_at\n" + "".join(
+    "ord-%d,fr-%d,open,%d.50,2026-02-0%d,2026-01-0%d\n" % (i, i % 2, 10 * i, i + 1, i + 1) for i in range(5))
+UPDATES = "order_id,status,message,created_at\nord-1,open,Started,2026-01-03\nord-3,open,Revised,2026-01-04\n"
+MILESTONES = ("id,order_id,title,created_at,due_date,completed_date,is_completed\n"
+              "m1,ord-1,Draft,2026-01-02,2026-01-10,,0\nm2,ord-1,Final,2026-01-10,2026-01-20,,0\n")
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    directory = tmp_path / "snapshot"
+    directory.mkdir()
+    (directory / "orders.csv").write_text(ORDERS)
+    (directory / "order_updates.csv").write_text(UPDATES)
+    (directory / "order_milestones.csv").write_text(MILESTONES)
+    return str(directory)
+
+
+def test_plan_jobs(snapshot_dir, tmp_path):
+    with Snapshot(snapshot_dir) as snapshot:
+        orders = list(batch.plan_jobs(snapshot, "order", "out"))
+        freelancers = list(batch.plan_jobs(snapshot, "freelancer", "out"))
+        with pytest.raises(ValueError):
+            list(batch.plan_jobs(snapshot, "client", "out"))
+    assert [job.key for job in orders] == ["ord-%d" % i for i in range(5)]
+    assert [job.output for job in freelancers] == [os.path.join("out", "freelancer-fr-0-a4da67e723.pdf"),
+                                                  os.path.join("out", "freelancer-fr-1-fdcbd9b089.pdf")]
+
+
+def test_keys_that_read_alike_get_their_own_files(tmp_path):
+    directory = tmp_path / "snapshot"
+    directory.mkdir()
+    keys = ["a/b", "a_b", "a?b", "café", "cafИ", "A_b", "x" * 300]
+    (directory / "orders.csv").write_text("id\n" + "".join("%s\n" % key for key in keys), encoding="utf-8")
+    with Snapshot(str(directory)) as snapshot:
+        outputs = [job.output for job in batch.plan_jobs(snapshot, "order", "out")]
+    assert len(set(output.lower() for output in outputs)) == len(keys)
+    assert all(len(os.path.basename(output)) < 100 for output in outputs)
+
+
+@pytest.mark.parametrize("kind, count", [("order", 5), ("freelancer", 2)])
+def test_generate_renders_one_pdf_per_key(snapshot_dir, tmp_path, kind, count):
+    out = tmp_path / "out"
+    seen = []
+    summary = batch.generate(snapshot_dir, kind, str(out), workers=2, max_in_flight=2,
+                             progress=lambda completed, failed, elapsed: seen.append(completed))
+    assert (summary.completed, summary.failed, summary.errors) == (count, 0, [])
+    files = sorted(os.listdir(out))
+    assert len(files) == count and all(name.startswith(kind + "-") for name in files)
+    assert summary.bytes == sum(os.path.getsize(os.path.join(out, name)) for name in files)
+    assert all(open(os.path.join(out, name), "rb").read(4) == b"%PDF" for name in files)
+    assert seen == list(range(1, count + 1))
+
+
+def test_failed_jobs_are_reported_not_raised(snapshot_dir, tmp_path):
+    jobs = [batch.Job("order", "ord-0", str(tmp_path / "ok.pdf")),
+            batch.Job("order", "ord-1", str(tmp_path / "missing" / "dir" / "x.pdf"))]
+    with Snapshot(snapshot_dir) as snapshot:
+        db = snapshot.to_sqlite(str(tmp_path / "snapshot.db"), batch.INDEXES)
+    summary = batch.run_batch(db, jobs, workers=1)
+    assert (summary.completed, summary.failed) == (1, 1)
+    assert summary.errors[0][0] == jobs[1]
+    assert "1 failed" in summary.format()
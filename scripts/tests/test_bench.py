@@ -0,0 +1,57 @@
+import json
+import re
+
+from roadmap import bench
+from roadmap.content import load_document
+from roadmap.render import has_toc
+
+
+def test_scaled_document_repeats_the_body_with_distinct_headings():
+    document = load_document()
+    scaled = bench.scaled_document(document, 3)
+    head = [s for s in document.sections if has_toc(s) or s.id == "cover"]
+    assert len(scaled.sections) == len(head) + 3 * (len(document.sections) - len(head))
+    assert len(set(s.id for s in scaled.sections)) == len(scaled.sections)
+    headings = [b[1] for s in scaled.sections for b in s.blocks if b[0] == "heading"]
+    assert len(set(headings)) == len(headings)
+    assert bench.scaled_document(document, 1) is document
+
+
+def test_run_scale_measures_cold_and_warm_renders():
+    result = bench.run_scale(1)
+    assert result["pages"] > 0 and result["output_bytes"] > 0
+    assert 0 < result["warm_seconds"] < result["cold_seconds"]
+    assert set(bench.COMPARED) <= set(result)
+    assert "1x" in bench.format_table({"1": result})
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"results": {"1": {"cold_seconds": 1.0, "warm_seconds": 0.01, "peak_rss_mb": 50.0,
+                                  "output_bytes": 100000}}}
+    same = {"1": dict(baseline["results"]["1"], warm_seconds=0.04, cold_seconds=1.05)}
+    assert bench.compare(baseline, same) == []
+    slower = {"1": dict(baseline["results"]["1"], cold_seconds=1.5), "10": {"cold_seconds": 9.0}}
+    assert bench.compare(baseline, slower) == [("1", "cold_seconds", 1.0, 1.5)]
+
+
+def test_main_saves_and_compares_a_baseline(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    assert bench.main(["--scales", "1", "--save", path]) == 0
+    saved = json.load(open(path))
+    assert saved["version"] == bench.BASELINE_VERSION and set(saved["results"]) == {"1"}
+    saved["results"]["1"]["output_bytes"] //= 2
+    json.dump(saved, open(path, "w"))
+    assert bench.main(["--scales", "1", "--compare", path]) == 1
+    assert "REGRESSION 1x output_bytes" in capsys.readouterr().out
+
+
+def test_a_zero_baseline_reports_the_absolute_change(tmp_path, capsys):
+    assert bench.format_regression("1", "cold_seconds", 1.0, 1.5) == "REGRESSION 1x cold_seconds: 1.0 -> 1.5 (+50%)"
+    assert bench.format_regression("1", "write_seconds", 0, 0.25) == "REGRESSION 1x write_seconds: 0 -> 0.25 (+0.25)"
+    path = str(tmp_path / "baseline.json")
+    assert bench.main(["--scales", "1", "--save", path]) == 0
+    saved = json.load(open(path))
+    saved["results"]["1"]["output_bytes"] = 0
+    json.dump(saved, open(path, "w"))
+    assert bench.main(["--scales", "1", "--compare", path]) == 1
+    assert re.search(r"REGRESSION 1x output_bytes: 0 -> \d+ \(\+\d+\)", capsys.readouterr().out)
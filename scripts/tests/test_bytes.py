@@ -0,0 +1,35 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from roadmap.content import load_document
+from roadmap.outputs import render_bytes, renderer
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+@pytest.mark.parametrize("fmt", ["pdf", "md", "html"])
+def test_bytes_match_the_file_render(tmp_path, fmt):
+    document = load_document()
+    options = {"reproducible": True} if fmt == "pdf" else {}
+    path = renderer(fmt)(document, str(tmp_path / ("out." + fmt)), now=NOW, **options)
+    assert render_bytes(document, fmt, now=NOW, **options) == open(path, "rb").read()
+
+
+def test_in_memory_renders_touch_no_files(tmp_path, monkeypatch):
+    document = load_document()
+    work = tmp_path / "work"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    data = render_bytes(document, section_cache=False, markup_cache=False)
+    assert data.startswith(b"%PDF-") and data.rstrip().endswith(b"%%EOF")
+    assert os.listdir(work) == []
+
+
+def test_concurrent_renders_do_not_collide():
+    document = load_document()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: render_bytes(document, now=NOW, reproducible=True), range(4)))
+    assert len(set(results)) == 1
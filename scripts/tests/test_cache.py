@@ -0,0 +1,49 @@
+import os
+
+from roadmap import cache, layout
+
+
+def _entry(directory, name, size, mtime):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_keeps_the_most_recent_entries(tmp_path):
+    for i in range(5):
+        _entry(tmp_path, "e%d" % i, 10, 1000 + i)
+    _entry(tmp_path, ".tmp-write", 10, 1)
+    cache.prune(str(tmp_path), max_entries=2)
+    assert sorted(os.listdir(tmp_path)) == [".tmp-write", "e3", "e4"]
+
+
+def test_prune_by_bytes_removes_directories_too(tmp_path):
+    old = tmp_path / "store"
+    old.mkdir()
+    (old / "columns.json").write_text("{}")
+    os.utime(old, (1, 1))
+    _entry(tmp_path, "a", 40, 1000)
+    _entry(tmp_path, "b", 40, 1001)
+    cache.prune(str(tmp_path), max_bytes=50)
+    assert os.listdir(tmp_path) == ["b"]
+
+
+def test_touch_keeps_an_entry_from_being_pruned(tmp_path):
+    first = _entry(tmp_path, "first", 10, 1000)
+    _entry(tmp_path, "second", 10, 1001)
+    cache.touch(str(first))
+    cache.prune(str(tmp_path), max_entries=1)
+    assert os.listdir(tmp_path) == ["first"]
+
+
+def test_section_cache_bounds_the_disk(cache_root):
+    sections = layout.SectionCache(max_entries=2, max_stored=3)
+    for i in range(6):
+        sections.put(layout.SectionLayout("k%d" % i, [], (), ()))
+    stored = os.listdir(cache.cache_dir("sections"))
+    assert len(stored) == 3
+    assert "k5.pickle" in stored
+
+    # a fresh process still finds the entries that were kept
+    assert layout.SectionCache().get("k5").key == "k5"
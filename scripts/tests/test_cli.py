@@ -0,0 +1,83 @@
+import argparse
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import roadmap
+from roadmap import cli
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+
+
+def test_importing_the_package_loads_no_reportlab():
+    result = _run("import sys, roadmap, roadmap.cli\n"
+                  "print(sorted(m for m in sys.modules if m.split('.')[0] == 'reportlab'))")
+    assert result.stdout.strip() == "[]"
+
+
+def test_importing_the_script_renders_nothing(tmp_path):
+    result = _run("import importlib.util, os, sys\n"
+                  "sys.path.insert(0, os.getcwd())\n"
+                  "os.chdir(%r)\n"
+                  "spec = importlib.util.spec_from_file_location('gen', %r)\n"
+                  "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+                  "print(sorted(m for m in sys.modules if m.startswith('reportlab.platypus')), os.listdir('.'))"
+                  % (str(tmp_path), os.path.join(SCRIPTS, "generate-project-roadmap.py")))
+    assert result.stdout.strip() == "[] []"
+
+
+def test_public_names_resolve_lazily():
+    assert sorted(dir(roadmap)) == sorted(set(dir(roadmap)) | set(roadmap.__all__))
+    for name in roadmap.__all__:
+        assert getattr(roadmap, name) is not None
+    with pytest.raises(AttributeError):
+        roadmap.not_a_name
+
+
+def test_argument_parsers():
+    assert cli.format_list("all") == ["pdf", "md", "html"]
+    assert cli.format_list("md, pdf") == ["md", "pdf"]
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli.format_list("docx")
+    assert cli.date_arg("2025-01-31").day == 31
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli.date_arg("yesterday")
+
+
+def test_main_writes_every_format(tmp_path, capsys):
+    base = str(tmp_path / "plan.pdf")
+    assert cli.main(["-o", base, "--format", "all", "--date", "2025-01-31"]) == 0
+    out = capsys.readouterr().out
+    for ext in ("pdf", "md", "html"):
+        path = str(tmp_path / ("plan." + ext))
+        assert os.path.getsize(path) and path in out
+    assert "January 31, 2025" in open(str(tmp_path / "plan.md"), encoding="utf8").read()
+
+
+def test_main_to_stdout_needs_a_single_format(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["-o", "-", "--format", "pdf,md"])
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdout", stdout)
+    assert cli.main(["-o", "-", "--format", "md"]) == 0
+    assert stdout.buffer.getvalue().startswith(b"# ")
+
+
+def _without_numpy(code):
+    return subprocess.run([sys.executable, "-c", "import sys; sys.modules['numpy'] = None\n" + code],
+                          cwd=SCRIPTS, capture_output=True, text=True)
+
+
+def test_analytics_without_numpy_names_the_missing_dependency():
+    result = _without_numpy("import runpy; runpy.run_module('roadmap.analytics', run_name='__main__')")
+    assert result.returncode == 1
+    assert result.stderr.strip().startswith("the analytics report needs NumPy: pip install -r requirements.txt")
+    result = _without_numpy("import roadmap.analytics")
+    assert result.returncode == 1 and "ImportError: the analytics report needs NumPy" in result.stderr
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from roadmap import content
+from roadmap.content import ContentError, build_document, compile_spec, load_document
+
+SPEC = {"title": "Plan", "sections": [
+    {"id": "intro", "blocks": [
+        {"type": "heading", "text": "Intro", "toc": "Introduction"},
+        {"type": "paragraph", "text": "Made {generated_on}", "template": True},
+        {"type": "checklist", "items": ["a", "b"]},
+        {"type": "spacer", "height": 0.25},
+    ]},
+    {"id": "plan", "blocks": [
+        {"type": "table", "style": "timeline", "col_widths": [1, 2], "rows": [["x", 1], ["y", 2]]},
+    ]},
+]}
+
+
+def test_build_document_compiles_blocks_to_tuples():
+    document = build_document(SPEC)
+    assert document.title == "Plan" and document.filename == "roadmap.pdf"
+    intro, plan = document.sections
+    assert intro.title == "Intro"
+    assert intro.blocks == (("heading", "Intro", "Introduction"), ("paragraph", "body", "Made {generated_on}", True),
+                            ("checklist", ("a", "b")), ("spacer", 0.25))
+    assert plan.blocks == (("table", "timeline", (1.0, 2.0), (("x", "1"), ("y", "2"))),)
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda s: s["sections"].append(dict(s["sections"][0])), "duplicate section id"),
+    (lambda s: s["sections"][0]["blocks"].append({"type": "video"}), "unknown block type"),
+    (lambda s: s["sections"][0]["blocks"].append({"type": "spacer", "height": -1}), "non-negative"),
+    (lambda s: s["sections"][1]["blocks"][0]["rows"].append(["only one"]), "every row must have 2 cells"),
+    (lambda s: s.pop("title"), "'title' must be a non-empty string"),
+    (lambda s: s["sections"][0]["blocks"][1].update(text="Hi {nope}"), r"blocks\[1\]: unknown template field 'nope'"),
+    (lambda s: s["sections"][0]["blocks"][1].update(text="Hi {year"), "broken template"),
+    (lambda s: s["sections"][0]["blocks"][1].update(text="Hi {year:%Y}"), "broken template"),
+    (lambda s: s["sections"][1]["blocks"][0].update(col_widths=["wide", 2]), r"sections\[1\].blocks\[0\]: 'col_widths'"),
+    (lambda s: s["sections"][1]["blocks"][0].update(col_widths=[None, 2]), "must be non-negative numbers"),
+])
+def test_malformed_specs_name_the_problem(change, message):
+    spec = json.loads(json.dumps(SPEC))
+    change(spec)
+    with pytest.raises(ContentError, match=message):
+        build_document(spec)
+
+
+def test_template_braces_outside_a_template_are_plain_text():
+    spec = json.loads(json.dumps(SPEC))
+    spec["sections"][0]["blocks"][1].update(text="Hi {nope}", template=False)
+    assert build_document(spec).sections[0].blocks[1] == ("paragraph", "body", "Hi {nope}", False)
+
+
+def test_compiled_specs_are_cached_by_digest(cache_root):
+    raw = json.dumps(SPEC).encode("utf8")
+    first = compile_spec(raw)
+    assert compile_spec(raw) is first
+    assert (cache_root / "content" / (first.digest + ".pickle")).exists()
+
+    # a new process loads the pickle instead of recompiling
+    content._compiled.clear()
+    assert compile_spec(raw) == first
+    assert compile_spec(raw, use_cache=False) == first
+
+
+def test_invalid_json_is_a_content_error():
+    with pytest.raises(ContentError, match="not valid JSON"):
+        compile_spec(b"{", use_cache=False)
+
+
+def test_bundled_roadmap_compiles():
+    document = load_document()
+    assert document.filename.endswith(".pdf")
+    assert len(set(section.id for section in document.sections)) == len(document.sections)
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from roadmap import i18n, layout
+from roadmap.content import load_document
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+def _catalog(document):
+    strings = i18n.messages(document)
+    return dict((locale, dict((text, "%s %s" % (locale, text)) for text in strings[:8]))
+                for locale in ("de", "fr"))
+
+
+def test_messages_and_catalog_validation():
+    document = load_document()
+    assert document.title in i18n.messages(document)
+    with pytest.raises(i18n.CatalogError):
+        i18n.check_catalog({"../x": {}})
+    with pytest.raises(i18n.CatalogError):
+        i18n.check_catalog({"de": {"a": 1}})
+
+
+def test_render_locales_leaves_the_shared_cache_size_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(layout, "default_cache", layout.SectionCache(max_entries=2))
+    document = load_document()
+    stats = {}
+    paths = i18n.render_locales(document, _catalog(document), base=str(tmp_path / "roadmap.pdf"), now=NOW,
+                                stats=stats)
+    assert layout.default_cache.max_entries == 2
+    assert sorted(paths) == ["de", "fr"]
+    pdfs = [open(paths[locale]["pdf"], "rb").read() for locale in ("de", "fr")]
+    assert all(pdf.startswith(b"%PDF") for pdf in pdfs) and pdfs[0] != pdfs[1]
+    assert stats["laid_out"] and stats["sections"] == 2 * len(document.sections)
+
+    # the batch's layouts went to disk, so a second run lays nothing out up front
+    i18n.render_locales(document, _catalog(document), base=str(tmp_path / "again.pdf"), now=NOW, stats=stats)
+    assert stats["laid_out"] == 0
+
+
+def test_unknown_locale():
+    document = load_document()
+    with pytest.raises(i18n.CatalogError):
+        i18n.render_locales(document, _catalog(document), locales=["xx"])
@@ -0,0 +1,58 @@
+import io
+from datetime import datetime
+
+from roadmap import layout
+from roadmap.content import Section, load_document
+from roadmap.render import render_pdf
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+def _edited(document, index):
+    section = document.sections[index]
+    blocks = section.blocks + (("paragraph", "body", "One more line.", False),)
+    sections = document.sections[:index] + (Section(section.id, section.title, blocks),) + document.sections[index + 1:]
+    return document._replace(sections=sections, digest=document.digest + "-edited")
+
+
+def _render(document, section_cache):
+    stats = {}
+    data = render_pdf(document, io.BytesIO(), now=NOW, reproducible=True, section_cache=section_cache,
+                      stats=stats).getvalue()
+    return data, stats
+
+
+def test_only_the_changed_section_is_laid_out_again():
+    document = load_document()
+    cache = layout.SectionCache(persist=False)
+    _, cold = _render(document, cache)
+    assert not cold["reused"]
+
+    warm_bytes, warm = _render(document, cache)
+    # the table of contents is cached along with everything else
+    assert not warm["laid_out"]
+
+    edited = _edited(document, len(document.sections) - 1)
+    edited_bytes, stats = _render(edited, cache)
+    assert stats["laid_out"] == [edited.sections[-1].id]
+    assert edited_bytes == _render(edited, False)[0]
+    assert warm_bytes == _render(document, False)[0]
+
+
+def test_layouts_persist_across_processes():
+    document = load_document()
+    _render(document, layout.SectionCache())
+    # a fresh in-memory cache over the same disk store
+    _, stats = _render(document, layout.SectionCache())
+    assert not stats["laid_out"]
+    assert len(stats["reused"]) == len(document.sections)
+
+
+def test_section_key_tracks_content_and_geometry():
+    section = load_document().sections[1]
+    context = {"generated_on": "x", "year": "2026"}
+    key = layout.section_key(section, "theme", ((595, 842), ()), context)
+    assert key == layout.section_key(section, "theme", ((595, 842), ()), context)
+    assert key != layout.section_key(section, "theme", ((612, 792), ()), context)
+    assert key != layout.section_key(section, "other", ((595, 842), ()), context)
+    assert key != layout.section_key(section._replace(blocks=section.blocks[:-1]), "theme", ((595, 842), ()), context)
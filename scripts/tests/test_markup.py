@@ -0,0 +1,68 @@
+import io
+from datetime import datetime
+
+import pytest
+from reportlab.lib.styles import ParagraphStyle
+
+from roadmap.content import load_document
+from roadmap.markup import MarkupCache
+from roadmap.render import render_pdf
+from roadmap.theme import get_theme
+
+NOW = datetime(2026, 3, 14, 9, 30)
+TEXT = "Ship the <b>payments</b> flow &amp; the <i>escrow</i> <font color='red'>review</font>."
+
+
+def test_cached_paragraphs_lay_out_like_parsed_ones():
+    style = get_theme().paragraph["body"]
+    cache = MarkupCache(persist=False)
+    for _ in range(2):
+        cached = cache.paragraph(TEXT, style)
+        assert cached.wrap(200, 1000) == type(cached)(TEXT, style).wrap(200, 1000)
+        parsed = type(cached)(TEXT, style)
+        parsed.wrap(200, 1000)
+        assert repr(cached.blPara) == repr(parsed.blPara)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_rendering_through_the_cache_is_byte_identical():
+    document = load_document()
+
+    def render(markup_cache):
+        return render_pdf(document, io.BytesIO(), now=NOW, reproducible=True, section_cache=False,
+                          markup_cache=markup_cache).getvalue()
+
+    cache = MarkupCache(persist=False)
+    plain = render(False)
+    assert render(cache) == plain and render(cache) == plain
+    assert cache.hits and cache.misses
+
+
+def test_styles_are_part_of_the_key():
+    cache = MarkupCache(persist=False)
+    small = ParagraphStyle("a", fontSize=9)
+    large = ParagraphStyle("a", fontSize=14)
+    assert cache.frags(TEXT, small)[0].fontSize == 9
+    assert cache.frags(TEXT, large)[0].fontSize == 14
+    assert cache.misses == 2
+
+
+def test_entries_are_bounded_and_saved(cache_root):
+    style = get_theme().paragraph["body"]
+    cache = MarkupCache(max_entries=3)
+    for i in range(5):
+        cache.frags("item <b>%d</b>" % i, style)
+    assert len(cache._entries) == 3
+    assert cache.save() and not cache.save()
+
+    again = MarkupCache()
+    again.frags("item <b>4</b>", style)
+    assert (again.hits, again.misses) == (1, 0)
+
+
+def test_bullets_and_bad_markup():
+    style = get_theme().paragraph["body"]
+    cache = MarkupCache(persist=False)
+    assert cache.frags("<bullet>-</bullet>point", style) is None
+    with pytest.raises(ValueError):
+        cache.frags("<b>unclosed", style)
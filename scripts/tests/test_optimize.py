@@ -0,0 +1,71 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from roadmap import optimize
+from roadmap.content import build_document, load_document
+from roadmap.render import render_pdf
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+def _render(document, **options):
+    return render_pdf(document, io.BytesIO(), now=NOW, reproducible=True, section_cache=False,
+                      **options).getvalue()
+
+
+def test_optimized_pdf_is_smaller_with_the_same_pages():
+    pypdf = pytest.importorskip("pypdf")
+    plain = _render(load_document())
+    small = optimize.optimize_pdf(plain)
+    assert len(small) < 0.9 * len(plain)
+    before, after = (pypdf.PdfReader(io.BytesIO(data)) for data in (plain, small))
+    assert len(after.pages) == len(before.pages)
+    for a, b in zip(before.pages, after.pages):
+        assert a.extract_text() == b.extract_text()
+    assert [item.title for item in after.outline if not isinstance(item, list)] == \
+        [item.title for item in before.outline if not isinstance(item, list)]
+
+
+def test_identical_pages_are_stored_once_and_titles_are_untouched():
+    pypdf = pytest.importorskip("pypdf")
+    block = {"type": "paragraph", "text": "Same page"}
+    spec = {"title": "See 1 0 R (twice)", "sections": [{"id": "s%d" % i, "blocks": [block]} for i in range(3)]}
+    plain = _render(build_document(spec))
+    small = optimize.optimize_pdf(plain)
+    _, objects, _ = optimize.parse(small)
+    contents = [obj for obj in objects.values() if obj.stream is not None and b"Same page" in optimize._decoded(obj)]
+    assert len(contents) == 1
+    reader = pypdf.PdfReader(io.BytesIO(small))
+    assert len(reader.pages) == 3 and reader.metadata.title == "See 1 0 R (twice)"
+
+
+def test_annotations_and_back_links_are_never_merged():
+    heads = {
+        1: b"<< /Type /Annot /Subtype /Link /Rect [0 0 10 10] >>",
+        2: b"<< /Type /Annot /Subtype /Link /Rect [0 0 10 10] >>",
+        3: b"<< /Title (Same) /Parent 9 0 R >>",
+        4: b"<< /Title (Same) /Parent 9 0 R >>",
+        5: b"<< /S /URI /P 8 0 R >>",
+        6: b"<< /S /URI /P 8 0 R >>",
+        7: b"<< /PageMode /UseNone /Print true >>",
+        8: b"<< /PageMode /UseNone /Print true >>",
+    }
+    objects = dict((num, optimize.PDFObject(num, head, None, len(head))) for num, head in heads.items())
+    assert optimize._deduplicate(objects) == {8: 7}
+
+
+def test_render_pdf_optimize_and_linearize_without_qpdf(monkeypatch):
+    monkeypatch.setattr(optimize.shutil, "which", lambda name: None)
+    assert optimize.linearize(b"%PDF-1.4") is None
+    document = load_document()
+    assert _render(document, optimize=True) == optimize.optimize_pdf(_render(document))
+
+
+def test_size_breakdown_accounts_for_every_byte():
+    data = _render(load_document())
+    rows = optimize.size_breakdown(data)
+    assert sum(size for _, _, size in rows) == len(data)
+    assert dict((name, count) for name, count, _ in rows)["page"] > 1
+    assert optimize.format_breakdown(data, "File size").startswith("File size: ")
@@ -0,0 +1,42 @@
+import pytest
+from reportlab.platypus import Paragraph
+
+from roadmap import orders
+from roadmap.gantt import GanttChart
+from roadmap.snapshot import Snapshot
+
+ORDERS = "id,freelancer_id,status,total_amount,delivery_date,created_at\nord-1,fr-1,open,10,2026-02-01,2026-01-01\n"
+MILESTONES = "id,order_id,title,created_at,due_date,completed_date,is_completed\n" + "".join(
+    "m%d,ord-1,Step %d,2026-01-01,2026-01-%02d,,0\n" % (i, i, i + 2) for i in range(6))
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    directory = tmp_path / "snapshot"
+    directory.mkdir()
+    (directory / "orders.csv").write_text(ORDERS)
+    (directory / "order_milestones.csv").write_text(MILESTONES)
+    with Snapshot(str(directory)) as snapshot:
+        yield snapshot
+
+
+def _texts(story):
+    return [flowable.getPlainText() for flowable in story if isinstance(flowable, Paragraph)]
+
+
+def test_the_timeline_is_opt_in(snapshot):
+    story = list(orders.order_report_story(snapshot, where={"freelancer_id": "fr-1"}))
+    assert "Order Milestones" in _texts(story)
+    assert not any(isinstance(flowable, GanttChart) for flowable in story)
+
+
+def test_the_timeline_is_capped_with_a_note(snapshot, monkeypatch):
+    monkeypatch.setattr(orders, "MAX_TIMELINE_TASKS", 4)
+    story = list(orders.order_report_story(snapshot, where={"freelancer_id": "fr-1"}, timeline=True))
+    charts = [flowable for flowable in story if isinstance(flowable, GanttChart)]
+    assert len(charts) == 1 and len(charts[0].table) == 4
+    assert any(text.startswith("The chart shows at most 4 milestones") for text in _texts(story))
+
+    monkeypatch.setattr(orders, "MAX_TIMELINE_TASKS", 10)
+    story = list(orders.order_report_story(snapshot, timeline=True))
+    assert not any("at most" in text for text in _texts(story))
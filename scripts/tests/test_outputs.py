@@ -0,0 +1,89 @@
+import io
+import re
+from datetime import datetime
+
+import pytest
+
+from roadmap.content import ContentError, build_document, load_document
+from roadmap.outputs import output_path, render_outputs, renderer
+from roadmap.text import slug
+
+NOW = datetime(2025, 1, 31, 12, 0)
+SPEC = {"title": "Q&A <plan>", "sections": [
+    {"id": "contents", "blocks": [{"type": "toc", "style": "toc", "col_widths": [5, 1], "header": ["Part", "Page"]}]},
+    {"id": "one", "blocks": [
+        {"type": "heading", "text": "Costs & risks"},
+        {"type": "paragraph", "text": "Made {generated_on}; a < b", "template": True},
+        {"type": "table", "style": "timeline", "col_widths": [1, 1], "rows": [["Item", "Cost"], ["a|b", "<10"]]},
+        {"type": "checklist", "items": ["ship it"]},
+    ]},
+]}
+
+
+def test_every_format_renders_from_one_model(tmp_path):
+    document = build_document(SPEC)
+    paths = render_outputs(document, ["pdf", "md", "html", "md"], str(tmp_path / "out.pdf"), now=NOW)
+    assert sorted(paths) == ["html", "md", "pdf"]
+    assert paths["md"] == output_path(str(tmp_path / "out.pdf"), "md") == str(tmp_path / "out.md")
+    assert open(paths["pdf"], "rb").read(5) == b"%PDF-"
+
+    md = open(paths["md"], encoding="utf8").read()
+    assert "## Costs & risks" in md and "January 31, 2025" in md
+    assert "a\\|b" in md
+    assert "[Costs & risks](#%s)" % slug("Costs & risks") in md
+
+    page = open(paths["html"], encoding="utf8").read()
+    assert "<title>Q&amp;A &lt;plan&gt;</title>" in page
+    assert "a &lt; b" in page and "&lt;10" in page and "January 31, 2025" in page
+    anchors = re.findall(r'<a href="#([^"]+)">', page)
+    assert anchors and all('id="%s"' % anchor in page for anchor in anchors)
+
+
+def test_bundled_roadmap_headings_appear_in_every_text_format(tmp_path):
+    document = load_document()
+    paths = render_outputs(document, ["md", "html"], str(tmp_path / "roadmap"), now=NOW)
+    md = open(paths["md"], encoding="utf8").read()
+    page = open(paths["html"], encoding="utf8").read()
+    for section in document.sections:
+        for block in section.blocks:
+            if block[0] == "heading":
+                assert block[1] in md
+                assert 'id="%s"' % slug(block[1]) in page
+
+
+def test_a_stream_takes_one_format():
+    document = build_document(SPEC)
+    with pytest.raises(ValueError):
+        render_outputs(document, ["pdf", "md"], io.BytesIO())
+    stream = render_outputs(document, ["md"], io.BytesIO(), now=NOW)["md"]
+    assert stream.getvalue().startswith(b"- [Costs & risks](#costs--risks)\n")
+    with pytest.raises(ValueError, match="unknown format"):
+        renderer("docx")
+
+
+MARKUP = "Use <b>bold</b> & <i>care</i>: a <c> b * 2"
+
+
+def test_paragraph_markup_means_the_same_in_every_format(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    spec = {"title": "Markup", "sections": [{"id": "one", "blocks": [
+        {"type": "paragraph", "text": MARKUP},
+        {"type": "paragraph", "style": "subtitle", "text": "All <b>bold</b>"}]}]}
+    paths = render_outputs(build_document(spec), ["pdf", "md", "html"], str(tmp_path / "out.pdf"), now=NOW)
+
+    md = open(paths["md"], encoding="utf8").read()
+    assert "Use **bold** & *care*: a \\<c> b \\* 2" in md and "**All bold**" in md
+    page = open(paths["html"], encoding="utf8").read()
+    assert '<p class="body">Use <b>bold</b> &amp; <i>care</i>: a &lt;c&gt; b * 2</p>' in page
+
+    reader = pypdf.PdfReader(paths["pdf"])
+    assert "Use bold & care: a <c> b * 2" in reader.pages[0].extract_text()
+    fonts = [font["/BaseFont"] for font in reader.pages[0]["/Resources"]["/Font"].values()]
+    assert "/Helvetica-Bold" in fonts and "/Helvetica-Oblique" in fonts
+
+
+@pytest.mark.parametrize("text", ["<b>open", "shut</b>", "<b><i>crossed</b></i>"])
+def test_unbalanced_paragraph_markup_is_a_content_error(text):
+    spec = {"title": "Markup", "sections": [{"id": "one", "blocks": [{"type": "paragraph", "text": text}]}]}
+    with pytest.raises(ContentError, match="tag|never closed"):
+        build_document(spec)
@@ -0,0 +1,40 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from roadmap import markup
+from roadmap.content import load_document
+from roadmap.render import render_pdf
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+def _render(**options):
+    stats = {}
+    out = render_pdf(load_document(), io.BytesIO(), now=NOW, reproducible=True, section_cache=False,
+                     stats=stats, **options)
+    return out.getvalue(), stats
+
+
+def test_parallel_layout_is_byte_identical_to_serial():
+    serial, _ = _render()
+    parallel, stats = _render(workers=2)
+    assert parallel == serial
+    assert stats["laid_out"] and not stats["reused"]
+
+
+def test_an_executor_is_reused_and_kept_open():
+    serial, _ = _render()
+    with ThreadPoolExecutor(2) as pool:
+        assert _render(workers=pool)[0] == serial
+        assert _render(workers=pool)[0] == serial
+
+
+def test_workers_respect_a_disabled_markup_cache():
+    markup.default_cache.clear()
+    with ThreadPoolExecutor(2) as pool:
+        _render(workers=pool, markup_cache=False)
+    assert not markup.default_cache._entries
+    with ThreadPoolExecutor(2) as pool:
+        _render(workers=pool)
+    assert markup.default_cache._entries
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from roadmap import content, schema
+
+
+@pytest.mark.parametrize("pattern", ["/etc/*", "../scripts/*.sql", "roadmap/*.py", "..\\\\x.sql"])
+def test_schema_patterns_cannot_leave_the_scripts_directory(pattern):
+    spec = {"title": "T", "sections": [{"id": "s", "blocks": [
+        {"type": "schema", "title": "Tables", "files": [pattern]}]}]}
+    with pytest.raises(content.ContentError):
+        content.build_document(spec)
+    assert schema.source_files([pattern]) == []
+
+
+SQL = """
+-- profiles; with a comment
+CREATE TABLE IF NOT EXISTS public.profiles (
+  id UUID REFERENCES auth.users(id) PRIMARY KEY,
+  "email" TEXT UNIQUE NOT NULL,
+  bio TEXT DEFAULT 'a, b; c',
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+/* block comment; with a semicolon */
+CREATE TABLE orders (
+  id UUID,
+  profile_id UUID,
+  total NUMERIC(10, 2),
+  PRIMARY KEY (id),
+  FOREIGN KEY (profile_id) REFERENCES public.profiles(id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_profile ON public.orders(profile_id, total);
+ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS note TEXT, DROP COLUMN total;
+ALTER TABLE orders ALTER COLUMN note SET NOT NULL;
+ALTER TABLE auth.users ADD COLUMN ignored TEXT;
+"""
+
+
+def test_parse_sql_builds_tables_columns_and_indexes():
+    built = schema.Schema((), "")
+    built.apply(schema.parse_sql(SQL), "/x/01-test.sql")
+    assert list(built.tables) == ["profiles", "orders"]
+    profiles, orders = built.tables["profiles"], built.tables["orders"]
+    assert list(profiles.columns) == ["id", "email", "bio", "created_at"]
+    assert profiles.columns["id"].primary_key and profiles.columns["id"].references == "auth.users"
+    assert profiles.columns["email"].unique and profiles.columns["email"].not_null
+    assert profiles.columns["bio"].type == "TEXT"
+    assert profiles.rls and not orders.rls
+    assert list(orders.columns) == ["id", "profile_id", "note"]
+    assert orders.columns["id"].primary_key and orders.columns["note"].not_null
+    assert orders.columns["profile_id"].references == "profiles"
+    assert schema.index_summary(orders) == "Indexes: idx_orders_profile unique (profile_id, total)"
+    assert schema.table_heading(profiles) == "profiles - defined in 01-test.sql; row level security"
+    assert schema.table_summary(orders, "Sales") == "orders: Sales (3 columns, 1 index)"
+
+
+def test_repository_migrations_and_cache(cache_root):
+    loaded = schema.load_schema()
+    assert {"profiles", "gigs", "orders", "messages", "reviews"} <= set(loaded.tables)
+    assert all(os.path.basename(path).endswith(".sql") for path in loaded.files)
+    assert len(os.listdir(cache_root / "schema")) == len(loaded.files)
+    schema._parsed.clear()
+    again = schema.load_schema()
+    assert again.digest == loaded.digest
+    assert [list(info.columns) for info in again.tables.values()] == \
+        [list(info.columns) for info in loaded.tables.values()]
+
+
+def test_schema_blocks_follow_the_migrations():
+    document = content.load_document()
+    assert schema.document_files(document)
+    assert schema.document_digest(document) == schema.blocks_digest(
+        [block for section in document.sections for block in section.blocks])
+    assert schema.blocks_digest([("paragraph", "body", "x", False)]) == ""
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import signal
+from datetime import datetime
+
+import pytest
+
+from roadmap import content
+from roadmap.outputs import render_bytes
+from roadmap.server import JobError, RenderService, _read_request, validate_job
+
+SPEC = {"title": "Inline", "sections": [{"id": "one", "blocks": [
+    {"type": "heading", "text": "Inline spec"},
+    {"type": "paragraph", "text": "Rendered by the service."}]}]}
+
+TEMPLATE_SPEC = {"title": "Inline", "sections": [{"id": "one", "blocks": [
+    {"type": "paragraph", "text": "Hi {nope}", "template": True}]}]}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def with_service(body, workers=1):
+    service = RenderService(workers=workers, queue_size=4, timeout=60)
+    await service.start()
+    try:
+        return await body(service)
+    finally:
+        await service.stop()
+
+
+def post(service, job):
+    return service.handle("POST", "/render", json.dumps(job).encode("utf8"))
+
+
+def test_validate_job_rejects_bad_fields():
+    with pytest.raises(JobError):
+        validate_job({"format": "docx"})
+    with pytest.raises(JobError):
+        validate_job({"width": 0, "format": "png"})
+    assert validate_job({"format": "md"}) == {"format": "md"}
+
+
+def test_inline_specs_are_not_cached(cache_root):
+    async def body(service):
+        before = len(content._compiled)
+        status, content_type, data, _ = await post(service, {"spec": SPEC})
+        return status, content_type, data, before
+
+    status, content_type, data, _ = run(with_service(body))
+    assert (status, content_type) == (200, "application/pdf") and data.startswith(b"%PDF")
+    inline = content.spec_digest(json.dumps(SPEC, sort_keys=True).encode("utf8"))
+    assert not (cache_root / "content" / (inline + ".pickle")).exists()
+    # The worker warmed up on the bundled roadmap; the inline spec added no layouts.
+    sections = os.listdir(cache_root / "sections")
+    assert len(sections) == len(content.load_document().sections)
+
+
+def test_a_dead_worker_is_replaced():
+    async def body(service):
+        for pid in list(service._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.2)
+        first = await asyncio.wait_for(post(service, {"format": "md"}), 30)
+        second = await asyncio.wait_for(post(service, {"format": "md"}), 30)
+        return first[0], second[0], service.metrics.counts["restarts"]
+
+    assert run(with_service(body)) == (500, 200, 1)
+
+
+def test_overlong_request_line_is_a_bad_request():
+    async def body():
+        reader = asyncio.StreamReader(limit=1024)
+        reader.feed_data(b"GET /" + b"a" * 4096 + b" HTTP/1.1\r\n\r\n")
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    assert run(body())[-1] == 400
+
+
+def test_routes_and_errors():
+    async def body(service):
+        results = {
+            "health": await service.handle("GET", "/health", b""),
+            "missing": await service.handle("GET", "/nope", b""),
+            "get": await service.handle("GET", "/render", b""),
+            "json": await service.handle("POST", "/render", b"{"),
+            "spec": await post(service, {"spec": {"title": "No sections"}}),
+            "template": await post(service, {"spec": TEMPLATE_SPEC}),
+            "md": await post(service, {"format": "md", "now": "2025-01-31T00:00:00"}),
+            "png": await post(service, {"format": "png", "width": 64}),
+        }
+        results["metrics"] = json.loads((await service.handle("GET", "/metrics", b""))[2])
+        return results
+
+    results = run(with_service(body))
+    assert results["health"][0] == 200 and json.loads(results["health"][2])["status"] == "ok"
+    assert results["missing"][0] == 404
+    assert results["get"][0] == 405 and ("Allow", "POST") in results["get"][3]
+    assert results["json"][0] == 400 and results["spec"][0] == 422
+    assert results["template"][0] == 422 and b"unknown template field" in results["template"][2]
+    status, content_type, data, _ = results["md"]
+    assert (status, content_type) == (200, "text/markdown; charset=utf-8")
+    assert data == render_bytes(content.load_document(), "md", now=datetime(2025, 1, 31))
+    assert results["png"][0] == 200 and results["png"][2].startswith(b"\x89PNG")
+    metrics = results["metrics"]
+    # a wrong method is turned away before it counts as a request
+    assert (metrics["requests"], metrics["completed"], metrics["failed"]) == (5, 2, 3)
+    assert metrics["latency"]["p50_ms"] > 0
+
+
+def test_http_over_a_unix_socket(tmp_path):
+    path = str(tmp_path / "render.sock")
+
+    async def body(service):
+        server = await asyncio.start_unix_server(service.serve_connection, path=path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            job = json.dumps({"format": "html"}).encode("utf8")
+            writer.write(b"POST /render HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(job), job))
+            writer.write(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(), 60)
+            writer.close()
+            return data
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    data = run(with_service(body))
+    assert data.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert data.count(b"HTTP/1.1 200 OK\r\n") == 2
+    assert b"<!DOCTYPE html>" in data and data.rstrip().endswith(b"}")
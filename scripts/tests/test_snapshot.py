@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from roadmap.snapshot import Snapshot, SnapshotError, Subquery
+
+
+def _csv_snapshot(directory, text):
+    directory.mkdir()
+    (directory / "orders.csv").write_text(text, encoding="utf-8")
+    return Snapshot(str(directory))
+
+
+def test_csv_rows_and_filters(tmp_path):
+    snapshot = _csv_snapshot(tmp_path / "csv", 'id,status,title\n1,open,"a, b"\n\n2,done,c\n3,open,d\n')
+    assert snapshot.columns("orders") == ["id", "status", "title"]
+    assert list(snapshot.rows("orders", ["id", "title"], {"status": "open"})) == [("1", "a, b"), ("3", "d")]
+    assert list(snapshot.distinct("orders", "status")) == ["open", "done"]
+
+
+def test_a_short_csv_row_is_a_snapshot_error(tmp_path):
+    snapshot = _csv_snapshot(tmp_path / "csv", "id,status,title\n1,open,a\n2,done\n")
+    with pytest.raises(SnapshotError, match="line 3"):
+        list(snapshot.rows("orders", ["title"]))
+
+
+@pytest.mark.parametrize("name", ["plain.db", "what?.db", "50%#1.db"])
+def test_sqlite_paths_with_uri_characters(tmp_path, monkeypatch, name):
+    path = tmp_path / name
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE orders (id, status)")
+    conn.execute("INSERT INTO orders VALUES (1, 'open')")
+    conn.commit()
+    conn.close()
+    monkeypatch.chdir(tmp_path)
+    with Snapshot(name) as snapshot:
+        assert list(snapshot.rows("orders", ["id", "status"])) == [(1, "open")]
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot._conn.execute("DELETE FROM orders")
+
+
+def test_csv_to_sqlite_round_trip(tmp_path):
+    snapshot = _csv_snapshot(tmp_path / "csv", "id,status\n1,open\n2,done\n")
+    dest = snapshot.to_sqlite(str(tmp_path / "copy.db"), indexes=[("orders", "status")])
+    with Snapshot(dest) as copy:
+        assert list(copy.rows("orders", ["id"], {"status": ["done"]}, order_by="id")) == [("2",)]
+
+
+@pytest.mark.parametrize("kind", ["csv", "sqlite"])
+def test_subquery_filters_without_an_id_list(tmp_path, kind):
+    snapshot = _csv_snapshot(tmp_path / "csv", "id,freelancer_id\n1,f1\n2,f2\n3,f1\n")
+    (tmp_path / "csv" / "order_updates.csv").write_text("order_id,message\n1,a\n2,b\n3,c\n1,d\n")
+    if kind == "sqlite":
+        snapshot = Snapshot(snapshot.to_sqlite(str(tmp_path / "copy.db")))
+    related = {"order_id": Subquery("orders", "id", {"freelancer_id": "f1"})}
+    assert sorted(snapshot.rows("order_updates", ["message"], related)) == [("a",), ("c",), ("d",)]
+    with pytest.raises(SnapshotError, match="no column 'owner'"):
+        snapshot.rows("order_updates", ["message"], {"order_id": Subquery("orders", "id", {"owner": "f1"})})
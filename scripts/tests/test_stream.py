@@ -0,0 +1,104 @@
+import io
+import tracemalloc
+
+import pytest
+from reportlab.platypus import Paragraph, Table
+
+from roadmap.stream import LOOKAHEAD, render_streaming, streaming_table
+from roadmap.theme import get_theme
+
+
+class _Probe(Paragraph):
+    """A paragraph that notes how much of the story had been pulled when it was drawn."""
+
+    def __init__(self, text, style, counter, seen):
+        Paragraph.__init__(self, text, style)
+        self.counter, self.seen = counter, seen
+
+    def draw(self):
+        self.seen.append(self.counter[0])
+        Paragraph.draw(self)
+
+
+def test_story_is_pulled_lazily():
+    style = get_theme().paragraph["body"]
+    counter, seen = [0], []
+
+    def story():
+        for i in range(400):
+            counter[0] += 1
+            yield _Probe("Paragraph %d" % i, style, counter, seen)
+
+    render_streaming(story(), io.BytesIO())
+    assert len(seen) == 400
+    assert seen[0] <= LOOKAHEAD + 2
+    assert all(pulled - drawn <= LOOKAHEAD + 2 for drawn, pulled in enumerate(seen, 1))
+
+
+def _rows(count, pulled):
+    for i in range(count):
+        pulled[0] += 1
+        yield ("order-%04d" % i, "open")
+
+
+def test_streaming_table_pulls_rows_a_page_at_a_time():
+    pulled = [0]
+    table = streaming_table(["Order", "Status"], _rows(3000, pulled), [200, 100], get_theme().table["timeline"])
+    page, rest = table.split(300, 700)
+    rows = len(page._cellvalues) - 1
+    # one page worth of rows, plus the one peeked at to see whether more follow
+    assert 10 < rows < 100 and pulled[0] == rows + 1
+    rest.split(300, 700)
+    assert pulled[0] <= 2 * rows + 1
+
+
+def test_streaming_table_splits_every_row_across_pages():
+    pypdf = pytest.importorskip("pypdf")
+    table = streaming_table(["Order", "Status"], _rows(3000, [0]), [200, 100], get_theme().table["timeline"])
+    pdf = render_streaming(iter([table]), io.BytesIO(), title="Orders").getvalue()
+    reader = pypdf.PdfReader(io.BytesIO(pdf), strict=True)
+    pages = [page.extract_text().splitlines() for page in reader.pages]
+    assert len(pages) > 10
+    # the header repeats on every page and no row is lost or duplicated
+    assert all(lines[:2] == ["Order", "Status"] for lines in pages)
+    cells = [line for lines in pages for line in lines[2:]]
+    assert cells[0::2] == ["order-%04d" % i for i in range(3000)]
+    assert reader.pages[0]["/Contents"].get_object()["/Filter"] == ["/FlateDecode"]
+
+
+def _peak_render(count, path):
+    rows = (("order-%06d" % i, "open", "Status update number %d" % i) for i in range(count))
+    table = streaming_table(["Order", "Status", "Message"], rows, [120, 80, 200], get_theme().table["timeline"])
+    tracemalloc.start()
+    try:
+        render_streaming(iter([table]), str(path))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_pages_are_written_as_they_end(tmp_path):
+    small, large = tmp_path / "small.pdf", tmp_path / "large.pdf"
+    small_peak = _peak_render(1000, small)
+    large_peak = _peak_render(10000, large)
+    grown = large.stat().st_size - small.stat().st_size
+    assert grown > 300000
+    # only a page's object number and offsets stay behind once it is written
+    assert large_peak - small_peak < grown / 4
+
+
+def test_a_failed_render_leaves_no_partial_file(tmp_path):
+    def story():
+        for i in range(200):
+            yield Paragraph("Paragraph %d" % i, get_theme().paragraph["body"])
+        raise RuntimeError("snapshot went away")
+
+    path = tmp_path / "report.pdf"
+    with pytest.raises(RuntimeError):
+        render_streaming(story(), str(path))
+    assert not path.exists()
+
+
+def test_an_empty_streaming_table_is_a_header():
+    table = streaming_table(["Order", "Status"], iter(()), [200, 100], get_theme().table["timeline"])
+    assert isinstance(table, Table)
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from reportlab.lib.styles import ParagraphStyle
+
+from roadmap import theme
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Keep themes registered by a test out of the others."""
+    monkeypatch.setattr(theme, "_factories", dict(theme._factories))
+    monkeypatch.setattr(theme, "_themes", dict(theme._themes))
+
+
+def _factory(calls, size=10):
+    def build():
+        calls.append(1)
+        return {"body": ParagraphStyle("Body", fontName="Helvetica", fontSize=size)}, {
+            "timeline": [("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")]}
+    return build
+
+
+def test_default_theme_is_built_once_per_process():
+    first = theme.get_theme()
+    assert theme.get_theme("default") is first
+    assert set(first.paragraph) >= {"body", "normal", "subtitle", "title", "heading"}
+    assert set(first.table) >= {"toc", "timeline"}
+    with pytest.raises(TypeError):
+        first.paragraph["body"] = None
+
+
+def test_concurrent_first_use_builds_one_theme():
+    calls = []
+    theme.register_theme("shared", _factory(calls))
+    barrier = threading.Barrier(8)
+    results = []
+
+    def use():
+        barrier.wait()
+        results.append(theme.get_theme("shared"))
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and all(result is results[0] for result in results)
+    assert results[0].fonts == ("Helvetica", "Helvetica-Bold")
+
+
+def test_reregistering_rebuilds_and_changes_the_digest():
+    theme.register_theme("custom", _factory([]))
+    before = theme.get_theme("custom")
+    theme.register_theme("custom", _factory([], size=11))
+    after = theme.get_theme("custom")
+    assert after is not before and after.digest != before.digest
+    theme.register_theme("same", _factory([]))
+    assert theme.get_theme("same").digest == before.digest
+
+
+def test_unknown_theme():
+    with pytest.raises(KeyError, match="nope"):
+        theme.get_theme("nope")
@@ -0,0 +1,75 @@
+import io
+import os
+from datetime import datetime
+
+import pytest
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+
+from roadmap.content import load_document
+from roadmap.theme import PALETTE
+from roadmap.thumbnail import MAX_WIDTH, main, render_page, thumbnail, thumbnail_key
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+def _image(data):
+    image = Image.open(io.BytesIO(data))
+    assert image.format == "PNG"
+    return image.convert("RGB")
+
+
+def test_cover_page_thumbnail():
+    image = _image(thumbnail(load_document(), 1, 240, NOW))
+    assert image.size == (240, round(240 * A4[1] / A4[0]))
+    colors = set(color for _, color in image.getcolors(1 << 20))
+    primary = tuple(int(PALETTE["primary"][i:i + 2], 16) for i in (1, 3, 5))
+    # the greeked title is drawn in the brand colour on a white page
+    assert (255, 255, 255) in colors
+    assert any(sum(abs(a - b) for a, b in zip(color, primary)) < 30 for color in colors)
+
+
+def test_thumbnails_are_stored_by_content_hash(cache_root):
+    document = load_document()
+    first, second = {}, {}
+    data = thumbnail(document, 2, now=NOW, info=first)
+    assert thumbnail(document, 2, now=NOW, info=second) == data
+    assert (first["cached"], second["cached"]) == (False, True) and first["key"] == second["key"]
+    assert os.listdir(cache_root / "thumbnails") == [first["key"] + ".png"]
+    assert thumbnail(document, 2, now=NOW, use_cache=False) == data
+
+    keys = set(thumbnail_key(document, page, width, now)
+               for page, width, now in [(2, 200, NOW), (3, 200, NOW), (2, 201, NOW), (2, 200, datetime(2026, 3, 15))])
+    assert len(keys) == 4
+
+
+def test_store_keeps_the_most_recently_used_within_its_size(cache_root):
+    document = load_document()
+    keys, sizes = {}, {}
+    for page in (1, 2, 3):
+        info = {}
+        sizes[page] = len(thumbnail(document, page, now=NOW, info=info))
+        keys[page] = info["key"]
+        # file times can be coarser than the time between writes
+        os.utime(str(cache_root / "thumbnails" / (info["key"] + ".png")), (page, page))
+    thumbnail(document, 1, now=NOW)  # page 1 is now the most recently used
+    info = {}
+    fourth = len(render_page(document, 4, now=NOW))
+    thumbnail(document, 4, now=NOW, max_bytes=fourth + sizes[1], info=info)
+    assert sorted(os.listdir(cache_root / "thumbnails")) == sorted([keys[1] + ".png", info["key"] + ".png"])
+
+
+def test_bad_requests():
+    document = load_document()
+    with pytest.raises(ValueError, match="out of range"):
+        thumbnail(document, 999, now=NOW)
+    with pytest.raises(ValueError, match="width"):
+        thumbnail(document, 1, MAX_WIDTH + 1, now=NOW)
+
+
+def test_main_writes_a_png(tmp_path, capsys):
+    path = str(tmp_path / "preview.png")
+    assert main(["-o", path, "--width", "120", "--date", "2026-03-14"]) == 0
+    assert _image(open(path, "rb").read()).size[0] == 120
+    assert main(["-o", path, "--width", "120", "--date", "2026-03-14"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1].startswith("Reused ")
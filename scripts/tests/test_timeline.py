@@ -0,0 +1,108 @@
+import pytest
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph
+
+from roadmap.content import build_document
+from roadmap.outputs import render_bytes
+from roadmap.text import gantt_text
+from roadmap.timeline import TaskTable, TimelineError, critical_path_text, slack_text
+
+AWKWARD = ("Fix <b>bold</i> x", "Review <draft> & fix")
+
+
+def chain(*labels):
+    table = TaskTable()
+    previous = ()
+    for index, label in enumerate(labels):
+        table.add("t%d" % index, label, duration=1, depends=previous)
+        previous = ("t%d" % index,)
+    return table
+
+
+def paragraph_text(markup):
+    paragraph = Paragraph(markup, getSampleStyleSheet()["Normal"])
+    return "".join(frag.text for frag in paragraph.frags)
+
+
+def test_critical_path_follows_dependencies():
+    table = TaskTable()
+    table.add("a", "Design", duration=2)
+    table.add("b", "Build", duration=3, depends=("a",))
+    table.add("c", "Docs", duration=1, depends=("a",))
+    schedule = table.schedule()
+    assert [table.keys[i] for i in schedule.path] == ["a", "b"]
+    assert schedule.finish == 5
+    assert schedule.slack[table.index("c")] == 2
+
+
+def test_cycles_are_rejected():
+    table = TaskTable()
+    table.add("a", "A", duration=1, depends=("b",))
+    table.add("b", "B", duration=1, depends=("a",))
+    with pytest.raises(TimelineError):
+        table.schedule()
+
+
+@pytest.mark.parametrize("label", AWKWARD)
+def test_labels_are_escaped_for_paragraphs(label):
+    text = critical_path_text(chain("Start", label))
+    assert label in paragraph_text(text)
+
+
+def test_slack_labels_are_escaped():
+    table = TaskTable()
+    table.add("a", "Long", duration=3)
+    table.add("b", AWKWARD[1], duration=1)
+    assert AWKWARD[1] in paragraph_text(slack_text(table))
+
+
+def test_plain_text_is_not_escaped():
+    assert AWKWARD[1] in critical_path_text(chain(AWKWARD[1]), markup=False)
+
+
+def gantt_spec(names):
+    tasks = [{"id": "t%d" % i, "name": name, "duration": 1, "depends": ["t%d" % (i - 1)] if i else []}
+             for i, name in enumerate(names)]
+    return {"title": "T", "sections": [{"id": "plan", "blocks": [
+        {"type": "heading", "text": "Plan"},
+        {"type": "gantt", "style": "timeline", "col_widths": [2, 1, 2, 1],
+         "header": ["Task", "When", "Notes", "Hours"], "total": "All", "tasks": tasks}]}]}
+
+
+def test_gantt_with_markup_in_titles_renders():
+    document = build_document(gantt_spec(AWKWARD))
+    assert render_bytes(document, "pdf", section_cache=False, markup_cache=False).startswith(b"%PDF")
+    _, summary = gantt_text(document.sections[0].blocks[1])
+    assert AWKWARD[0] in summary[0] and AWKWARD[1] in summary[0]
+
+
+def test_a_large_schedule_is_linear_and_compact():
+    table = TaskTable("day")
+    count = 20000
+    # dependencies may name tasks added later
+    for i in range(count):
+        table.add(i, "Milestone" if i % 2 else "Review", duration=1 + i % 3,
+                  depends=(i - 1,) if i else (), milestone=i % 1000 == 999)
+    table.add("late", "Late", duration=1, depends=("extra",))
+    table.add("extra", "Extra", start=5, duration=2)
+    schedule = table.schedule()
+    assert len(table._labels) == 4
+    chain_end = sum(0 if i % 1000 == 999 else 1 + i % 3 for i in range(count))
+    assert schedule.finish == chain_end
+    assert list(schedule.path) == list(range(count))
+    assert schedule.early_start[table.index("late")] == 7
+    assert table.schedule() is schedule
+
+
+def test_gantt_chart_splits_across_pages():
+    from roadmap.gantt import GanttChart
+    from roadmap.theme import PALETTE
+
+    table = TaskTable("day")
+    for i in range(200):
+        table.add(i, "Task %d" % i, duration=1, depends=(i - 1,) if i else ())
+    chart = GanttChart(table, PALETTE)
+    assert chart.wrap(400, 300)[1] > 300
+    first, rest = chart.split(400, 300)
+    assert first.wrap(400, 300)[1] <= 300
+    assert (first.first, first.stop, rest.first, rest.stop) == (0, first.stop, first.stop, 200)
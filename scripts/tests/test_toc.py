@@ -0,0 +1,50 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from roadmap.content import build_document, load_document
+from roadmap.render import lay_out_document, render_pdf
+
+NOW = datetime(2026, 3, 14, 9, 30)
+WORDS = "The platform connects clients with freelancers across many service categories. "
+
+
+def _spec(chapters):
+    sections = [{"id": "contents", "blocks": [
+        {"type": "heading", "text": "Contents", "toc": False},
+        {"type": "toc", "style": "toc", "col_widths": [5, 1], "header": ["Section", "Page"]}]}]
+    for i in range(chapters):
+        sections.append({"id": "c%d" % i, "blocks": [
+            {"type": "heading", "text": "Chapter %d" % i},
+            {"type": "paragraph", "text": WORDS * (5 + 40 * (i % 3))}]})
+    return {"title": "Book", "sections": sections}
+
+
+def _toc(layout):
+    return dict((label, int(page)) for label, page in layout.entries)
+
+
+@pytest.mark.parametrize("chapters", [3, 60])
+def test_toc_pages_match_where_headings_land(chapters):
+    pypdf = pytest.importorskip("pypdf")
+    document = build_document(_spec(chapters))
+    toc = _toc(lay_out_document(document, context={"generated_on": "", "year": ""}, section_cache=False))
+    assert list(toc) == ["Chapter %d" % i for i in range(chapters)]
+
+    pdf = render_pdf(document, io.BytesIO(), now=NOW, section_cache=False).getvalue()
+    pages = [page.extract_text() for page in pypdf.PdfReader(io.BytesIO(pdf)).pages]
+    for label, page in toc.items():
+        assert label in pages[page - 1].splitlines()
+    if chapters == 60:
+        # the contents run over more than one page, which shifts every entry
+        assert toc["Chapter 0"] > 2
+
+
+def test_bundled_roadmap_lists_its_headings():
+    document = load_document()
+    laid = lay_out_document(document, section_cache=False)
+    labels = [label for label, _ in laid.entries]
+    assert labels and len(labels) == len(set(labels))
+    pages = [int(page) for _, page in laid.entries]
+    assert pages == sorted(pages)
@@ -0,0 +1,100 @@
+import io
+import json
+
+import pytest
+
+from roadmap import cli, layout
+from roadmap import trace as tracing
+from roadmap.content import load_document
+from roadmap.render import render_pdf
+
+
+class _BrokenStream(io.BytesIO):
+    def write(self, data):
+        raise OSError("disk full")
+
+
+def test_trace_records_sections_and_stops_the_sampler():
+    trace = tracing.Trace(profile=True, interval=0.001)
+    document = load_document()
+    render_pdf(document, io.BytesIO(), trace=trace, section_cache=False)
+    # the table of contents is laid out after the sections it lists
+    assert set(record["id"] for record in trace.sections) == set(section.id for section in document.sections)
+    assert trace.pages > 0 and trace.seconds > 0
+    assert not trace._sampler.is_alive()
+
+
+def test_a_failed_render_still_finishes_the_trace():
+    events = []
+    hook = lambda event, data: events.append(event)
+    tracing.subscribe(hook)
+    try:
+        trace = tracing.Trace(profile=True, interval=0.001)
+        with pytest.raises(OSError):
+            render_pdf(load_document(), _BrokenStream(), trace=trace, section_cache=False)
+    finally:
+        tracing.unsubscribe(hook)
+    assert not trace._sampler.is_alive()
+    assert events[-1] == "render"
+
+
+def test_flowables_are_timed_and_dumped(tmp_path):
+    trace = tracing.Trace(profile=True, interval=0.001)
+    render_pdf(load_document(), io.BytesIO(), trace=trace, section_cache=False)
+    paragraphs = trace.flowables["Paragraph"]
+    assert paragraphs["count"] > 0 and paragraphs["wraps"] >= paragraphs["count"]
+    assert paragraphs["draws"] > 0 and paragraphs["wrap_seconds"] > 0
+
+    data = json.load(open(trace.dump(str(tmp_path / "trace.json"))))
+    assert data["pages"] == trace.pages and len(data["sections"]) == len(trace.sections)
+    summary = trace.format_summary()
+    assert summary.startswith("Rendered %d pages" % trace.pages) and "Paragraph" in summary
+
+
+def test_cached_sections_are_traced_as_cached():
+    document = load_document()
+    cache = layout.SectionCache(persist=False)
+    render_pdf(document, io.BytesIO(), section_cache=cache)
+    trace = tracing.Trace()
+    render_pdf(document, io.BytesIO(), trace=trace, section_cache=cache)
+    assert trace.sections and all(record["cached"] for record in trace.sections)
+    assert not trace.flowables
+
+
+def test_hooks_see_every_render_without_a_trace_argument():
+    events = []
+    hook = tracing.subscribe(lambda event, data: events.append((event, data)))
+    try:
+        render_pdf(load_document(), io.BytesIO(), section_cache=False)
+    finally:
+        tracing.unsubscribe(hook)
+    assert [event for event, _ in events].count("render") == 1
+    assert events[-1][1]["pages"] > 0
+    render_pdf(load_document(), io.BytesIO(), section_cache=False)
+    assert [event for event, _ in events].count("render") == 1
+
+
+def test_cli_writes_a_trace(tmp_path, capsys):
+    path = str(tmp_path / "trace.json")
+    assert cli.main(["-o", str(tmp_path / "out.pdf"), "--trace", path, "--no-cache"]) == 0
+    assert json.load(open(path))["sections"]
+    assert "Rendered" in capsys.readouterr().err
+
+
+def test_a_failing_hook_cannot_change_a_render(caplog):
+    def hook(event, data):
+        raise RuntimeError("hook broke")
+
+    document = load_document()
+    expected = render_pdf(document, io.BytesIO(), section_cache=False, reproducible=True).getvalue()
+    tracing.subscribe(hook)
+    try:
+        output = render_pdf(document, io.BytesIO(), section_cache=False, reproducible=True).getvalue()
+        with pytest.raises(OSError, match="disk full"):
+            render_pdf(document, _BrokenStream(), section_cache=False)
+    finally:
+        tracing.unsubscribe(hook)
+    assert output == expected
+    failures = [record for record in caplog.records if record.name == "roadmap.trace"]
+    assert {record.getMessage().rsplit(" ", 2)[-2] for record in failures} == {"'section'", "'render'"}
+    assert all(record.exc_info[0] is RuntimeError for record in failures)
@@ -0,0 +1,83 @@
+import io
+import json
+import threading
+import time
+
+from roadmap import cli, watch
+from roadmap.content import DEFAULT_SPEC
+
+
+def test_changes_waits_for_writes_to_settle(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text("{}")
+
+    def edit():
+        time.sleep(0.05)
+        for i in range(3):
+            path.write_text("{%s}" % ("x" * i))
+            time.sleep(0.01)
+
+    threading.Thread(target=edit).start()
+    start = time.perf_counter()
+    signature = next(watch.changes([str(path)], interval=0.02, settle=0.1))
+    assert signature == watch._signature([str(path)])
+    assert time.perf_counter() - start >= 0.1
+    assert path.read_text() == "{xx}"
+
+
+def test_a_rebuild_lays_out_only_the_edited_section(tmp_path, monkeypatch):
+    spec = json.load(open(DEFAULT_SPEC, encoding="utf8"))
+    path = tmp_path / "roadmap.json"
+    path.write_text(json.dumps(spec))
+    edited = spec["sections"][-1]
+
+    calls = []
+
+    def one_change(paths, interval=0.2, settle=0.05):
+        assert paths[0] == str(path)
+        calls.append(paths)
+        if len(calls) > 1:
+            return
+        edited["blocks"].append({"type": "paragraph", "text": "A late addition."})
+        path.write_text(json.dumps(spec))
+        yield watch._signature(paths)
+        path.write_text("{not json")
+        yield watch._signature(paths)
+
+    monkeypatch.setattr(watch, "changes", one_change)
+    args = cli.build_parser().parse_args(["--spec", str(path), "-o", str(tmp_path / "out.pdf"), "--no-cache"])
+    out = io.StringIO()
+    assert watch.watch(args, out=out) == 0
+    lines = out.getvalue().splitlines()
+    count = len(spec["sections"])
+    assert "] Built in " in lines[0] and "%d of %d sections laid out" % (count, count) in lines[0]
+    assert lines[1].startswith("Watching %s" % path)
+    assert "Rebuilt in " in lines[2] and ": 1 of %d sections laid out (%s)" % (count, edited["id"]) in lines[2]
+    assert "Failed: content spec is not valid JSON" in lines[3]
+
+    # the broken spec reads no migrations, so only the spec itself is watched
+    assert lines[4] == "Watching %s for changes (Ctrl+C to stop)" % path
+
+
+def test_the_watched_files_follow_the_spec(tmp_path, monkeypatch):
+    spec = {"title": "Plan", "sections": [{"id": "one", "blocks": [{"type": "heading", "text": "One"}]}]}
+    path = tmp_path / "roadmap.json"
+    path.write_text(json.dumps(spec))
+    watched = []
+
+    def changes(paths, interval=0.2, settle=0.05):
+        watched.append(list(paths))
+        if len(watched) == 1:
+            spec["sections"][0]["blocks"].append({"type": "schema", "title": "Tables"})
+            path.write_text(json.dumps(spec))
+            yield watch._signature(paths)
+            raise AssertionError("the old file set is still being watched")
+
+    monkeypatch.setattr(watch, "changes", changes)
+    args = cli.build_parser().parse_args(["--spec", str(path), "-o", str(tmp_path / "out.pdf"), "--no-cache"])
+    out = io.StringIO()
+    assert watch.watch(args, out=out) == 0
+    assert watched[0] == [str(path)]
+    assert watched[1][0] == str(path) and len(watched[1]) > 1
+    assert all(name.endswith(".sql") for name in watched[1][1:])
+    assert out.getvalue().count("Watching ") == 2